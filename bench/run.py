@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from bench.synth import calendar_weeks, make_calendar, make_catalogue, write_yaml
+from tools import coverage, index_cache, plan, ranking, search, suggest_books, suggest_videos, validate
+from tools.calendar_doc import VIDEOS, apply_blocks, count_changed
+from tools.inject_books import books_for_week, md_section
+from tools.inject_videos import build_md_section, videos_for_week
+
+# Benchmarks de las herramientas de recursos con catálogos sintéticos.
+#
+#   python -m bench.run                      (escalas 1 y 100)
+#   python -m bench.run --scales 1 100 10000 --out bench-results.json
+#
+# Cada escala multiplica los items de resources/*.yml y las semanas de Calendario.md.
+# "plan inject --all" inyecta todas las semanas del calendario sintético (S1..S24
+# y las copias renumeradas S25...), no solo S1..S24; "blocks_changed" lo confirma.
+
+VIDEOS_SRC = Path("resources/videos.yml")
+BOOKS_SRC = Path("resources/books.yml")
+CALENDAR_SRC = Path("Calendario.md")
+WEEKS = [f"S{i}" for i in range(1, 25)]
+TOPICS = ["poo", "decoradores", "fastapi"]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Mejor tiempo por llamada (s) de ``repeat`` rondas calibradas con ``timeit``."""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=loops)) / loops
+    return {"seconds": best, "loops": loops}
+
+
+def run_scale(scale: int, repeat: int, workdir: Path) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    def record(name: str, fn: Callable[[], Any], **extra: Any) -> None:
+        r = measure(fn, repeat)
+        results.append({"scale": scale, "name": name, **r, **extra})
+        print(f"  x{scale:<6} {name:<32} {r['seconds'] * 1e3:>10.3f} ms", file=sys.stderr)
+
+    videos_yml, books_yml = workdir / "videos.yml", workdir / "books.yml"
+    write_yaml(make_catalogue(VIDEOS_SRC, scale, seed=1), videos_yml)
+    write_yaml(make_catalogue(BOOKS_SRC, scale, seed=2), books_yml)
+    calendar_src = workdir / "Calendario.src.md"
+    calendar_src.write_text(make_calendar(CALENDAR_SRC, scale), encoding="utf-8")
+    calendar = workdir / "Calendario.md"
+
+    videos = suggest_videos.load_index(videos_yml, use_cache=False)
+    books = suggest_books.load_index(books_yml, use_cache=False)
+    sizes = {"videos": len(videos.items), "books": len(books.items)}
+
+    record("load_index[videos,yaml]", lambda: suggest_videos.load_index(videos_yml, use_cache=False), items=sizes["videos"])
+    record("load_index[books,yaml]", lambda: suggest_books.load_index(books_yml, use_cache=False), items=sizes["books"])
+    index_cache.load_yaml(videos_yml)
+    record("load_index[videos,cache]", lambda: suggest_videos.load_index(videos_yml), items=sizes["videos"])
+    # Pasada completa de validación (índice en caché, sin reutilizar el resultado previo)
+    record(
+        "validate_file[videos+books]",
+        lambda: [validate.validate_file(p) for p in (videos_yml, books_yml)],
+        items=sizes["videos"] + sizes["books"],
+    )
+
+    record("videos_for_week[x24]", lambda: [videos_for_week(videos, w) for w in WEEKS])
+    record("books_for_week[x24]", lambda: [books_for_week(books, w) for w in WEEKS])
+    record("suggest_videos.by_block", lambda: suggest_videos.by_block(videos, "B3"))
+    record("suggest_books.select", lambda: suggest_books.select(books, "S11", None, TOPICS))
+    block_items = suggest_videos.by_block(videos, "B3")
+    record("filter_topics", lambda: suggest_videos.filter_topics(block_items, TOPICS), items=len(block_items))
+    videos.bitsets()  # se construyen una vez por índice; se mide la consulta
+    record("ranking.rank[top10,S11]", lambda: ranking.rank(videos, TOPICS, week="S11"), items=sizes["videos"])
+    segment = search.Segment("videos")
+    segment.update(index_cache.load_yaml(videos_yml))
+    record("search.search[top10]", lambda: search.search(" ".join(TOPICS), [segment]), items=sizes["videos"])
+    record("coverage.build[videos+books]", lambda: coverage.build([videos, books]), items=sizes["videos"] + sizes["books"])
+
+    v_items, b_items = videos_for_week(videos, "S11"), books_for_week(books, "S11")
+    record("build_md_section[S11]", lambda: build_md_section("S11", v_items), items=len(v_items))
+    record("suggest_videos.md_section[S11]", lambda: suggest_videos.md_section("S11", v_items), items=len(v_items))
+    record("inject_books.md_section[S11]", lambda: md_section("S11", b_items), items=len(b_items))
+    record("suggest_books.to_md[S11]", lambda: suggest_books.to_md("S11", b_items), items=len(b_items))
+
+    shutil.copy(calendar_src, calendar)
+    sections = [build_md_section("S11", v_items), build_md_section("S11", v_items[:1])]
+    flip = [0]
+
+    def inject_one() -> None:
+        flip[0] ^= 1  # alterna el contenido para que cada llamada escriba
+        apply_blocks(calendar, [(VIDEOS, "S11", sections[flip[0]])])
+
+    record("inject[single week]", inject_one, calendar_bytes=calendar.stat().st_size)
+
+    all_weeks = calendar_weeks(scale)
+
+    def inject_all() -> int:
+        shutil.copy(calendar_src, calendar)
+        with redirect_stdout(io.StringIO()):
+            results = plan.run_inject(all_weeks, calendar, videos_index=videos_yml, books_index=books_yml, incremental=False)
+        return count_changed(results)
+
+    record(
+        "plan inject --all",
+        inject_all,
+        calendar_bytes=calendar_src.stat().st_size,
+        weeks=len(all_weeks),
+        blocks_changed=inject_all(),
+    )
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="bench", description="Benchmarks de tools/ con catálogos sintéticos.")
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 100], help="Factores de tamaño (ej. 1 100 10000)")
+    ap.add_argument("--repeat", type=int, default=3, help="Rondas por medición (se toma la mejor)")
+    ap.add_argument("--out", help="Archivo JSON de salida (por defecto, stdout)")
+    args = ap.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        index_cache.CACHE_DIR = Path(tmp) / "cache"
+        for scale in args.scales:
+            workdir = Path(tmp) / f"x{scale}"
+            workdir.mkdir()
+            results += run_scale(scale, args.repeat, workdir)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import copy
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml  # type: ignore
+
+# Catálogos y calendarios sintéticos a partir de los reales (resources/*.yml, Calendario.md).
+
+WEEKS = [f"S{i}" for i in range(1, 25)]
+BLOCKS = ["B1", "B2", "B3", "B4", "B5A", "B5B"]
+
+
+def make_catalogue(src: Path, scale: int, seed: int = 0) -> Dict[str, Any]:
+    """Replica los items de ``src`` ``scale`` veces con ids únicos y semanas/temas variados."""
+    rng = random.Random(seed)
+    data = yaml.safe_load(src.read_text(encoding="utf-8"))
+    base = [it for items in (data.get("collections") or {}).values() for it in items]
+    vocab = sorted({t for it in base for t in (it.get("topics") or [])})
+
+    collections: Dict[str, List[Dict[str, Any]]] = {}
+    for n in range(scale):
+        coll = collections.setdefault(f"c{n % 50}", [])
+        for it in base:
+            clone = copy.deepcopy(it)
+            clone["id"] = f"{it['id']}_{n}"
+            clone["title"] = f"{it.get('title', '')} #{n}"
+            if n:
+                clone["weeks"] = sorted(rng.sample(WEEKS, k=rng.randint(1, 4)), key=lambda w: int(w[1:]))
+                clone["blocks"] = rng.sample(BLOCKS, k=rng.randint(1, 2))
+                clone["topics"] = rng.sample(vocab, k=min(len(vocab), rng.randint(2, 8)))
+            coll.append(clone)
+    return {"version": 1, "collections": collections}
+
+
+def write_yaml(data: Dict[str, Any], path: Path) -> None:
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    path.write_text(yaml.dump(data, Dumper=dumper, allow_unicode=True, sort_keys=False), encoding="utf-8")
+
+
+def calendar_weeks(scale: int) -> List[str]:
+    """Semanas de ``make_calendar(src, scale)``: S1..S24 y las de cada copia."""
+    return [f"S{i}" for i in range(1, 24 * scale + 1)]
+
+
+def make_calendar(src: Path, scale: int) -> str:
+    """Calendario.md real seguido de ``scale - 1`` copias con las semanas renumeradas (S25, S26, ...)."""
+    text = src.read_text(encoding="utf-8")
+    week_re = re.compile(r"(### S|_BASE:S|— S)(\d+)")
+    parts = [text]
+    for n in range(1, scale):
+        offset = 24 * n
+        parts.append(week_re.sub(lambda m, offset=offset: f"{m.group(1)}{int(m.group(2)) + offset}", text))
+    return "\n".join(parts)
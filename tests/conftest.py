@@ -3,3 +3,5 @@ import sys
 
 # Inserta .../<repo>/src al inicio del sys.path para que pytest vea "app"
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# ... y la raíz del repo para importar el paquete "tools"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
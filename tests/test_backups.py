@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from tools import backups
+
+
+def test_snapshots_dedupe_delta_and_restore(tmp_path: Path):
+    cal = tmp_path / "Calendario.md"
+    versions = ["".join(f"línea {i}\n" for i in range(200)) + f"fin {n}\n" for n in range(4)]
+
+    hashes = []
+    for text in versions:
+        cal.write_text(text, encoding="utf-8")
+        hashes.append(backups.snapshot(cal, label="test"))
+    # Mismo contenido otra vez: no crea instantánea nueva
+    assert backups.snapshot(cal) == hashes[-1]
+    assert [e["hash"] for e in backups.list_snapshots(cal)] == hashes
+
+    objects = backups.store_dir(cal) / "objects"
+    assert (objects / hashes[1]).read_bytes()[:1] == b"D"
+
+    backups.restore(cal, hashes[0][:10])
+    assert cal.read_text(encoding="utf-8") == versions[0]
+
+
+def test_prune_rebases_deltas(tmp_path: Path):
+    cal = tmp_path / "Calendario.md"
+    versions = ["base\n" * 50 + f"v{n}\n" for n in range(5)]
+    for text in versions:
+        cal.write_text(text, encoding="utf-8")
+        backups.snapshot(cal)
+
+    assert backups.prune(cal, keep=2) == 3
+    entries = backups.list_snapshots(cal)
+    assert len(entries) == 2
+    assert len(list((backups.store_dir(cal) / "objects").iterdir())) == 2
+    for e, text in zip(entries, versions[-2:], strict=True):
+        assert backups.read_object(cal, e["hash"]).decode("utf-8") == text
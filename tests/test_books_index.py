@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from tools import validate
+
+BOOKS = Path("resources/books.yml")
+
+
+def test_books_yaml_exists_and_structure():
+    assert BOOKS.exists(), "Falta resources/books.yml"
+
+
+def test_books_catalogue_is_valid():
+    issues = validate.validate_file(BOOKS, use_cache=False)
+    assert not issues, "\n".join(map(str, issues))
+
+
+def test_ids_unique_across_catalogues():
+    issues = validate.validate([Path("resources/videos.yml"), BOOKS], use_cache=False)
+    assert not issues, "\n".join(map(str, issues))
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from tools.calendar_doc import (
+    APPENDED,
+    BOOKS,
+    INSERTED,
+    REPLACED,
+    UNCHANGED,
+    VIDEOS,
+    CalendarDoc,
+    apply_blocks,
+    count_changed,
+)
+
+CAL = """# Calendario
+
+### S1 — Entorno
+
+texto S1
+
+### S2 — Strings
+
+<!-- VIDEOS_BASE:S2 START -->
+### Videos base — S2
+
+- viejo
+<!-- VIDEOS_BASE:S2 END -->
+
+texto S2
+"""
+
+
+def test_set_block_actions():
+    doc = CalendarDoc(CAL)
+    assert doc.weeks() == ["S1", "S2"]
+    assert doc.set_block(VIDEOS, "S2", "### Videos base — S2\n\n- nuevo\n") == REPLACED
+    assert doc.set_block(VIDEOS, "S1", "### Videos base — S1\n") == INSERTED
+    assert doc.set_block(BOOKS, "S9", "### Lecturas base — S9\n") == APPENDED
+
+    text = doc.text()
+    assert "- viejo" not in text and "- nuevo" in text
+    assert "### S1 — Entorno\n\n<!-- VIDEOS_BASE:S1 START -->" in text
+    assert text.endswith(
+        "## S9\n\n<!-- BOOKS_BASE:S9 START -->\n### Lecturas base — S9\n<!-- BOOKS_BASE:S9 END -->\n"
+    )
+
+
+def test_apply_blocks_is_idempotent(tmp_path: Path):
+    cal = tmp_path / "Calendario.md"
+    cal.write_text(CAL, encoding="utf-8")
+    updates = [(VIDEOS, w, f"### Videos base — {w}\n") for w in ("S1", "S2", "S3")]
+
+    first = apply_blocks(cal, updates)
+    after_first = cal.read_text(encoding="utf-8")
+    second = apply_blocks(cal, updates)
+
+    assert count_changed(first) == 3
+    assert count_changed(second) == 0
+    assert {action for _, _, action in second} == {UNCHANGED}
+    assert cal.read_text(encoding="utf-8") == after_first
@@ -0,0 +1,118 @@
+import marshal
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+
+from tools import calendar_lock
+from tools.calendar_doc import BOOKS, INSERTED, REPLACED, VIDEOS, CalendarDoc, apply_blocks
+
+WRITERS = 8
+PER_WRITER = 6  # 8 x 6 = 48 bloques distintos: 24 semanas x (libros, videos)
+
+
+def calendar_with_weeks(tmp_path: Path) -> Path:
+    cal = tmp_path / "Calendario.md"
+    cal.write_text("# C\n\n" + "".join(f"### S{i}\n\n" for i in range(1, 25)), encoding="utf-8")
+    return cal
+
+
+def keys_of(writer: int):
+    for n in range(PER_WRITER):
+        k = writer * PER_WRITER + n
+        yield (VIDEOS if k % 2 else BOOKS), f"S{k // 2 + 1}"
+
+
+def _writer(cal: str, writer: int) -> None:
+    for marker, week in keys_of(writer):
+        apply_blocks(Path(cal), [(marker, week, f"escritor {writer} {marker} {week}\n")])
+
+
+def test_parallel_writers_lose_nothing(tmp_path: Path):
+    cal = calendar_with_weeks(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_writer, args=(str(cal), w)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    blocks = CalendarDoc(cal.read_text(encoding="utf-8")).blocks()
+    assert len(blocks) == WRITERS * PER_WRITER
+    for w in range(WRITERS):
+        for marker, week in keys_of(w):
+            assert f"escritor {w} {marker} {week}" in blocks[(marker, week)]
+    assert not list(calendar_lock.queue_dir(cal).iterdir())  # sin pedidos ni resultados huérfanos
+
+
+def test_concurrent_calls_are_group_committed(tmp_path: Path):
+    cal = calendar_with_weeks(tmp_path)
+    commits = []
+
+    def apply(path, merged, create):
+        commits.append(len(merged))
+        time.sleep(0.05)  # mientras tanto llegan los demás
+        return [(m, w, REPLACED) for m, w, _ in merged]
+
+    results = {}
+    start = threading.Barrier(WRITERS)
+
+    def call(n: int) -> None:
+        start.wait()
+        results[n] = calendar_lock.submit(
+            cal, [(VIDEOS, f"S{n + 1}", "x"), (BOOKS, f"S{n + 1}", "y")], apply
+        )
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    # Todos los pedidos se aplicaron una vez, en pocas reescrituras
+    assert sum(commits) == 2 * WRITERS and len(commits) < WRITERS
+    assert all(
+        results[n] == [(VIDEOS, f"S{n + 1}", REPLACED), (BOOKS, f"S{n + 1}", REPLACED)]
+        for n in range(WRITERS)
+    )
+
+
+def test_single_caller_and_stale_requests(tmp_path: Path):
+    cal = calendar_with_weeks(tmp_path)
+    queue = calendar_lock.queue_dir(cal)
+    queue.mkdir()
+    # Pedido de un proceso que ya no existe: se descarta, no se aplica
+    (queue / "00000000000000000001-999999999-1-0.req").write_bytes(b"basura")
+    assert apply_blocks(cal, [(VIDEOS, "S3", "hola\n")]) == [(VIDEOS, "S3", INSERTED)]
+    assert not list(queue.iterdir())
+    assert calendar_lock.lock_path(cal).exists()
+
+
+def test_only_compatible_requests_are_batched(tmp_path: Path):
+    cal = tmp_path / "Calendario.md"
+    queue = calendar_lock.queue_dir(cal)
+    queue.mkdir()
+    calls = []
+
+    def apply(path, merged, create):
+        calls.append(([w for _, w, _ in merged], create))
+        return [(m, w, INSERTED) for m, w, _ in merged]
+
+    def foreign(n: int, create: bool, group: str) -> Path:
+        req = queue / f"{n:020d}-{os.getpid()}-1-{n}.req"  # proceso vivo: sigue en cola
+        req.write_bytes(marshal.dumps(([(VIDEOS, f"S{n}", "x")], create, group)))
+        return req
+
+    # Sin calendario: un pedido que sí permite crearlo no se aplica con el de quien no
+    creator = foreign(1, True, "")
+    calendar_lock.submit(cal, [(BOOKS, "S9", "y")], apply, create_if_missing=False, window=0)
+    assert calls.pop() == (["S9"], False) and creator.exists()
+    # Con el calendario creado el flag ya no importa, pero otro grupo (otro backup
+    # con su etiqueta) sigue aparte
+    cal.write_text("# C\n", encoding="utf-8")
+    other = foreign(2, False, "tools.inject_books._backup")
+    calendar_lock.submit(cal, [(BOOKS, "S9", "y")], apply, window=0)
+    assert calls.pop() == (["S1", "S9"], False)
+    assert creator.with_suffix(".done").exists() and other.exists()
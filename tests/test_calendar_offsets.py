@@ -0,0 +1,137 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+from tools import calendar_doc, calendar_offsets, index_cache
+from tools.calendar_doc import (
+    BOOKS,
+    INSERTED,
+    REPLACED,
+    UNCHANGED,
+    VIDEOS,
+    CalendarDoc,
+    apply_blocks,
+)
+from tools.calendar_offsets import OffsetIndex, journal_path, patch_blocks, recover
+
+
+@pytest.fixture
+def cal(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    text = Path("Calendario.md").read_text(encoding="utf-8")
+    path = tmp_path / "Calendario.md"
+    path.write_text(
+        re.sub(r"(?s)<!-- BOOKS_BASE:S1\d START -->.*?END -->\n", "", text), encoding="utf-8"
+    )
+    return path
+
+
+def expected(path: Path, updates):
+    doc = CalendarDoc(path.read_text(encoding="utf-8"))
+    return [(m, w, doc.set_block(m, w, md)) for m, w, md in updates], doc.text()
+
+
+def test_patches_match_in_memory_engine(cal: Path):
+    same = CalendarDoc(cal.read_text(encoding="utf-8")).get_block(VIDEOS, "S3")
+    same_len = same.split("\n", 1)[1].rsplit("\n", 1)[0] + "\n"
+    steps = [
+        [(VIDEOS, "S2", "### Videos base — S2\n\n- mucho más largo que antes ñ\n" * 3)],
+        [(VIDEOS, "S3", same_len.replace("Videos", "VIDEOS"))],  # mismo largo: en su sitio
+        [(BOOKS, "S12", "### Lecturas base — S12\n"), (VIDEOS, "S20", "- corto\n")],
+        [(BOOKS, "S12", "### Lecturas base — S12\n")],
+    ]
+    actions = []
+    for updates in steps:
+        want_actions, want_text = expected(cal, updates)
+        assert patch_blocks(cal, updates) == want_actions
+        assert cal.read_text(encoding="utf-8") == want_text
+        actions += [a for *_, a in want_actions]
+    assert actions == [REPLACED, REPLACED, INSERTED, REPLACED, UNCHANGED]
+
+    # El índice actualizado tras los parches coincide con uno reconstruido desde cero
+    cached, fresh = OffsetIndex.load(cal), OffsetIndex.build(cal)
+    assert (cached.names, cached.gaps, cached.lengths, cached.digests) == (
+        fresh.names,
+        fresh.gaps,
+        fresh.lengths,
+        fresh.digests,
+    )
+    assert not journal_path(cal).exists()
+
+
+def test_falls_back_when_patch_is_not_possible(cal: Path):
+    before = cal.read_bytes()
+    assert patch_blocks(cal, [(VIDEOS, "S99", "- sin encabezado\n")]) is None  # habría que anexar
+    OffsetIndex.load(cal)
+    # Edición externa que conserva tamaño y mtime: el hash del bloque lo detecta
+    st = cal.stat()
+    cal.write_bytes(
+        before.replace(b"VIDEOS_BASE:S2 START -->\n###", b"VIDEOS_BASE:S2 START -->\n#!#", 1)
+    )
+    os.utime(cal, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert patch_blocks(cal, [(VIDEOS, "S2", "- nuevo\n")]) is None
+    assert cal.read_bytes()[: len(before)].count(b"#!#") == 1
+
+
+def test_apply_blocks_uses_patch_for_large_calendars(cal: Path, monkeypatch):
+    monkeypatch.setattr(calendar_doc, "PATCH_THRESHOLD", 0)
+    updates = [(VIDEOS, "S5", "- uno\n"), (BOOKS, "S99", "- nuevo\n")]
+    want_actions, want_text = expected(cal, updates)
+    snapshots = []
+    # Una semana con encabezado: parche, con backup previo (y sin él si no cambia nada)
+    assert apply_blocks(cal, updates[:1], backup=snapshots.append) == want_actions[:1]
+    assert apply_blocks(cal, updates[:1], backup=snapshots.append)[0][2] == UNCHANGED
+    assert snapshots == [cal]
+    # Anexar al final no se parchea: camino normal (con backup)
+    assert apply_blocks(cal, updates[1:], backup=snapshots.append)[0][2] == "appended"
+    assert cal.read_text(encoding="utf-8") == want_text and snapshots == [cal, cal]
+
+
+def crash_after_splice(cal: Path, monkeypatch, updates) -> None:
+    """Aplica el parche y simula una caída antes de borrar el diario."""
+    real = calendar_offsets._splice
+
+    def splice(*args):
+        real(*args)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(calendar_offsets, "_splice", splice)
+    with pytest.raises(KeyboardInterrupt):
+        patch_blocks(cal, updates)
+    monkeypatch.setattr(calendar_offsets, "_splice", real)
+    assert journal_path(cal).exists()
+
+
+@pytest.mark.parametrize("md", ["- más largo que el bloque de antes\n" * 3, None])
+def test_recover_restores_interrupted_patch(cal: Path, monkeypatch, md):
+    original = cal.read_bytes()
+    if md is None:  # mismo largo: se sobrescribe en su sitio
+        block = CalendarDoc(original.decode("utf-8")).get_block(VIDEOS, "S4")
+        md = block.split("\n", 1)[1].rsplit("\n", 1)[0].replace("Videos", "VIDEOS") + "\n"
+    crash_after_splice(cal, monkeypatch, [(VIDEOS, "S4", md)])
+    assert cal.read_bytes() != original
+    assert recover(cal) is True
+    assert cal.read_bytes() == original and not journal_path(cal).exists()
+    # Diario incompleto: el calendario todavía no se había tocado
+    journal_path(cal).write_bytes(b"10 20 5 20 00\nabc")
+    assert recover(cal) is False and cal.read_bytes() == original
+
+
+def test_recover_discards_journal_that_does_not_match(cal: Path, monkeypatch, capsys):
+    crash_after_splice(cal, monkeypatch, [(VIDEOS, "S4", "- nuevo\n")])
+    edited = cal.read_bytes().replace(b"- nuevo", b"- editado a mano")
+    cal.write_bytes(edited)
+    assert recover(cal) is False
+    assert cal.read_bytes() == edited and not journal_path(cal).exists()
+    assert "se descarta sin restaurar" in capsys.readouterr().err
+
+
+def test_every_write_recovers_first(cal: Path, monkeypatch):
+    original = cal.read_bytes()
+    crash_after_splice(cal, monkeypatch, [(VIDEOS, "S4", "- nuevo\n")])
+    # Reescritura completa (sin parche): primero se deshace el parche interrumpido
+    doc = CalendarDoc(original.decode("utf-8"))
+    doc.set_block(VIDEOS, "S6", "- otro\n")
+    apply_blocks(cal, [(VIDEOS, "S6", "- otro\n")])
+    assert cal.read_text(encoding="utf-8") == doc.text() and not journal_path(cal).exists()
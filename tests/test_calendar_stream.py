@@ -0,0 +1,44 @@
+import re
+from pathlib import Path
+
+import pytest
+from tools.calendar_doc import BOOKS, VIDEOS, apply_blocks
+from tools.calendar_stream import scan, stream_blocks
+from tools.manifest import block_hash
+
+
+def stripped_calendar() -> str:
+    text = Path("Calendario.md").read_text(encoding="utf-8")
+    # Quita la mitad de los bloques para ejercitar reemplazo, inserción y anexado
+    return re.sub(r"(?s)<!-- BOOKS_BASE:S1\d START -->.*?END -->\n", "", text)
+
+
+UPDATES = [
+    (VIDEOS, "S2", "### Videos base — S2\n\n- nuevo\n"),
+    (VIDEOS, "S3", "### Videos base — S3\n\n- otro\n"),
+    (BOOKS, "S12", "### Lecturas base — S12\n"),
+    (BOOKS, "S14", "### Lecturas base — S14\n"),
+    (VIDEOS, "S30", "### Videos base — S30\n"),
+    (BOOKS, "S31", "### Lecturas base — S31\n"),
+]
+
+
+@pytest.mark.parametrize("trailing", ["", "\n\n  \n"])
+def test_stream_matches_in_memory_engine(tmp_path: Path, trailing: str):
+    a, b = tmp_path / "a.md", tmp_path / "b.md"
+    a.write_text(stripped_calendar() + trailing, encoding="utf-8")
+    b.write_text(stripped_calendar() + trailing, encoding="utf-8")
+
+    expected = apply_blocks(a, UPDATES)
+    assert stream_blocks(b, UPDATES) == expected
+    assert b.read_bytes() == a.read_bytes()
+    assert list(tmp_path.glob(".*.tmp")) == []
+
+
+def test_scan_hashes_blocks(tmp_path: Path):
+    cal = tmp_path / "c.md"
+    block = "<!-- VIDEOS_BASE:S1 START -->\n### Videos base — S1\n<!-- VIDEOS_BASE:S1 END -->"
+    cal.write_text(f"### S1 — x\n\n{block}\n\n### S2\n", encoding="utf-8")
+    blocks, headers = scan(cal)
+    assert blocks == {(VIDEOS, "S1"): block_hash(block)}
+    assert headers == {"S1", "S2"}
@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import cohorts, index_cache, plan
+from tools.calendar_doc import BOOKS, VIDEOS, CalendarDoc
+from tools.records import BookItem, VideoItem
+from tools.resource_index import ResourceIndex
+
+VIDEOS_DATA = {
+    "collections": {
+        "c": [
+            {
+                "id": "comun",
+                "title": "Comun",
+                "url": "https://x/c",
+                "weeks": ["S1"],
+                "blocks": ["B1"],
+                "lang": "es",
+            },
+            {
+                "id": "a",
+                "title": "Espec A",
+                "url": "https://x/a",
+                "weeks": ["S2"],
+                "blocks": ["B5A"],
+                "lang": "es",
+            },
+            {
+                "id": "b",
+                "title": "Espec B",
+                "url": "https://x/b",
+                "weeks": ["S2"],
+                "blocks": ["B5B"],
+                "lang": "en",
+            },
+            {
+                "id": "dif",
+                "title": "Dificil",
+                "url": "https://x/d",
+                "weeks": ["S3"],
+                "difficulty": "avanzado",
+            },
+        ]
+    }
+}
+BOOKS_DATA = {
+    "collections": {
+        "c": [{"id": "l", "title": "Libro", "url": "https://x/l", "weeks": ["S3"], "lang": "en"}]
+    }
+}
+
+MANIFEST = """\
+defaults:
+  template: plantilla.md
+cohorts:
+  - name: b5a
+    calendar: out/b5a.md
+    blocks: [B1, B5A]
+    weeks: [S1, S2, S3]
+  - name: b5b-en
+    calendar: out/b5b-en.md
+    blocks: [B1, B5B]
+    lang: en
+    difficulty: [basico]
+    weeks: {S1: [S1, S2], S2: S3}
+    books: false
+"""
+
+
+@pytest.fixture
+def indexes():
+    return ResourceIndex(VIDEOS_DATA, VideoItem), ResourceIndex(BOOKS_DATA, BookItem)
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Path:
+    (tmp_path / "plantilla.md").write_text(
+        "# Cohorte\n\n### S1\n\n### S2\n\n### S3\n", encoding="utf-8"
+    )
+    path = tmp_path / "cohortes.yml"
+    path.write_text(MANIFEST, encoding="utf-8")
+    return path
+
+
+def titles(updates, marker, week):
+    md = next(md for m, w, md in updates if (m, w) == (marker, week))
+    return [line.split("]")[0][3:] for line in md.splitlines() if line.startswith("- [")]
+
+
+def test_load_manifest(manifest: Path):
+    a, b = cohorts.load_manifest(manifest)
+    assert a.calendar == (manifest.parent / "out" / "b5a.md").resolve()
+    assert a.template == manifest.parent / "plantilla.md" and a.markers == (VIDEOS, BOOKS)
+    assert a.weeks == (("S1", ("S1",)), ("S2", ("S2",)), ("S3", ("S3",)))
+    assert b.langs == {"en"} and b.markers == (VIDEOS,)
+    assert b.weeks == (("S1", ("S1", "S2")), ("S2", ("S3",)))
+
+    manifest.write_text(
+        "cohorts:\n  - {name: x, calendar: a.md}\n  - {name: y, calendar: a.md}\n", encoding="utf-8"
+    )
+    with pytest.raises(ValueError, match="mismo calendario"):
+        cohorts.load_manifest(manifest)
+    manifest.write_text(
+        "cohorts:\n  - {name: x, calendar: a.md, weeks: {S1: []}}\n", encoding="utf-8"
+    )
+    with pytest.raises(ValueError, match="sin semanas de origen"):
+        cohorts.load_manifest(manifest)
+
+
+def test_filters_and_week_remap(manifest: Path, indexes):
+    a, b = cohorts.load_manifest(manifest)
+    videos, books = indexes
+    # Bloque: se queda la especialización propia; sin bloques ni idioma, el item es general
+    ua = cohorts.cohort_updates(a, videos, books)
+    assert titles(ua, VIDEOS, "S2") == ["Espec A"]
+    assert titles(ua, VIDEOS, "S3") == ["Dificil"] and titles(ua, BOOKS, "S3") == ["Libro"]
+    # Idioma, dificultad y semanas comprimidas (S1 <- S1+S2, S2 <- S3); sin libros
+    ub = cohorts.cohort_updates(b, videos, books)
+    assert [(m, w) for m, w, _ in ub] == [(VIDEOS, "S1"), (VIDEOS, "S2")]
+    assert titles(ub, VIDEOS, "S1") == ["Espec B"]
+    assert titles(ub, VIDEOS, "S2") == []
+    assert "Videos base — S1" in ub[0][2]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_fan_out_writes_each_calendar_once(manifest: Path, indexes, jobs: int):
+    selected = cohorts.load_manifest(manifest)
+    videos, books = indexes
+    assert cohorts.fan_out(selected, videos, books, jobs=jobs) == [("b5a", 6), ("b5b-en", 2)]
+    text = (manifest.parent / "out" / "b5a.md").read_text(encoding="utf-8")
+    assert text.startswith("# Cohorte\n") and "[Espec A]" in text and "[Espec B]" not in text
+    # Sin cambios en los catálogos no se reescribe nada
+    assert cohorts.fan_out(selected, videos, books, jobs=jobs) == [("b5a", 0), ("b5b-en", 0)]
+
+
+def test_unmapped_template_weeks_are_emptied(manifest: Path, indexes):
+    # Plantilla copiada del calendario principal: trae secciones de todas las semanas
+    doc = CalendarDoc((manifest.parent / "plantilla.md").read_text(encoding="utf-8"))
+    for week in ("S1", "S3"):
+        doc.set_block(VIDEOS, week, f"### Videos base — {week}\n\n- [Principal](https://x/p)\n")
+    (manifest.parent / "plantilla.md").write_text(doc.text(), encoding="utf-8")
+    _, b = cohorts.load_manifest(manifest)
+    videos, books = indexes
+
+    cohorts.render_cohort(b, videos, books)
+    blocks = CalendarDoc(b.calendar.read_text(encoding="utf-8")).blocks()
+    assert "[Espec B]" in blocks[(VIDEOS, "S1")] and "[Principal]" not in blocks[(VIDEOS, "S1")]
+    # S3 no es semana de la cohorte: la sección queda sin recursos
+    assert "Videos base — S3" in blocks[(VIDEOS, "S3")] and "- [" not in blocks[(VIDEOS, "S3")]
+
+
+def test_plan_cohorts(manifest: Path, monkeypatch, capsys):
+    monkeypatch.setenv("TOOLS_NO_CACHE", "1")
+    monkeypatch.setattr(index_cache, "CACHE_DIR", manifest.parent / "cache")
+    tmp = manifest.parent
+    (tmp / "videos.yml").write_text(yaml.safe_dump(VIDEOS_DATA), encoding="utf-8")
+    (tmp / "books.yml").write_text(yaml.safe_dump(BOOKS_DATA), encoding="utf-8")
+    base = [
+        "cohorts",
+        str(manifest),
+        "--videos-index",
+        str(tmp / "videos.yml"),
+        "--books-index",
+        str(tmp / "books.yml"),
+    ]
+    assert plan.main(base + ["--only", "b5b-en", "-j", "1"]) == 0
+    assert "Listo: 1 cohortes, 1 calendarios escritos" in capsys.readouterr().out
+    assert (tmp / "out" / "b5b-en.md").exists() and not (tmp / "out" / "b5a.md").exists()
+    assert plan.main(base + ["--only", "nadie"]) == 2
+    assert "Cohortes desconocidas: nadie" in capsys.readouterr().err
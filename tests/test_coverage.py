@@ -0,0 +1,133 @@
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import coverage, index_cache, plan
+from tools.records import BookItem, VideoItem
+from tools.resource_index import ResourceIndex
+
+VIDEOS_DATA = {
+    "collections": {
+        "c": [
+            {
+                "id": "a",
+                "title": "A",
+                "url": "https://x/a",
+                "weeks": ["S1", "S2"],
+                "blocks": ["B1"],
+                "topics": ["POO", "clases"],
+            },
+            {
+                "id": "b",
+                "title": "B",
+                "url": "https://x/b",
+                "weeks": ["S1"],
+                "blocks": ["B1"],
+                "topics": ["poo"],
+            },
+            {
+                "id": "c",
+                "title": "C",
+                "url": "https://x/c",
+                "weeks": ["S1"],
+                "blocks": ["B2"],
+                "topics": ["sql"],
+            },
+            {"id": "d", "title": "D", "url": "https://x/d", "weeks": ["S1"], "topics": ["sql"]},
+            {"id": "e", "title": "E", "url": "https://x/e", "weeks": ["S1"], "topics": ["sql"]},
+            {"id": "sin", "title": "Sin semana", "url": "https://x/s", "topics": ["git"]},
+        ]
+    }
+}
+BOOKS_DATA = {
+    "collections": {
+        "c": [
+            {
+                "id": "l",
+                "title": "L",
+                "url": "https://x/l",
+                "weeks": ["S3"],
+                "blocks": ["B2"],
+                "topics": ["clases"],
+            }
+        ]
+    }
+}
+
+
+@pytest.fixture
+def indexes():
+    return [ResourceIndex(VIDEOS_DATA, VideoItem), ResourceIndex(BOOKS_DATA, BookItem)]
+
+
+@pytest.fixture(params=["bits", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(coverage, "_numpy", lambda: None)
+
+
+def row(cov, topic, weeks=None):
+    weeks = weeks or cov.weeks
+    return [cov.by_week[cov.topics.index(topic)][cov.weeks.index(w)] for w in weeks]
+
+
+def test_matrix_and_reports(indexes, backend):
+    cov = coverage.build(indexes, expect=["Decoradores"])
+    assert cov.topics == ["clases", "decoradores", "git", "poo", "sql"]
+    assert cov.weeks[:3] == ["S1", "S2", "S3"] and len(cov.weeks) == 24
+    assert row(cov, "poo", ["S1", "S2", "S3"]) == [2, 1, 0]
+    assert row(cov, "clases", ["S1", "S2", "S3"]) == [1, 1, 1]  # videos y libros se suman
+    assert cov.by_block[cov.topics.index("clases")][cov.blocks.index("B2")] == 1
+    assert cov.items == 7 and cov.week_items[:3] == [5, 1, 1]
+
+    assert coverage.covered(cov.by_week, len(cov.weeks))[:3] == [3, 2, 1]
+    assert coverage.gaps(cov) == {
+        "topics_without_resources": ["decoradores"],
+        "topics_without_week": ["git"],
+        "empty_weeks": [f"S{i}" for i in range(4, 25)],
+    }
+    assert coverage.overserved(cov) == ["S1"]  # 5 > 2 x mediana(5, 1, 1)
+
+
+def test_backends_agree(indexes):
+    pytest.importorskip("numpy")
+    cov = coverage.build(indexes, expect=["decoradores"])
+    report = coverage.to_json(cov, factor=1.5)
+    real = coverage._numpy
+    try:
+        coverage._numpy = lambda: None
+        assert coverage.build(indexes, expect=["decoradores"]) == cov
+        # Las reducciones (temas por columna, huecos, sobrecarga) coinciden también
+        assert coverage.to_json(cov, factor=1.5) == report
+    finally:
+        coverage._numpy = real
+
+
+def test_plan_coverage_formats(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "videos.yml").write_text(yaml.safe_dump(VIDEOS_DATA), encoding="utf-8")
+    (tmp_path / "books.yml").write_text(yaml.safe_dump(BOOKS_DATA), encoding="utf-8")
+    base = [
+        "coverage",
+        "--videos-index",
+        str(tmp_path / "videos.yml"),
+        "--books-index",
+        str(tmp_path / "books.yml"),
+    ]
+
+    assert plan.main(base + ["--matrix"]) == 0
+    md = capsys.readouterr().out
+    assert "| S1 | 5 | 3 | sobrecargada |" in md and "- Temas sin semana asignada: git" in md
+    assert "| poo | 2 | 2 | 1 | 0 |" in md
+
+    assert plan.main(base + ["--format", "json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["overserved_weeks"] == ["S1"] and data["matrix"]["sql"]["weeks"]["S1"] == 3
+
+    assert plan.main(base + ["--format", "csv", "-o", str(tmp_path / "cov.csv")]) == 0
+    lines = (tmp_path / "cov.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("tema,total,S1,S2,S3,") and lines[0].endswith(",B5A,B5B")
+    assert lines[1].startswith("clases,2,1,1,1,")
@@ -0,0 +1,133 @@
+import json
+from array import array
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import dedupe, index_cache, plan
+
+VIDEOS_DATA = {
+    "collections": {
+        "c": [
+            {
+                "id": "pyqt",
+                "title": "PyQt5 Tutorial completo",
+                "url": "https://youtu.be/abc123?t=30",
+                "topics": ["gui"],
+            },
+            {
+                "id": "pyqt_bis",
+                "title": "PyQt5 tutorial completo (Bro Code)",
+                "url": "https://www.youtube.com/watch?v=abc123&list=PLx",
+                "topics": ["gui"],
+                "lang": "en",
+            },
+            {
+                "id": "tk",
+                "title": "Tkinter: curso desde cero",
+                "url": "https://x/tk",
+                "topics": ["gui", "tkinter"],
+            },
+            {
+                "id": "tk2",
+                "title": "Curso de Tkinter desde cero",
+                "url": "https://y/tk",
+                "topics": ["gui", "tkinter"],
+            },
+            {
+                "id": "sql",
+                "title": "MySQL con Python",
+                "url": "https://x/sql",
+                "topics": ["bases de datos"],
+            },
+        ]
+    }
+}
+BOOKS_DATA = {
+    "collections": {"c": [{"id": "libro", "title": "Python Crash Course", "url": "https://x/l"}]}
+}
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://youtu.be/abc?t=30", "youtube.com/watch?v=abc"),
+        ("https://www.YouTube.com/watch?v=abc&list=PL1&index=3", "youtube.com/watch?v=abc"),
+        ("https://m.youtube.com/shorts/abc/", "youtube.com/watch?v=abc"),
+        ("https://drive.google.com/file/d/XYZ_1/view?usp=sharing", "drive:XYZ_1"),
+        ("https://drive.google.com/open?id=XYZ_1", "drive:XYZ_1"),
+        ("https://docs.python.org/3/?utm_source=x&b=2&a=1", "docs.python.org/3?a=1&b=2"),
+        (None, ""),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert dedupe.normalize_url(url) == expected
+
+
+def test_signature_is_elementwise_min():
+    sh = {"tkinter", "curso", "curso tkinter", "#gui"}
+    rows = [array("I", dedupe._hashes(s).to_bytes(4 * dedupe.PERMUTATIONS, "little")) for s in sh]
+    assert list(array("I", dedupe.signature(sh))) == list(map(min, *rows))
+    assert dedupe.signature(set()) == b""
+
+
+def test_find_duplicates_and_allowlist(tmp_path: Path):
+    (tmp_path / "videos.yml").write_text(yaml.safe_dump(VIDEOS_DATA), encoding="utf-8")
+    (tmp_path / "books.yml").write_text(yaml.safe_dump(BOOKS_DATA), encoding="utf-8")
+    items = dedupe.entries(
+        [("videos", tmp_path / "videos.yml"), ("books", tmp_path / "books.yml")], use_cache=False
+    )
+
+    by_url, by_title = dedupe.find_duplicates(items)
+    # El más completo (con idioma) queda como canónico
+    assert by_url.canonical.key == "videos:pyqt_bis"
+    assert [(e.key, why) for e, why in by_url.others] == [("videos:pyqt", "misma URL")]
+    assert {by_title.canonical.key} | {e.key for e, _ in by_title.others} == {
+        "videos:tk",
+        "videos:tk2",
+    }
+    assert by_title.others[0][1].startswith("título/temas")
+
+    (tmp_path / "allow.txt").write_text(
+        "videos:tk videos:tk2  # dos cursos distintos\n", encoding="utf-8"
+    )
+    assert [
+        c.canonical.key
+        for c in dedupe.find_duplicates(
+            items, allowed=dedupe.load_allowlist(tmp_path / "allow.txt")
+        )
+    ] == ["videos:pyqt_bis"]
+
+
+def test_allowlist_holds_through_a_third_item():
+    def entry(key):
+        return dedupe.Entry(key, {"id": key, "title": key}, "youtube.com/watch?v=x", set())
+
+    # C comparte URL con A y con B; A y B están permitidos: no terminan en el mismo grupo
+    items = [entry("videos:c"), entry("videos:a"), entry("videos:b")]
+    clusters = dedupe.find_duplicates(items, allowed=[{"videos:a", "videos:b"}])
+    for c in clusters:
+        assert not {"videos:a", "videos:b"} <= {c.canonical.key} | {e.key for e, _ in c.others}
+    assert [len(c.others) for c in clusters] == [1]
+
+
+def test_plan_dedupe(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "videos.yml").write_text(yaml.safe_dump(VIDEOS_DATA), encoding="utf-8")
+    base = [
+        "dedupe",
+        "--videos-index",
+        str(tmp_path / "videos.yml"),
+        "--books-index",
+        str(tmp_path / "nada.yml"),
+    ]
+    assert plan.main(base) == 0
+    assert "Listo: 5 items, 2 grupos, 2 duplicados probables" in capsys.readouterr().out
+    assert plan.main(base + ["--strict", "--json"]) == 3
+    out = json.loads(capsys.readouterr().out)
+    assert out[0] == {
+        "canonical": "videos:pyqt_bis",
+        "duplicates": [
+            {"key": "videos:pyqt", "reason": "misma URL", "url": "https://youtu.be/abc123?t=30"}
+        ],
+    }
@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+from tools import index_cache
+
+YAML_V1 = "version: 1\ncollections:\n  a:\n    - {id: x, title: X, weeks: [S1]}\n"
+YAML_V2 = YAML_V1.replace("S1", "S2")
+
+
+def test_cache_hit_and_invalidation(tmp_path: Path, monkeypatch):
+    src = tmp_path / "videos.yml"
+    cache = tmp_path / "cache"
+    src.write_text(YAML_V1, encoding="utf-8")
+
+    first = index_cache.load_yaml(src, cache_dir=cache)
+    assert index_cache.cache_path(src, cache).exists()
+
+    # Con la entrada vigente no se vuelve a parsear el YAML
+    monkeypatch.setattr(index_cache, "parse_yaml", lambda text: 1 / 0)
+    assert index_cache.load_yaml(src, cache_dir=cache) == first
+    st = src.stat()
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert index_cache.load_yaml(src, cache_dir=cache) == first
+    monkeypatch.undo()
+
+    src.write_text(YAML_V2, encoding="utf-8")
+    second = index_cache.load_yaml(src, cache_dir=cache)
+    assert second["collections"]["a"][0]["weeks"] == ["S2"]
+
+    assert index_cache.clear(cache) == 1
+    assert index_cache.load_yaml(src, use_cache=False) == second
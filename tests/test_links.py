@@ -0,0 +1,152 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from tools import index_cache, links, plan
+from tools.inject_videos import DEAD_FLAG
+from tools.link_checker import LinkChecker
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Servidor de prueba: /ok (con ETag), /gone, /moved -> /ok, /nohead (sin HEAD), /loop."""
+
+    protocol_version = "HTTP/1.1"
+    seen: list = []
+
+    def _reply(self, status: int, headers=None, body: bytes = b"") -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.seen.append(
+            (self.command, self.path, self.headers.get("If-None-Match"), self.client_address[1])
+        )
+        if self.path == "/ok":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._reply(304)
+            return self._reply(200, {"ETag": '"v1"'})
+        if self.path == "/moved":
+            return self._reply(301, {"Location": "/ok"})
+        if self.path == "/loop":
+            return self._reply(302, {"Location": "/loop"})
+        if self.path == "/nohead" and self.command == "HEAD":
+            return self._reply(405)
+        if self.path == "/nohead":
+            return self._reply(200, body=b"hola")
+        return self._reply(404)
+
+    do_GET = do_HEAD
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    StandIn.seen = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_check_links_pools_caches_and_revalidates(server: str, tmp_path: Path):
+    cache = tmp_path / "links.json"
+    urls = [f"{server}/{p}" for p in ("ok", "gone", "moved", "nohead", "loop")]
+    results = links.check_links(urls, cache=cache, checker=LinkChecker(concurrency=1, per_host=1))
+
+    assert results[f"{server}/ok"]["status"] == 200 and results[f"{server}/ok"]["etag"] == '"v1"'
+    assert results[f"{server}/moved"]["final_url"] == f"{server}/ok"
+    assert results[f"{server}/nohead"]["status"] == 200
+    assert "redirecciones" in results[f"{server}/loop"]["error"]
+    assert links.dead_links(cache) == {f"{server}/gone"}  # el bucle es un fallo sin respuesta
+    # Un único pool por host y una conexión keep-alive reutilizada
+    assert len({port for *_, port in StandIn.seen}) == 1
+
+    # Dentro del TTL no se pide nada
+    n = len(StandIn.seen)
+    assert links.check_links(urls, cache=cache) == results
+    assert len(StandIn.seen) == n
+
+    # Vencido: revalidación condicional con el ETag guardado (304 conserva el resultado)
+    again = links.check_links([f"{server}/ok"], cache=cache, ttl=0)
+    assert ("HEAD", "/ok", '"v1"') in [s[:3] for s in StandIn.seen[n:]]
+    assert again[f"{server}/ok"]["status"] == 200
+    assert again[f"{server}/ok"]["checked_at"] > results[f"{server}/ok"]["checked_at"]
+
+
+class Flaky:
+    """Checker de prueba: devuelve los status de ``script`` en orden (None = sin respuesta)."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+
+    async def run(self, urls, previous):
+        status = self.script.pop(0)
+        error = None if status is not None else "TimeoutError: timed out"
+        entry = {"status": status, "final_url": urls[0], "etag": None, "last_modified": None}
+        return {urls[0]: {**entry, "checked_at": 1.0, "error": error}}
+
+
+def test_network_errors_are_unknown_until_repeated(tmp_path: Path):
+    cache, url = tmp_path / "links.json", "https://x/v"
+
+    def check(status):
+        return links.check_links([url], cache=cache, force=True, checker=Flaky(status))[url]
+
+    assert check(200)["failures"] == 0
+    entry = check(None)
+    assert (entry["status"], entry["failures"], links.is_dead(entry)) == (200, 1, False)
+    assert check(None)["failures"] == 2 and not links.dead_links(cache)
+    entry = check(None)
+    assert links.is_dead(entry) and "3 fallos seguidos" in links.reason(entry)
+    assert links.dead_links(cache) == {url}
+    assert not links.is_dead(check(200)) and not links.dead_links(cache)
+
+
+def test_check_links_command_feeds_inject(server: str, tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setenv("TOOLS_NO_CACHE", "1")
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    videos = tmp_path / "videos.yml"
+    videos.write_text(
+        "collections:\n  c:\n"
+        f"    - {{id: a, title: Vivo, url: '{server}/ok', weeks: [S1]}}\n"
+        f"    - {{id: b, title: Muerto, url: '{server}/gone', weeks: [S1]}}\n",
+        encoding="utf-8",
+    )
+    argv = [
+        "check-links",
+        "--videos-index",
+        str(videos),
+        "--books-index",
+        str(tmp_path / "nada.yml"),
+    ]
+    assert plan.main(argv + ["--strict"]) == 3
+    assert f"CAÍDO  404  {server}/gone" in capsys.readouterr().out
+
+    cal = tmp_path / "Calendario.md"
+    cal.write_text("### S1\n", encoding="utf-8")
+    inject = [
+        "inject",
+        "--weeks",
+        "S1",
+        "--videos",
+        "--videos-index",
+        str(videos),
+        "--calendar",
+        str(cal),
+    ]
+    assert plan.main(inject) == 0
+    assert DEAD_FLAG not in cal.read_text(encoding="utf-8")
+    # El marcado cambia la entrada del render, así que el modo incremental regenera el bloque
+    assert plan.main(inject + ["--flag-dead-links"]) == 0
+    text = cal.read_text(encoding="utf-8")
+    assert f"- [Muerto]({server}/gone) — temas: {DEAD_FLAG}" in text
+    assert f"- [Vivo]({server}/ok) — temas: \n" in text
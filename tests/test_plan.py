@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+from tools import index_cache, plan
+from tools.calendar_doc import REPLACED, SKIPPED, UNCHANGED, count_changed
+
+VIDEOS = "collections:\n  c:\n    - {id: v1, title: Video Uno, url: 'https://x/v', weeks: [S1], topics: [poo]}\n"
+BOOKS = "collections:\n  c:\n    - {id: b1, title: Libro Uno, url: 'https://x/b', weeks: [S1, S2], topics: [poo]}\n"
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("TOOLS_NO_CACHE", raising=False)
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "videos.yml").write_text(VIDEOS, encoding="utf-8")
+    (tmp_path / "books.yml").write_text(BOOKS, encoding="utf-8")
+    cal = tmp_path / "Calendario.md"
+    cal.write_text("# Calendario\n\n### S1 — Inicio\n\ntexto\n\n### S2 — Más\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_plan_inject_books_and_videos_in_one_pass(workspace: Path):
+    cal = workspace / "Calendario.md"
+    argv = [
+        "inject",
+        "--weeks",
+        "S1",
+        "S2",
+        "--calendar",
+        str(cal),
+        "--books-index",
+        str(workspace / "books.yml"),
+        "--videos-index",
+        str(workspace / "videos.yml"),
+    ]
+    assert plan.main(argv) == 0
+
+    text = cal.read_text(encoding="utf-8")
+    s1 = text.index("### S1")
+    assert (
+        s1
+        < text.index("<!-- BOOKS_BASE:S1 START -->")
+        < text.index("<!-- VIDEOS_BASE:S1 START -->")
+    )
+    assert "- [Libro Uno](https://x/b)" in text and "- [Video Uno](https://x/v)" in text
+
+    again = plan.run_inject(
+        ["S1", "S2"],
+        cal,
+        videos_index=workspace / "videos.yml",
+        books_index=workspace / "books.yml",
+    )
+    assert count_changed(again) == 0
+    assert cal.read_text(encoding="utf-8") == text
+
+
+def test_incremental_only_touches_changed_weeks(workspace: Path):
+    cal = workspace / "Calendario.md"
+    kw = dict(videos_index=workspace / "videos.yml", books_index=workspace / "books.yml")
+    plan.run_inject(["S1", "S2"], cal, **kw)
+
+    assert {a for *_, a in plan.run_inject(["S1", "S2"], cal, **kw)} == {SKIPPED}
+
+    books = workspace / "books.yml"
+    books.write_text(
+        BOOKS.replace("Libro Uno", "Libro Dos").replace("S1, S2", "S2"), encoding="utf-8"
+    )
+    preview = plan.run_inject(["S1", "S2"], cal, dry_run=True, **kw)
+    assert [(m, w) for m, w, a in preview if a != SKIPPED] == [
+        ("BOOKS_BASE", "S1"),
+        ("BOOKS_BASE", "S2"),
+    ]
+    assert "Libro Dos" not in cal.read_text(encoding="utf-8")
+
+    results = plan.run_inject(["S1", "S2"], cal, **kw)
+    assert count_changed(results) == 2
+    assert ("BOOKS_BASE", "S2", REPLACED) in results
+    assert ("VIDEOS_BASE", "S1", SKIPPED) in results
+
+
+def test_no_cache_disables_manifest(workspace: Path, monkeypatch):
+    monkeypatch.setenv("TOOLS_NO_CACHE", "1")
+    cal = workspace / "Calendario.md"
+    kw = dict(videos_index=workspace / "videos.yml", books_index=workspace / "books.yml")
+    plan.run_inject(["S1", "S2"], cal, **kw)
+
+    assert {a for *_, a in plan.run_inject(["S1", "S2"], cal, **kw)} == {UNCHANGED}
+    assert not (index_cache.CACHE_DIR / "manifest").exists()
+
+
+def test_select_weeks():
+    assert plan.select_weeks(True, None, None)[-1] == "S24"
+    assert plan.select_weeks(False, ["s3", "S5"], None) == ["S3", "S4", "S5"]
+    assert plan.select_weeks(False, None, [" s7 "]) == ["S7"]
+    with pytest.raises(ValueError):
+        plan.weeks_from_range("S5", "S2")
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_parallel_render_matches_sequential(executor: str):
+    videos = plan.load_videos(Path("resources/videos.yml"), use_cache=False)
+    books = plan.load_books(Path("resources/books.yml"), use_cache=False)
+    weeks = plan.select_weeks(True, None, None)
+
+    sequential = plan.render_updates(weeks, videos=videos, books=books)
+    parallel = plan.render_updates(weeks, videos=videos, books=books, jobs=2, executor=executor)
+    assert parallel == sequential
@@ -0,0 +1,77 @@
+import math
+import random
+
+from tools import ranking
+from tools.records import BLOCKS, WEEKS, VideoItem
+from tools.resource_index import ResourceIndex
+
+DATA = {
+    "collections": {
+        "c": [
+            {"id": "comun", "title": "A", "topics": ["poo"], "weeks": ["S5"]},
+            {"id": "raro", "title": "B", "topics": ["metaclases"], "weeks": ["S1"]},
+            {"id": "ambos", "title": "C", "topics": ["POO", "metaclases"], "weeks": ["S9"]},
+            {"id": "cerca", "title": "D", "topics": ["poo"], "weeks": ["S4", "S20"]},
+            {"id": "otro", "title": "E", "topics": ["poo"], "weeks": ["S5"]},
+            {"id": "nada", "title": "F", "topics": ["git"], "weeks": ["S5"]},
+        ]
+    }
+}
+
+
+def ids(ranked):
+    return [it.id for _, it in ranked]
+
+
+def test_rarity_overlap_and_proximity():
+    idx = ResourceIndex(DATA, VideoItem)
+    # Más temas en común primero; un tema raro pesa más que uno común
+    assert ids(ranking.rank(idx, ["poo", "metaclases"], k=2)) == ["ambos", "raro"]
+    # La semana no filtra: acerca (S5 > S4 > el resto), con empates por título
+    assert ids(ranking.rank(idx, ["poo"], week="S5")) == ["comun", "otro", "cerca", "ambos"]
+    assert ids(ranking.rank(idx, [], week="S5", k=3)) == ["comun", "otro", "nada"]
+    assert ranking.rank(idx, ["inexistente"]) == [] and ranking.rank(idx, ["poo"], k=0) == []
+
+
+def brute(idx, topics, week, block, k):
+    n = len(idx.items)
+    df = {t: len(pos) for t, pos in idx.topics.items()}
+
+    def near(names, codes, anchor):
+        if anchor is None or not names:
+            return 0.0
+        return ranking.PROXIMITY / (1 + min(abs(codes.ids[x] - codes.ids[anchor]) for x in names))
+
+    scored = []
+    for pos, it in enumerate(idx.items):
+        have = idx.topics_of(it) & set(topics)
+        if topics and not have:
+            continue
+        s = sum(math.log(1 + n / df[t]) for t in have)
+        s += near(it.weeks, WEEKS, week) + near(it.blocks, BLOCKS, block)
+        scored.append((-round(s, 9), pos, it.id))
+    return [i for *_, i in sorted(scored)[:k]]
+
+
+def test_matches_brute_force_scoring():
+    rnd = random.Random(7)
+    vocab = [f"t{i}" for i in range(12)]
+    items = [
+        {
+            "id": f"v{i}",
+            "title": f"Video {rnd.randrange(50)}",
+            "topics": rnd.sample(vocab, rnd.randint(0, 4)),
+            "weeks": rnd.sample(WEEKS.names[:24], rnd.randint(0, 3)),
+            "blocks": rnd.sample(BLOCKS.names[:7], rnd.randint(0, 2)),
+        }
+        for i in range(400)
+    ]
+    idx = ResourceIndex({"collections": {"c": items}}, VideoItem)
+    for _ in range(30):
+        topics = rnd.sample(vocab, rnd.randint(0, 3))
+        week, block = rnd.choice([None, "S3", "S12"]), rnd.choice([None, "B2"])
+        got = [
+            (round(s, 9), it.id)
+            for s, it in ranking.rank(idx, topics, week=week, block=block, k=15)
+        ]
+        assert [i for _, i in got] == brute(idx, topics, week, block, 15)
@@ -0,0 +1,50 @@
+import pickle
+
+from tools.records import BLOCKS, TOPICS, WEEKS, BookItem, Codes, VideoItem
+
+VIDEO = {
+    "id": "v1",
+    "title": "Video",
+    "url": "https://x/v",
+    "author": "Autor",
+    "lang": "es",
+    "difficulty": "beginner",
+    "topics": ["POO", "fundamentos"],
+    "weeks": ["S3", "S1"],
+    "blocks": ["B5A"],
+    "timestamps": {"intro": "00:01"},
+    "rating": 5,
+}
+
+
+def test_masks_and_interning():
+    a, b = VideoItem(VIDEO, "base"), VideoItem(dict(VIDEO, id="v2"), "base")
+    assert a.weeks == ["S1", "S3"] and a.blocks == ["B5A"]
+    assert a.weeks_mask == WEEKS.bits["S1"] | WEEKS.bits["S3"]
+    assert a.topic_mask & TOPICS.mask(["poo"], add=False)
+    assert a.topics == ("POO", "fundamentos")
+    assert a.topics[1] is b.topics[1] and a.author is b.author
+    assert a.extra == {"rating": 5}
+    assert not hasattr(a, "__dict__")
+
+
+def test_as_dict_and_compat_access():
+    item = VideoItem(VIDEO, "base")
+    assert item.as_dict() == dict(VIDEO, weeks=["S1", "S3"])
+    assert item["id"] == "v1" and item.get("missing", 0) == 0
+
+    book = BookItem({"id": "b", "title": "Libro", "local_path": "docs/l.pdf", "weeks": ["S30"]})
+    assert book.local_path == "docs/l.pdf" and book.weeks == ["S30"]
+    assert "S30" in WEEKS.ids and BLOCKS.decode(0) == []
+
+
+def test_pickle_rebuilds_from_dict():
+    item = pickle.loads(pickle.dumps(VideoItem(VIDEO, "base")))
+    assert isinstance(item, VideoItem) and item.collection == "base"
+    assert item.as_dict() == VideoItem(VIDEO).as_dict()
+
+
+def test_codes_decode_in_registration_order():
+    codes = Codes(["x", "y"])
+    assert codes.mask(["y", "z"]) == 0b110 and codes.decode(0b101) == ["x", "z"]
+    assert codes.mask(["w"], add=False) == 0
@@ -0,0 +1,47 @@
+from tools.resource_index import ResourceIndex
+
+DATA = {
+    "version": 1,
+    "collections": {
+        "a": [
+            {
+                "id": "z",
+                "title": "Zeta",
+                "weeks": ["S1", "S2"],
+                "blocks": ["B1"],
+                "topics": ["POO", "tipos"],
+            },
+            {"id": "b", "title": "beta", "weeks": ["S2"], "blocks": ["B2"], "topics": ["regex"]},
+        ],
+        "b": [
+            {"id": "a", "title": "Alfa", "weeks": ["S1"], "blocks": ["B1"], "topics": ["poo"]},
+            {"id": "n", "title": "Sin semanas", "blocks": ["B5A"]},
+        ],
+    },
+}
+
+
+def ids(items):
+    return [it.id for it in items]
+
+
+def test_query_combines_filters_and_sorts_by_title():
+    idx = ResourceIndex(DATA)
+    assert ids(idx.query(week="S1")) == ["a", "z"]
+    assert ids(idx.query(week="S2", block="B1")) == ["z"]
+    assert ids(idx.query(topics=["poo", "regex"])) == ["a", "b", "z"]
+    assert ids(idx.query(week="S2", topics=[" Regex "])) == ["b"]
+    assert ids(idx.query(block="B5A")) == ["n"]
+    assert idx.query(week="S9") == []
+    assert len(idx.query()) == 4
+
+
+def test_behaves_like_raw_yaml():
+    idx = ResourceIndex(DATA)
+    assert idx["version"] == 1
+    assert set(idx.get("collections")) == {"a", "b"}
+    assert ResourceIndex.ensure(idx) is idx
+    assert ids(ResourceIndex.ensure(DATA).query(week="S2")) == ["b", "z"]
+    # El YAML crudo no se guarda: se reconstruye desde los registros
+    assert idx["collections"]["b"][1] == {"id": "n", "title": "Sin semanas", "blocks": ["B5A"]}
+    assert idx.topics_of(idx.query(block="B1")[1]) == {"poo", "tipos"}
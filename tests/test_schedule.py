@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import index_cache, plan, schedule
+from tools.calendar_doc import VIDEOS, CalendarDoc
+from tools.records import BookItem, VideoItem
+from tools.resource_index import ResourceIndex
+
+WEEKS = [f"S{i}" for i in range(1, 7)]
+
+
+def video(n, blocks=(), weeks=("S1",), **extra):
+    return {
+        "id": f"v{n}",
+        "title": f"Video {n:02d}",
+        "url": f"https://x/{n}",
+        "blocks": list(blocks),
+        "weeks": list(weeks),
+        **extra,
+    }
+
+
+def index(items, cls=VideoItem):
+    return ResourceIndex({"collections": {"c": items}}, cls)
+
+
+@pytest.mark.parametrize(
+    "value, minutes",
+    [
+        (90, 90.0),
+        ("45", 45.0),
+        ("1:30:00", 90.0),
+        ("12:30", 12.5),
+        ("08:07:33", 487.55),
+        ("abc", None),
+        (0, None),
+        (True, None),
+    ],
+)
+def test_parse_minutes(value, minutes):
+    assert schedule.parse_minutes(value) == (pytest.approx(minutes) if minutes else None)
+
+
+def test_duration_sources():
+    videos = index(
+        [
+            video(1, duration="2:00:00", timestamps={"a": "00:10:00"}),
+            video(2, timestamps={"intro": "00:05:00", "final": "01:40:00"}),
+            video(3),
+        ]
+    )
+    assert [schedule.duration(it, 60) for it in videos.items] == [120, 100, 60]
+    assert (
+        schedule.duration(index([{"id": "l", "title": "L", "pages": 150}], BookItem).items[0], 120)
+        == 300
+    )
+
+
+def test_balances_equal_videos_across_weeks():
+    videos = index([video(n) for n in range(12)])  # todos en S1
+    p = schedule.propose(videos, WEEKS)
+    assert p.before[0] == [720.0, 0, 0, 0, 0, 0]
+    assert p.after[0] == [120.0] * 6 and p.after[0] == p.after[1]
+
+
+def test_long_videos_span_consecutive_weeks_and_blocks_keep_order():
+    videos = index(
+        [video(0, ["B1"], duration=400)]  # 3 semanas de 180 min como máximo
+        + [video(n, ["B1"]) for n in range(1, 4)]
+        + [video(n, ["B3"]) for n in range(4, 10)]
+    )
+    p = schedule.propose(videos, WEEKS)
+    assigned = {t.key: w for t, w in zip(p.tasks, p.assigned, strict=True)}
+    assert assigned["v0"] in (WEEKS[i : i + 3] for i in range(4))
+    last_b1 = max(WEEKS.index(w[0]) for k, w in assigned.items() if k in ("v0", "v1", "v2", "v3"))
+    first_b3 = min(
+        WEEKS.index(w[0]) for k, w in assigned.items() if k not in ("v0", "v1", "v2", "v3")
+    )
+    assert last_b1 <= first_b3
+    assert schedule.stats(p.after)[0] <= schedule.stats(p.before)[0]
+
+
+def test_tracks_and_fixed_book_load():
+    videos = index([video(n, ["B5A"]) for n in range(4)] + [video(9, ["B5B"])])
+    books = index([{"id": "l", "title": "L", "weeks": ["S1", "S2"], "duration": 240}], BookItem)
+    p = schedule.propose(videos, WEEKS, books)
+    # El libro pesa 2 h en S1 y S2 para ambas ramas; cada video solo en la suya
+    assert p.after[0] == [120.0, 120.0, 60.0, 60.0, 60.0, 60.0]
+    assert p.after[1][:2] == [120.0, 120.0] and sorted(p.after[1][2:]) == [0.0, 0.0, 0.0, 60.0]
+
+
+def test_plan_schedule_writes_suggestions_and_preview(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    data = {"collections": {"c": [video(n, ["B1"], weeks=["S1"]) for n in range(24)]}}
+    (tmp_path / "videos.yml").write_text(yaml.safe_dump(data), encoding="utf-8")
+    (tmp_path / "Calendario.md").write_text("# C\n\n### S1\n\n### S2\n", encoding="utf-8")
+    args = [
+        "schedule",
+        "--videos-index",
+        str(tmp_path / "videos.yml"),
+        "--no-books",
+        "--calendar",
+        str(tmp_path / "Calendario.md"),
+        "--suggest",
+        str(tmp_path / "semanas.yml"),
+        "--preview",
+        str(tmp_path / "muestra.md"),
+    ]
+    assert plan.main(args) == 0
+    out = capsys.readouterr().out
+    assert (
+        "Máximo semanal: 24:00 -> 1:00" in out
+        and "Listo: 24 videos, 23 con semanas distintas" in out
+    )
+
+    suggested = yaml.safe_load((tmp_path / "semanas.yml").read_text(encoding="utf-8"))
+    assert sorted(w for ws in suggested.values() for w in ws) == sorted(
+        f"S{i}" for i in range(2, 25)
+    )
+    blocks = CalendarDoc((tmp_path / "muestra.md").read_text(encoding="utf-8")).blocks()
+    assert blocks[(VIDEOS, "S2")].count("- [") == 1 and (VIDEOS, "S24") in blocks
+    assert (tmp_path / "Calendario.md").read_text(encoding="utf-8") == "# C\n\n### S1\n\n### S2\n"
+
+
+def test_plan_schedule_preview_needs_calendar(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    data = {"collections": {"c": [video(n, ["B1"]) for n in range(3)]}}
+    (tmp_path / "videos.yml").write_text(yaml.safe_dump(data), encoding="utf-8")
+    args = ["schedule", "--videos-index", str(tmp_path / "videos.yml"), "--no-books"]
+    args += [
+        "--calendar",
+        str(tmp_path / "no_existe.md"),
+        "--preview",
+        str(tmp_path / "muestra.md"),
+    ]
+    assert plan.main(args) == 2
+    assert "ERROR: No existe" in capsys.readouterr().err and not (tmp_path / "muestra.md").exists()
+
+    assert plan.main(args + ["--create-if-missing"]) == 0
+    blocks = CalendarDoc((tmp_path / "muestra.md").read_text(encoding="utf-8")).blocks()
+    assert (VIDEOS, "S1") in blocks and not (tmp_path / "no_existe.md").exists()
@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import index_cache, plan, search
+
+VIDEOS = {
+    "collections": {
+        "c": [
+            {
+                "id": "v1",
+                "title": "Decoradores en Python",
+                "author": "Ana",
+                "topics": ["decoradores"],
+                "timestamps": {"Decorador con argumentos": "00:12:30", "Resumen": "00:40:00"},
+            },
+            {
+                "id": "v2",
+                "title": "Asyncio desde cero",
+                "author": "Luis",
+                "topics": ["asyncio", "corrutinas"],
+            },
+            {"id": "v3", "title": "Generadores", "author": "Ana", "topics": ["generadores"]},
+        ]
+    }
+}
+BOOKS = {
+    "collections": {"c": [{"id": "b1", "title": "Programación asíncrona", "topics": ["asyncio"]}]}
+}
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("TOOLS_NO_CACHE", raising=False)
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path
+
+
+def write(path: Path, data) -> Path:
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+    return path
+
+
+def titles(hits):
+    return [h.doc.title for h in hits]
+
+
+def normalized(seg: search.Segment):
+    # Postings por clave de item (los ids internos dependen del orden de las altas)
+    out = {}
+    for term in seg.postings:
+        ids, weights = seg.postings_of(term)
+        out[term] = sorted((seg.doc(i).key, round(w, 4)) for i, w in zip(ids, weights, strict=True))
+    return out
+
+
+def test_tokenize_folds_accents_and_splits():
+    assert search.tokenize("Programación asíncrona: PyQt5_intro") == [
+        "programacion",
+        "asincrona",
+        "pyqt5",
+        "intro",
+    ]
+
+
+def test_fragments_fields_and_timestamps():
+    seg = search.Segment("videos")
+    seg.update(VIDEOS)
+    # "decor" se expande a decoradores / decorador; el título pesa más que el timestamp
+    hits = search.search("decor", [seg])
+    assert titles(hits) == ["Decoradores en Python"]
+    line = search.format_hit(hits[0], "decor")
+    assert (
+        "[video]" in line
+        and "Decorador con argumentos @ 00:12:30" in line
+        and "Resumen" not in line
+    )
+    # Varios términos: gana el que tiene ambos
+    assert titles(search.search("ana generadores", [seg]))[0] == "Generadores"
+    assert search.search("inexistente", [seg]) == [] and search.search("", [seg]) == []
+
+
+def test_bm25_across_segments():
+    videos, books = search.Segment("videos"), search.Segment("books")
+    videos.update(VIDEOS)
+    books.update(BOOKS)
+    hits = search.search("asyncio", [videos, books], k=5)
+    # Título + tema pesa más que solo el tema
+    assert titles(hits) == ["Asyncio desde cero", "Programación asíncrona"]
+    assert hits[0].score > hits[1].score > 0
+    assert titles(search.search("asyncio", [videos, books], k=1)) == ["Asyncio desde cero"]
+
+
+def test_shared_expansion_counts_document_frequency_once():
+    videos = search.Segment("videos")
+    videos.update(VIDEOS)
+    # "decor" se expande a términos que "decoradores" ya trae: sumar la palabra no baja el score
+    alone = search.search("decoradores", [videos])
+    both = search.search("decor decoradores", [videos])
+    assert titles(both) == titles(alone) == ["Decoradores en Python"]
+    assert both[0].score > alone[0].score
+
+
+def test_incremental_update_matches_fresh_build():
+    seg = search.Segment("videos")
+    assert seg.update(VIDEOS) == (3, 0)
+    assert seg.update(VIDEOS) == (0, 0)
+
+    edited = {
+        "collections": {
+            "c": [
+                dict(VIDEOS["collections"]["c"][0], title="Closures"),
+                VIDEOS["collections"]["c"][2],
+            ]
+        }
+    }
+    assert seg.update(edited) == (1, 1)
+    fresh = search.Segment("videos")
+    fresh.update(edited)
+    assert normalized(seg) == normalized(fresh)
+    assert seg.live == 2 and "asyncio" not in seg.postings
+    assert titles(search.search("closures", [seg])) == ["Closures"]
+
+
+def test_segment_is_persisted_and_updated(cache: Path):
+    path = write(cache / "videos.yml", VIDEOS)
+    first = search.load_segment(path, "videos")
+    entry = search.segment_path(path)
+    assert entry.exists() and first.live == 3
+
+    # Sin cambios: se reutiliza tal cual
+    again = search.load_segment(path, "videos")
+    assert again.docs == first.docs and again.stamp == first.stamp
+
+    data = {
+        "collections": {"c": VIDEOS["collections"]["c"] + [{"id": "v4", "title": "Metaclases"}]}
+    }
+    write(path, data)
+    os.utime(path, ns=(first.stamp[2] + 10**9,) * 2)
+    updated = search.load_segment(path, "videos")
+    assert updated.live == 4 and updated.docs[:3] == first.docs
+    assert titles(search.search("metaclases", [updated])) == ["Metaclases"]
+
+
+def test_plan_search_command(cache: Path, capsys):
+    videos, books = write(cache / "videos.yml", VIDEOS), write(cache / "books.yml", BOOKS)
+    base = ["search", "--videos-index", str(videos), "--books-index", str(books)]
+    assert plan.main(base + ["asyncio"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == 2 and "[video] Asyncio desde cero — Luis" in out[0] and "[libro]" in out[1]
+
+    assert plan.main(base + ["--books", "asyncio"]) == 0
+    assert "[video]" not in capsys.readouterr().out
+    assert plan.main(base + ["--no-cache", "zzz"]) == 0
+    assert capsys.readouterr().out.strip() == "Sin resultados para: zzz"
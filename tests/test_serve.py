@@ -0,0 +1,53 @@
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+from tools import suggest_books, suggest_videos
+from tools.serve import Catalogs, make_server
+from tools.suggest_client import fetch
+
+
+def test_server_matches_cli_and_reloads(tmp_path: Path):
+    videos = tmp_path / "videos.yml"
+    books = tmp_path / "books.yml"
+    shutil.copy("resources/videos.yml", videos)
+    shutil.copy("resources/books.yml", books)
+
+    catalogs = Catalogs(videos, books, use_cache=False)
+    server = make_server(catalogs, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    addr = f"127.0.0.1:{server.server_port}"
+    try:
+        vidx = suggest_videos.load_index(videos, use_cache=False)
+        body, count = fetch("videos", week="s11", topics=["poo"], server=addr)
+        expected = vidx.query(week="S11", topics=["poo"])
+        assert body == suggest_videos.md_section("S11", expected)
+        assert count == len(expected)
+
+        bidx = suggest_books.load_index(books, use_cache=False)
+        body, _ = fetch("books", block="B3", server=addr)
+        assert body == suggest_books.to_md(None, suggest_books.select(bidx, None, "B3", []))
+
+        books.write_text("version: 1\ncollections: {}\n", encoding="utf-8")
+        assert catalogs.refresh() == ["books"]
+        assert fetch("books", week="S1", server=addr)[1] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unloadable_catalogue_replies_503(tmp_path: Path):
+    videos = tmp_path / "videos.yml"
+    shutil.copy("resources/videos.yml", videos)
+    catalogs = Catalogs(videos, tmp_path / "no_existe.yml", use_cache=False)
+    server = make_server(catalogs, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    addr = f"127.0.0.1:{server.server_port}"
+    try:
+        with pytest.raises(RuntimeError, match="Catálogo books no disponible: .*no_existe.yml"):
+            fetch("books", week="S1", server=addr)
+        assert fetch("videos", week="S1", server=addr)[1] > 0
+    finally:
+        server.shutdown()
+        server.server_close()
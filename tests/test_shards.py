@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from tools import index_cache, plan, shards, suggest_videos, validate
+from tools.calendar_doc import VIDEOS, CalendarDoc
+
+
+def video(i, weeks, blocks=("B1",)):
+    return {
+        "id": f"v{i}",
+        "title": f"Video {i}",
+        "url": f"https://x/{i}",
+        "weeks": list(weeks),
+        "blocks": list(blocks),
+    }
+
+
+SHARDS = {
+    "a_fundamentos.yml": {
+        "version": 1,
+        "collections": {"fundamentos": [video(1, ["S1"]), video(2, ["S2"])]},
+    },
+    "b_web.yml": {"version": 1, "collections": {"web": [video(3, ["S13"], ["B5A"])]}},
+    "c_mas.yml": {"version": 1, "collections": {"fundamentos": [video(4, ["S1", "S3"])]}},
+}
+
+
+@pytest.fixture
+def shard_dir(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    d = tmp_path / "resources" / "videos.d"
+    d.mkdir(parents=True)
+    for name, data in SHARDS.items():
+        (d / name).write_text(yaml.safe_dump(data), encoding="utf-8")
+    (d / "_borrador.yml").write_text("no: [es, un, shard", encoding="utf-8")
+    return d
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    calls = []
+    real = shards._parse
+
+    def spy(path, use_cache):
+        calls.append(path.name)
+        return real(path, use_cache)
+
+    monkeypatch.setattr(shards, "_parse", spy)
+    return calls
+
+
+def ids(data):
+    return [it["id"] for items in data["collections"].values() for it in items]
+
+
+def test_source_and_merge(shard_dir: Path):
+    monolith = shard_dir.with_name("videos.yml")
+    assert shards.source(monolith) == shard_dir
+    assert shards.expand([monolith]) == [shard_dir / n for n in sorted(SHARDS)]
+
+    data = shards.load_catalogue(monolith, use_cache=False)
+    assert data["version"] == 1 and list(data["collections"]) == ["fundamentos", "web"]
+    assert ids(data) == ["v1", "v2", "v4", "v3"]  # misma colección en dos shards: se concatena
+
+    monolith.write_text(yaml.safe_dump(SHARDS["b_web.yml"]), encoding="utf-8")
+    assert shards.source(monolith) == monolith  # si existe el archivo único, manda
+
+
+def test_filter_loads_only_relevant_shards(shard_dir: Path, parsed):
+    assert (
+        len(ids(shards.load_catalogue(shard_dir, jobs=1))) == 4
+    )  # primera vez: todos (y se arma el manifiesto)
+    parsed.clear()
+    assert ids(shards.load_catalogue(shard_dir, weeks=["S13"], jobs=1)) == ["v3"]
+    assert parsed == ["b_web.yml"]
+
+    parsed.clear()
+    assert ids(shards.load_catalogue(shard_dir, weeks=["S1"], blocks=["B1"], jobs=1)) == [
+        "v1",
+        "v2",
+        "v4",
+    ]
+    assert parsed == ["a_fundamentos.yml", "c_mas.yml"]
+
+    # Un shard editado se carga siempre y actualiza el manifiesto
+    edited = {"version": 1, "collections": {"web": [video(3, ["S14"], ["B5A"])]}}
+    (shard_dir / "b_web.yml").write_text(yaml.safe_dump(edited) + "\n", encoding="utf-8")
+    parsed.clear()
+    assert ids(shards.load_catalogue(shard_dir, weeks=["S1"], jobs=1)) == ["v1", "v2", "v4", "v3"]
+    parsed.clear()
+    assert ids(shards.load_catalogue(shard_dir, weeks=["S14"], jobs=1)) == ["v3"] and parsed == [
+        "b_web.yml"
+    ]
+
+
+def test_parallel_parse_matches_sequential(shard_dir: Path):
+    parallel = shards.load_catalogue(shard_dir, use_cache=True, jobs=2)
+    assert parallel == shards.load_catalogue(shard_dir, use_cache=False, jobs=1)
+    assert len(list((index_cache.CACHE_DIR / "index").glob("*.bin"))) == 3  # una entrada por shard
+
+
+def test_tools_accept_sharded_catalogues(shard_dir: Path, capsys):
+    monolith = shard_dir.with_name("videos.yml")
+    index = suggest_videos.load_index(monolith, weeks=["S1"])
+    assert [it.id for it in index.query(week="S1")] == ["v1", "v4"]
+
+    (shard_dir / "c_mas.yml").write_text(
+        "collections:\n  fundamentos:\n    - id: v4\n      title: ''\n", encoding="utf-8"
+    )
+    issues = validate.validate([monolith], use_cache=False)
+    assert {Path(i.path).name for i in issues} == {"c_mas.yml"}
+
+    calendar = shard_dir.parent.parent / "Calendario.md"
+    calendar.write_text("# C\n\n### S1\n\n### S13\n", encoding="utf-8")
+    args = [
+        "inject",
+        "--weeks",
+        "S13",
+        "--videos",
+        "--videos-index",
+        str(monolith),
+        "--calendar",
+        str(calendar),
+    ]
+    assert plan.main(args) == 0
+    blocks = CalendarDoc(calendar.read_text(encoding="utf-8")).blocks()
+    assert "[Video 3]" in blocks[(VIDEOS, "S13")]
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Presupuesto de arranque: import acumulado de cada herramienta (-X importtime,
+# mejor de 3, descontando pathlib/typing/re, que cualquier script ya paga) como
+# múltiplo del arranque del intérprete medido igual en la misma corrida
+# (``python -X importtime -c pass``), así vale en máquinas lentas y rápidas.
+BUDGET_X = {
+    "tools.suggest_videos": 8,
+    "tools.suggest_books": 8,
+    "tools.inject_videos": 10,
+    "tools.inject_books": 10,
+    "tools.plan": 14,
+}
+# Nunca deben cargarse al importar las herramientas (solo en los caminos que los usan)
+HEAVY = {
+    "yaml",
+    "asyncio",
+    "multiprocessing",
+    "concurrent.futures.process",
+    "http.client",
+    "difflib",
+    "pickle",
+}
+
+
+def _run(
+    code: str, env: dict[str, str] | None = None, importtime: bool = False
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _importtime(code: str) -> dict[str, int]:
+    # "import time:  self [us] | cumulative | imported package"; solo los de primer nivel
+    out = {}
+    for line in _run(code, importtime=True).stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith("  "):
+            out[parts[2].strip()] = int(parts[1])
+    return out
+
+
+def import_ms(module: str) -> float:
+    times = _importtime(f"import pathlib, typing, re; import {module}")
+    assert module in times, f"{module} no aparece en -X importtime"
+    return times[module] / 1000
+
+
+@pytest.fixture(scope="module")
+def startup_ms() -> float:
+    return min(sum(_importtime("pass").values()) for _ in range(3)) / 1000
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET_X))
+def test_import_budget(module: str, startup_ms: float):
+    loaded = _run(f"import sys, {module}; print(' '.join(sys.modules))").stdout.split()
+    assert not HEAVY & set(loaded), f"{module} importa {HEAVY & set(loaded)}"
+    best = min(import_ms(module) for _ in range(3))
+    budget = BUDGET_X[module] * startup_ms
+    assert (
+        best <= budget
+    ), f"{module}: {best:.1f} ms > {BUDGET_X[module]} x {startup_ms:.1f} ms (arranque)"
+
+
+def test_cached_index_path_does_not_import_yaml(tmp_path: Path):
+    env = {"TOOLS_CACHE_DIR": str(tmp_path), "TOOLS_NO_CACHE": ""}
+    code = (
+        "import sys, io, contextlib\n"
+        "from tools import suggest_videos\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    suggest_videos.main(['-w', 'S1'])\n"
+        "print('yaml' in sys.modules)\n"
+    )
+    # primera vez: se parsea y se llena la caché
+    assert _run(code, env).stdout.split()[-1] == "True"
+    assert _run(code, env).stdout.split()[-1] == "False"
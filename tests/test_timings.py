@@ -0,0 +1,85 @@
+import json
+import pstats
+from argparse import Namespace
+from pathlib import Path
+
+from tools import index_cache, plan, timings
+
+VIDEOS = "collections:\n  c:\n    - {id: v1, title: Video Uno, url: 'https://x/v', weeks: [S1], topics: [poo]}\n"
+BOOKS = "collections:\n  c:\n    - {id: b1, title: Libro Uno, url: 'https://x/b', weeks: [S1], topics: [poo]}\n"
+
+
+def test_span_is_free_when_disabled():
+    assert timings._REC is None
+    assert timings.span("a") is timings.span("b")  # el mismo contexto nulo, sin reloj
+
+
+def test_session_table_trace_and_cprofile(tmp_path: Path, capsys):
+    trace, prof = tmp_path / "out.json", tmp_path / "out.prof"
+    args = Namespace(timings=True, profile=str(trace), cprofile=str(prof))
+    with timings.session(args):
+        with timings.span("fase"):
+            with timings.span("sub"):
+                pass
+        with timings.span("fase"):
+            pass
+    assert timings._REC is None
+
+    table = capsys.readouterr().err.splitlines()
+    assert table[0].split() == ["fase", "llamadas", "total", "ms", "%"]
+    assert [r.split()[:2] for r in table[1:]] == [["total", "1"], ["fase", "2"], ["sub", "1"]]
+    assert table[3].startswith("    sub")
+
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert sorted(e["name"] for e in events) == ["fase", "fase", "sub", "total"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert pstats.Stats(str(prof)).total_calls > 0
+
+
+def test_plan_inject_reports_phases(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setenv("TOOLS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "videos.yml").write_text(VIDEOS, encoding="utf-8")
+    (tmp_path / "books.yml").write_text(BOOKS, encoding="utf-8")
+    cal = tmp_path / "Calendario.md"
+    cal.write_text("### S1\n", encoding="utf-8")
+    trace = tmp_path / "trace.json"
+    argv = [
+        "inject",
+        "--weeks",
+        "S1",
+        "--calendar",
+        str(cal),
+        "--videos-index",
+        str(tmp_path / "videos.yml"),
+        "--books-index",
+        str(tmp_path / "books.yml"),
+        "--timings",
+        "--profile",
+        str(trace),
+    ]
+    assert plan.main(argv) == 0
+    err = capsys.readouterr().err
+    for phase in (
+        "cargar videos.yml",
+        "índice",
+        "generar secciones",
+        "render",
+        "backup",
+        "escribir",
+    ):
+        assert phase in err
+    names = {e["name"] for e in json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]}
+    assert {"total", "cargar books.yml", "aplicar bloques"} <= names
+
+
+def test_maintenance_tools_accept_timings(tmp_path: Path, monkeypatch, capsys):
+    from tools import backups
+
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    assert index_cache.main(["info", "--timings"]) == 0
+    assert backups.main(["--calendar", str(tmp_path / "Calendario.md"), "--timings", "list"]) == 0
+    tables = [
+        line.split()[0] for line in capsys.readouterr().err.splitlines() if line.startswith("  ")
+    ]
+    assert tables == ["info", "list"]
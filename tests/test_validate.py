@@ -0,0 +1,99 @@
+from pathlib import Path
+
+from tools import index_cache, validate
+
+VIDEOS_YML = """version: 1
+collections:
+  base:
+    - id: ok
+      title: "Bien"
+      url: "https://example.com/a"
+      weeks: ["S1"]
+      topics: ["poo"]
+
+    - id: broken
+      title: ""
+      url: "ftp:/nope"
+      weeks: ["S30"]
+      blocks: ["B9"]
+      difficulty: expert
+      topics: ["Mal Tema", 3]
+    - id: sin_semanas
+      title: "Nada"
+      url: "https://example.com/b"
+"""
+
+BOOKS_YML = """version: 1
+collections:
+  libros:
+    - id: ok
+      title: "Duplicado"
+      local_path: "docs/libro.pdf"
+      blocks: ["B1"]
+    - id: sin_url
+      title: "Sin enlace"
+      weeks: ["S2"]
+"""
+
+
+def _write(tmp_path: Path):
+    videos, books = tmp_path / "videos.yml", tmp_path / "books.yml"
+    videos.write_text(VIDEOS_YML, encoding="utf-8")
+    books.write_text(BOOKS_YML, encoding="utf-8")
+    return videos, books
+
+
+def test_collects_all_errors_with_lines(tmp_path: Path):
+    videos, books = _write(tmp_path)
+    issues = validate.validate([videos, books], use_cache=False)
+    by_item = {}
+    for i in issues:
+        by_item.setdefault(i.item, []).append(i)
+
+    broken = by_item["broken"]
+    assert {i.line for i in broken} == {10}
+    text = " | ".join(i.message for i in broken)
+    for needle in ("title", "URL inválida", "S30", "B9", "expert", "Mal Tema", "3"):
+        assert needle in text
+    assert by_item["sin_semanas"][0].line == 17
+    assert "weeks" in by_item["sin_semanas"][0].message
+
+    (dup,) = by_item["ok"]
+    assert dup.path == str(books) and dup.line == 4 and "duplicado" in dup.message
+    assert "local_path" in by_item["sin_url"][0].message
+    assert str(dup).startswith(f"{books}:4: [ok]")
+
+
+def test_vocab_and_structure(tmp_path: Path):
+    videos, _ = _write(tmp_path)
+    issues = validate.validate_file(videos, vocab={"oop"}, use_cache=False)
+    assert any(i.item == "ok" and "poo" in i.message for i in issues)
+
+    bad = tmp_path / "bad.yml"
+    bad.write_text("collections: [1, 2]\n", encoding="utf-8")
+    (issue,) = validate.validate_file(bad, use_cache=False)
+    assert "collections" in issue.message
+    bad.write_text("collections:\n  a: [\n", encoding="utf-8")
+    (issue,) = validate.validate_file(bad, use_cache=False)
+    assert issue.message.startswith("YAML inválido")
+
+
+def test_cached_verdict_and_cli(tmp_path: Path, monkeypatch, capsys):
+    videos, books = _write(tmp_path)
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.delenv("TOOLS_NO_CACHE", raising=False)
+    first = validate.validate([videos, books])
+
+    # Sin cambios en los archivos no se vuelve a validar
+    monkeypatch.setattr(validate, "validate_file", lambda *a, **k: 1 / 0)
+    assert validate.validate([videos, books]) == first
+    monkeypatch.undo()
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+
+    assert validate.main([str(videos), str(books)]) == 1
+    out = capsys.readouterr()
+    assert f"{videos}:10: [broken]" in out.out and "problema(s)" in out.err
+
+    ok = tmp_path / "ok.yml"
+    ok.write_text(VIDEOS_YML.split("\n\n")[0] + "\n", encoding="utf-8")
+    assert validate.main([str(ok)]) == 0
@@ -0,0 +1,128 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from tools import index_cache, plan, watch
+from tools.calendar_doc import BOOKS, REPLACED, VIDEOS
+
+VIDEOS_YML = (
+    "collections:\n  c:\n"
+    "    - {id: v1, title: Video Uno, url: 'https://x/1', weeks: [S1]}\n"
+    "    - {id: v2, title: Video Dos, url: 'https://x/2', weeks: [S2, S3]}\n"
+)
+BOOKS_YML = (
+    "collections:\n  c:\n    - {id: b1, title: Libro Uno, url: 'https://x/b', weeks: [S1]}\n"
+)
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("TOOLS_NO_CACHE", "1")
+    monkeypatch.setattr(index_cache, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "videos.yml").write_text(VIDEOS_YML, encoding="utf-8")
+    (tmp_path / "books.yml").write_text(BOOKS_YML, encoding="utf-8")
+    (tmp_path / "Calendario.md").write_text("### S1\n\n### S2\n\n### S3\n", encoding="utf-8")
+    return tmp_path
+
+
+def session(ws: Path) -> watch.Session:
+    return watch.Session(ws / "Calendario.md", ws / "videos.yml", ws / "books.yml")
+
+
+def edit(path: Path, old: str, new: str) -> None:
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+
+def test_affected_weeks_from_index_diff(workspace: Path):
+    s = session(workspace)
+    old = s.prints[VIDEOS]
+    edit(workspace / "videos.yml", "Video Dos", "Video 2")
+    new = watch.fingerprints(s._load(VIDEOS))
+    assert watch.affected_weeks(old, new) == ["S2", "S3"]
+    assert watch.affected_weeks(old, old) == []
+
+
+def test_refresh_reinjects_only_affected_weeks(workspace: Path):
+    s = session(workspace)
+    s.sync(["S1", "S2", "S3"])
+    cal = workspace / "Calendario.md"
+    edit(workspace / "videos.yml", "Video Dos", "Video 2")
+    weeks, results = s.refresh([workspace / "videos.yml"])
+    assert weeks == ["S2", "S3"]
+    # Solo los bloques de videos de S2 y S3: los libros no se tocan
+    assert {(m, w): a for m, w, a in results} == {
+        (VIDEOS, "S2"): REPLACED,
+        (VIDEOS, "S3"): REPLACED,
+    }
+    assert "Video 2" in cal.read_text(encoding="utf-8")
+
+    # Un YAML a medio guardar no rompe nada: se conserva el índice anterior
+    (workspace / "books.yml").write_text("collections: [", encoding="utf-8")
+    assert s.refresh([workspace / "books.yml"]) == ([], [])
+    assert s.indexes[BOOKS].items[0].title == "Libro Uno"
+    # Un cambio que no altera ningún item no escribe
+    assert s.refresh([workspace / "videos.yml"]) == ([], [])
+
+
+def test_poll_watcher_and_debounce(tmp_path: Path):
+    f = tmp_path / "a.yml"
+    f.write_text("1", encoding="utf-8")
+    w = watch.PollWatcher([f], interval=0.01)
+    assert w.wait(0.05) == set()
+    f.write_text("22", encoding="utf-8")
+    assert w.wait(0.5) == {f.resolve()}
+
+    def burst():
+        for n in range(3):
+            f.write_text("x" * (n + 3), encoding="utf-8")
+            time.sleep(0.02)
+
+    t = threading.Thread(target=burst)
+    t.start()
+    assert watch.collect(w, debounce=0.1) == {f.resolve()}
+    t.join()
+    assert w.wait(0.05) == set()  # la ráfaga se consumió entera
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify solo existe en Linux")
+def test_inotify_sees_atomic_saves(tmp_path: Path):
+    f, other = tmp_path / "a.yml", tmp_path / "b.txt"
+    f.write_text("1", encoding="utf-8")
+    w = watch.open_watcher([f])
+    assert isinstance(w, watch.InotifyWatcher)
+    try:
+        other.write_text("no", encoding="utf-8")
+        assert w.wait(0.05) == set()
+        tmp = tmp_path / ".a.yml.tmp"
+        tmp.write_text("2", encoding="utf-8")
+        os.replace(tmp, f)  # como guardan muchos editores
+        assert w.wait(1.0) == {f.resolve()}
+    finally:
+        w.close()
+    assert isinstance(watch.open_watcher([f], poll=True), watch.PollWatcher)
+
+
+def test_run_loop(workspace: Path):
+    s = session(workspace)
+    s.sync(["S1", "S2", "S3"])
+    w = watch.PollWatcher(s.paths.values(), interval=0.01)
+    edit(workspace / "books.yml", "Libro Uno", "Libro 1")
+    lines = []
+    watch.run(s, w, debounce=0.02, cycles=1, report=lines.append)
+    assert len(lines) == 1 and "S1: 1 bloques modificados" in lines[0]
+    assert "Libro 1" in (workspace / "Calendario.md").read_text(encoding="utf-8")
+
+
+def test_plan_watch_requires_calendar(workspace: Path, capsys):
+    argv = [
+        "watch",
+        "--calendar",
+        str(workspace / "no.md"),
+        "--videos-index",
+        str(workspace / "videos.yml"),
+    ]
+    assert plan.main(argv) == 2
+    assert "No existe" in capsys.readouterr().err
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import difflib
+import hashlib
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools import timings
+
+# Almacén de copias de seguridad direccionado por contenido.
+#
+#   <dir del calendario>/.backups/<nombre>/
+#       index.json          instantáneas en orden cronológico
+#       objects/<sha256>    "F" + zlib(contenido)  |  "D<sha256 base>" + zlib(delta JSON)
+#
+# Un contenido idéntico se guarda una sola vez; las instantáneas nuevas se guardan
+# como delta (por líneas) contra la anterior, con una versión completa cada MAX_CHAIN.
+
+STORE_DIR = ".backups"
+KEEP = 20
+MAX_CHAIN = 8
+
+CALENDAR = Path("Calendario.md")
+
+
+def store_dir(path: Path) -> Path:
+    return path.parent / STORE_DIR / path.name
+
+
+def _objects(path: Path) -> Path:
+    return store_dir(path) / "objects"
+
+
+def _index_path(path: Path) -> Path:
+    return store_dir(path) / "index.json"
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def list_snapshots(path: Path) -> List[Dict[str, Any]]:
+    p = _index_path(path)
+    if not p.exists():
+        return []
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def _save_index(path: Path, entries: List[Dict[str, Any]]) -> None:
+    _atomic_write(_index_path(path), json.dumps(entries, indent=1).encode("utf-8"))
+
+
+def _encode_delta(base: bytes, new: bytes) -> bytes:
+    a = base.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(b"".join(b[j1:j2]).decode("latin-1"))
+    return json.dumps(ops, separators=(",", ":")).encode("utf-8")
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    a = base.splitlines(keepends=True)
+    out: List[bytes] = []
+    for op in json.loads(delta):
+        if isinstance(op, list):
+            out.extend(a[op[0] : op[1]])
+        else:
+            out.append(op.encode("latin-1"))
+    return b"".join(out)
+
+
+def read_object(path: Path, digest: str) -> bytes:
+    raw = (_objects(path) / digest).read_bytes()
+    if raw[:1] == b"F":
+        return zlib.decompress(raw[1:])
+    base = raw[1:65].decode("ascii")
+    return _apply_delta(read_object(path, base), zlib.decompress(raw[65:]))
+
+
+def _write_object(path: Path, digest: str, content: bytes, base: Optional[str]) -> None:
+    full = b"F" + zlib.compress(content, 9)
+    data = full
+    if base is not None:
+        delta = b"D" + base.encode("ascii") + zlib.compress(_encode_delta(read_object(path, base), content), 9)
+        if len(delta) < len(full):
+            data = delta
+    _atomic_write(_objects(path) / digest, data)
+
+
+def snapshot(path: Path, label: str = "", keep: int = KEEP) -> Optional[str]:
+    """Guarda el estado actual de ``path`` y devuelve su hash (None si no existe).
+
+    Si el contenido ya está almacenado no se escribe ningún objeto nuevo.
+    """
+    if not path.exists():
+        return None
+    content = path.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    entries = list_snapshots(path)
+    if entries and entries[-1]["hash"] == digest:
+        return digest
+
+    depth = 0
+    if not (_objects(path) / digest).exists():
+        base = entries[-1] if entries else None
+        if base is not None and base.get("depth", 0) + 1 < MAX_CHAIN:
+            _write_object(path, digest, content, base["hash"])
+            depth = base.get("depth", 0) + 1
+        else:
+            _write_object(path, digest, content, None)
+    else:
+        depth = next((e.get("depth", 0) for e in entries if e["hash"] == digest), 0)
+
+    entries.append(
+        {
+            "hash": digest,
+            "created": dt.datetime.now().isoformat(timespec="microseconds"),
+            "label": label,
+            "size": len(content),
+            "depth": depth,
+        }
+    )
+    _save_index(path, entries)
+    prune(path, keep)
+    return digest
+
+
+def prune(path: Path, keep: int = KEEP) -> int:
+    """Conserva las ``keep`` instantáneas más recientes; devuelve cuántas se eliminaron.
+
+    Los deltas cuya base se elimina se reescriben como copias completas antes de borrar.
+    """
+    entries = list_snapshots(path)
+    if len(entries) <= keep:
+        return 0
+    removed = len(entries) - keep
+    entries = entries[removed:]
+    alive = {e["hash"] for e in entries}
+
+    for e in entries:
+        obj = _objects(path) / e["hash"]
+        raw = obj.read_bytes()
+        if raw[:1] == b"D" and raw[1:65].decode("ascii") not in alive:
+            _atomic_write(obj, b"F" + zlib.compress(read_object(path, e["hash"]), 9))
+            e["depth"] = 0
+    for obj in _objects(path).iterdir():
+        if obj.name not in alive:
+            obj.unlink()
+    _save_index(path, entries)
+    return removed
+
+
+def resolve(path: Path, ref: str) -> Dict[str, Any]:
+    """Busca una instantánea por prefijo de hash o ``latest``."""
+    entries = list_snapshots(path)
+    if not entries:
+        raise LookupError(f"No hay copias de seguridad para {path}")
+    if ref == "latest":
+        return entries[-1]
+    matches = {e["hash"] for e in entries if e["hash"].startswith(ref)}
+    if len(matches) != 1:
+        raise LookupError(f"Referencia {'ambigua' if matches else 'desconocida'}: {ref}")
+    return next(e for e in reversed(entries) if e["hash"] in matches)
+
+
+def restore(path: Path, ref: str) -> str:
+    """Restaura ``path`` a la instantánea ``ref`` (guardando antes el estado actual)."""
+    entry = resolve(path, ref)
+    content = read_object(path, entry["hash"])
+    snapshot(path, label="pre-restore")
+    _atomic_write(path, content)
+    return entry["hash"]
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        prog="backups",
+        description="Copias de seguridad de Calendario.md (direccionadas por contenido).",
+    )
+    ap.add_argument("--calendar", default=str(CALENDAR), help="Ruta a Calendario.md")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Listar instantáneas")
+    r = sub.add_parser("restore", help="Restaurar una instantánea")
+    r.add_argument("ref", help="Prefijo del hash o 'latest'")
+    pr = sub.add_parser("prune", help="Aplicar la política de retención")
+    pr.add_argument("--keep", type=int, default=KEEP, help="Instantáneas a conservar")
+    timings.add_args(ap)
+    args = ap.parse_args(argv)
+
+    calendar = Path(args.calendar)
+    try:
+        with timings.session(args), timings.span(args.cmd):
+            if args.cmd == "list":
+                for e in list_snapshots(calendar):
+                    print(f"{e['hash'][:12]}  {e['created']}  {e['size']:>8} B  {e['label']}")
+            elif args.cmd == "restore":
+                digest = restore(calendar, args.ref)
+                print(f"OK: {calendar} restaurado a {digest[:12]}")
+            else:
+                print(f"OK: eliminadas {prune(calendar, args.keep)} instantáneas")
+    except LookupError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from tools import timings
+
+# Marcadores conocidos (tipo de bloque -> prefijo del comentario HTML)
+BOOKS = "BOOKS_BASE"
+VIDEOS = "VIDEOS_BASE"
+
+DEFAULT_HEADER = "# Calendario del Programa\n\n"
+
+# A partir de este tamaño se reescribe en streaming (ver tools/calendar_stream.py)
+STREAM_THRESHOLD = 8 * 1024 * 1024
+# A partir de este tamaño, apply_blocks parchea en su sitio vía índice de offsets
+# (ver tools/calendar_offsets.py) cuando el cambio lo permite
+PATCH_THRESHOLD = 1024 * 1024
+
+# Un solo patrón para todo el archivo: bloques con marcadores o encabezados "### Sxx ..."
+_TOKEN_RE = re.compile(
+    r"<!-- (?P<marker>[A-Z]+_BASE):(?P<mweek>\S+) START -->.*?<!-- (?P=marker):(?P=mweek) END -->"
+    r"|^###[ \t]*(?P<hweek>\w+)\b[^\n]*",
+    re.MULTILINE | re.DOTALL,
+)
+
+Key = Tuple[str, str]  # (marker, semana)
+Part = Union[str, Tuple[str, Union[Key, str]]]
+
+# Resultados posibles de CalendarDoc.set_block
+REPLACED = "replaced"
+UNCHANGED = "unchanged"
+INSERTED = "inserted"
+APPENDED = "appended"
+# Bloque no regenerado porque su entrada no cambió (ver tools/manifest.py)
+SKIPPED = "skipped"
+
+
+def make_block(marker: str, week: str, section_md: str) -> str:
+    """Bloque completo con marcadores (sin salto de línea final)."""
+    return f"<!-- {marker}:{week} START -->\n{section_md}<!-- {marker}:{week} END -->"
+
+
+class CalendarDoc:
+    """Modelo en segmentos de Calendario.md.
+
+    El texto se analiza una sola vez: se separan los bloques con marcadores
+    (``BOOKS_BASE`` / ``VIDEOS_BASE``) y los encabezados de semana (``### Sxx``).
+    Las actualizaciones se aplican en memoria y ``text()`` reconstruye el archivo.
+    El resultado es el mismo que aplicar semana a semana los inyectores individuales.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._parts: List[Part] = []
+        self._blocks: Dict[Key, str] = {}
+        self._slots: Dict[str, List[Key]] = {}
+        self._tail: List[Key] = []
+        self._parse(text)
+
+    def _parse(self, text: str) -> None:
+        pos = 0
+        for m in _TOKEN_RE.finditer(text):
+            if m.group("marker"):
+                key = (m.group("marker"), m.group("mweek"))
+                self._parts.append(text[pos : m.start()])
+                self._parts.append(("block", key))
+                self._blocks.setdefault(key, m.group(0))
+            else:
+                week = m.group("hweek")
+                self._parts.append(text[pos : m.end()])
+                if week not in self._slots:
+                    self._slots[week] = []
+                    self._parts.append(("slot", week))
+            pos = m.end()
+        self._parts.append(text[pos:])
+
+    def weeks(self) -> List[str]:
+        """Semanas con encabezado ``### Sxx`` en el orden del documento."""
+        return list(self._slots)
+
+    def has_block(self, marker: str, week: str) -> bool:
+        return (marker, week) in self._blocks
+
+    def blocks(self) -> Dict[Key, str]:
+        """Bloques actuales (con marcadores) por ``(marker, semana)``."""
+        return dict(self._blocks)
+
+    def get_block(self, marker: str, week: str) -> Optional[str]:
+        return self._blocks.get((marker, week))
+
+    def set_block(self, marker: str, week: str, section_md: str) -> str:
+        """Reemplaza o inserta el bloque ``marker`` de ``week``.
+
+        Devuelve ``replaced``, ``unchanged``, ``inserted`` (bajo el encabezado
+        de la semana) o ``appended`` (al final del documento).
+        """
+        key = (marker, week)
+        block = make_block(marker, week, section_md)
+        if key in self._blocks:
+            if self._blocks[key] == block:
+                return UNCHANGED
+            self._blocks[key] = block
+            return REPLACED
+        self._blocks[key] = block
+        if week in self._slots:
+            # Igual que el inyector individual: lo último insertado queda justo bajo el encabezado
+            self._slots[week].insert(0, key)
+            return INSERTED
+        self._tail.append(key)
+        return APPENDED
+
+    def text(self) -> str:
+        out: List[str] = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif part[0] == "block":
+                out.append(self._blocks[part[1]])  # type: ignore[index]
+            else:
+                for key in self._slots[part[1]]:  # type: ignore[index]
+                    out.append("\n\n" + self._blocks[key] + "\n")
+        body = "".join(out)
+        if not self._tail:
+            return body
+        tail = "".join(f"\n\n## {week}\n\n{self._blocks[(marker, week)]}" for marker, week in self._tail)
+        return body.rstrip() + tail + "\n"
+
+
+def read_calendar(path: Path, create_if_missing: bool) -> str:
+    if not path.exists():
+        if not create_if_missing:
+            sys.exit(f"ERROR: No existe {path}. Usa --create-if-missing o créalo manualmente.")
+        path.write_text(DEFAULT_HEADER, encoding="utf-8")
+    return path.read_text(encoding="utf-8")
+
+
+def apply_blocks(
+    calendar_path: Path,
+    updates: Iterable[Tuple[str, str, str]],
+    create_if_missing: bool = False,
+    backup: Optional[Callable[[Path], None]] = None,
+) -> List[Tuple[str, str, str]]:
+    """Aplica muchas actualizaciones ``(marker, semana, sección)`` con una sola escritura.
+
+    Lee y analiza el calendario una vez, aplica todo en memoria y solo escribe
+    (previo ``backup``) si algún bloque cambió. Devuelve ``(marker, semana, acción)``.
+    Desde ``PATCH_THRESHOLD`` bytes se intenta parchear solo los bloques tocados
+    (también previo ``backup``; un diario de deshacer cubre las escrituras
+    interrumpidas); si no se puede, los calendarios de ``STREAM_THRESHOLD`` bytes
+    o más se procesan en streaming.
+
+    Todo ocurre bajo el lock del calendario, que antes deshace un parche
+    interrumpido; las llamadas concurrentes se agrupan en una sola reescritura
+    (ver tools/calendar_lock.py).
+    """
+    from tools.calendar_lock import submit
+
+    def apply(path: Path, merged: List[Tuple[str, str, str]], create: bool) -> List[Tuple[str, str, str]]:
+        return _apply_blocks(path, merged, create, backup)
+
+    # Los pedidos con otro backup (otra etiqueta) no se juntan con este
+    group = "" if backup is None else f"{backup.__module__}.{backup.__qualname__}"
+    return submit(calendar_path, list(updates), apply, create_if_missing, group=group)
+
+
+def _apply_blocks(
+    calendar_path: Path,
+    updates: List[Tuple[str, str, str]],
+    create_if_missing: bool,
+    backup: Optional[Callable[[Path], None]],
+) -> List[Tuple[str, str, str]]:
+    size = calendar_path.stat().st_size if calendar_path.exists() else 0
+    if size >= PATCH_THRESHOLD:
+        from tools.calendar_offsets import patch_blocks
+
+        patched = patch_blocks(calendar_path, updates, backup)
+        if patched is not None:
+            return patched
+    if size >= STREAM_THRESHOLD:
+        from tools.calendar_stream import stream_blocks
+
+        return stream_blocks(calendar_path, updates, create_if_missing, backup)
+
+    with timings.span("leer calendario"):
+        original = read_calendar(calendar_path, create_if_missing)
+    with timings.span("analizar calendario"):
+        doc = CalendarDoc(original)
+    with timings.span("aplicar bloques"):
+        results = [(marker, week, doc.set_block(marker, week, md)) for marker, week, md in updates]
+    if any(action != UNCHANGED for _, _, action in results):
+        write_doc(calendar_path, original, doc, backup)
+    return results
+
+
+def write_doc(
+    calendar_path: Path,
+    original: str,
+    doc: CalendarDoc,
+    backup: Optional[Callable[[Path], None]] = None,
+) -> bool:
+    """Escribe ``doc`` si difiere de ``original`` (previo ``backup``); indica si escribió."""
+    with timings.span("unir texto"):
+        updated = doc.text()
+    if updated == original:
+        return False
+    if backup is not None:
+        with timings.span("backup"):
+            backup(calendar_path)
+    with timings.span("escribir"):
+        atomic_write_text(calendar_path, updated)
+    return True
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra sobre ``path``."""
+    import tempfile
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def count_changed(results: Iterable[Tuple[str, str, str]]) -> int:
+    return sum(1 for _, _, action in results if action in (REPLACED, INSERTED, APPENDED))
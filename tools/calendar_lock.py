@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import itertools
+import marshal
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from tools import timings
+
+# Escrituras concurrentes sobre Calendario.md.
+#
+# ``locked(calendar)`` toma un flock exclusivo sobre ".<nombre>.lock" (junto al
+# calendario, no sobre el propio archivo: la escritura atómica lo reemplaza por
+# otro inodo). flock es por descriptor abierto, así que excluye tanto procesos
+# como hilos del mismo proceso. Sin fcntl (Windows) no bloquea. Al tomarlo se
+# deshace un parche interrumpido (``calendar_offsets.recover``) antes de que nadie
+# lea o reescriba el calendario.
+#
+# ``submit`` agrupa las escrituras (group commit): cada llamada deja su pedido en
+# ".<nombre>.queue/<ticket>.req" y espera el lock. Quien lo consigue aplica de una
+# vez todos los pedidos en cola, en orden de llegada (el último gana si dos tocan
+# el mismo bloque), y deja a cada uno su resultado en "<ticket>.done". Los demás,
+# al conseguir el lock, encuentran su resultado y vuelven sin releer ni reescribir.
+# Si el líder ve más pedidos que el suyo (hay contención) espera BATCH_WINDOW
+# para juntar los que están llegando; sin contención no espera nada.
+#
+# Solo se juntan pedidos del mismo grupo (``group``: quién escribe, p. ej. el
+# backup con su etiqueta) y, si el calendario todavía no existe, con el mismo
+# ``create_if_missing``: un pedido nunca crea el calendario ni hace backup en
+# nombre de otro que no lo pidió. Los demás esperan su turno de líder.
+
+BATCH_WINDOW = 0.002
+
+Update = Tuple[str, str, str]
+Result = Tuple[str, str, str]
+Apply = Callable[[Path, List[Update], bool], List[Result]]
+
+_SEQ = itertools.count()
+
+
+def lock_path(calendar: Path) -> Path:
+    return calendar.with_name(f".{calendar.name}.lock")
+
+
+def queue_dir(calendar: Path) -> Path:
+    return calendar.with_name(f".{calendar.name}.queue")
+
+
+@contextmanager
+def locked(calendar: Path) -> Iterator[None]:
+    """Lock exclusivo (bloqueante) del calendario mientras dura el bloque."""
+    from tools.calendar_offsets import recover
+
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - sin flock no hay exclusión
+        recover(calendar)
+        yield
+        return
+    calendar.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path(calendar), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with timings.span("esperar lock"):
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        recover(calendar)
+        yield
+    finally:
+        os.close(fd)  # libera el lock
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _pending(queue: Path) -> List[Path]:
+    # Pedidos en orden de llegada; los de procesos muertos (y sus resultados sin leer) se descartan
+    out = []
+    for entry in sorted(queue.iterdir()):
+        if entry.suffix not in (".req", ".done"):
+            continue
+        if not _pid_alive(int(entry.name.split("-")[1])):
+            entry.unlink(missing_ok=True)
+        elif entry.suffix == ".req":
+            out.append(entry)
+    return out
+
+
+def submit(
+    calendar: Path,
+    updates: Sequence[Update],
+    apply: Apply,
+    create_if_missing: bool = False,
+    window: Optional[float] = None,
+    group: str = "",
+) -> List[Result]:
+    """Aplica ``updates`` con ``apply(calendar, updates, create)`` junto con los pedidos concurrentes.
+
+    Devuelve las acciones de ``updates`` (en su orden), como ``apply_blocks``.
+    ``apply`` debe corresponder a ``group``: se usa también para los pedidos ajenos
+    del mismo grupo.
+    """
+    queue = queue_dir(calendar)
+    queue.mkdir(parents=True, exist_ok=True)
+    ticket = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}-{next(_SEQ)}"
+    own, done = queue / f"{ticket}.req", queue / f"{ticket}.done"
+    _write_atomic(own, marshal.dumps((list(updates), create_if_missing, group)))
+    try:
+        with locked(calendar):
+            if done.exists():  # lo aplicó otro líder
+                results = marshal.loads(done.read_bytes())
+                done.unlink()
+                return [tuple(r) for r in results]
+            return _commit(calendar, queue, own, apply, BATCH_WINDOW if window is None else window)
+    finally:
+        own.unlink(missing_ok=True)
+
+
+def _commit(calendar: Path, queue: Path, own: Path, apply: Apply, window: float) -> List[Result]:
+    pending = _pending(queue)
+    if len(pending) > 1 and window > 0:
+        time.sleep(window)  # hay contención: se juntan los que están llegando
+        pending = _pending(queue)
+    if own not in pending:
+        pending.append(own)
+
+    _, create, group = marshal.loads(own.read_bytes())
+    missing = not calendar.exists()
+    batch: List[Tuple[Path, List[Update]]] = []
+    for req in pending:
+        try:
+            upd, allow, other = marshal.loads(req.read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            continue
+        if req != own and (other != group or (missing and allow != create)):
+            continue  # lo aplicará su dueño cuando consiga el lock
+        batch.append((req, [tuple(u) for u in upd]))
+
+    merged = [u for _, upd in batch for u in upd]
+    with timings.span("group commit"):
+        results = apply(calendar, merged, create)
+
+    out: List[Result] = []
+    pos = 0
+    for req, upd in batch:
+        mine = results[pos : pos + len(upd)]
+        pos += len(upd)
+        if req == own:
+            out = mine
+        else:
+            _write_atomic(req.with_suffix(".done"), marshal.dumps(mine))
+            req.unlink(missing_ok=True)
+    return out
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import hashlib
+import marshal
+import mmap
+import os
+import re
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from tools import index_cache, timings
+from tools.calendar_doc import _TOKEN_RE, INSERTED, REPLACED, UNCHANGED, make_block
+
+# Índice de offsets de Calendario.md para actualizar una semana sin leer el archivo.
+#
+#   <CACHE_DIR>/offsets/<sha1 de la ruta>.bin  =  marshal(FORMAT, tamaño, mtime_ns, nombres, huecos, largos, hashes)
+#
+# Una entrada por bloque BOOKS_BASE / VIDEOS_BASE ("B<marker>:<semana>", con el
+# sha256 del bloque) y por encabezado "### Sxx" ("H<semana>"), en orden del
+# archivo. Los offsets se guardan como huecos entre entradas: cambiar el largo de
+# un bloque toca un solo número, no todo lo que viene después, y el índice se
+# carga y se guarda como unos pocos buffers.
+#
+# Vale mientras coincidan tamaño y mtime; antes de tocar un rango se comprueba
+# además el hash del bloque (o la línea del encabezado), así que un índice
+# desfasado nunca corrompe el archivo: se vuelve a la reescritura completa.
+#
+# ``patch_blocks`` aplica el cambio con mmap: si el bloque nuevo mide lo mismo se
+# sobrescribe en su sitio; si no, se desplaza solo la cola del archivo. Antes de
+# escribir se guarda en ".<nombre>.undo" (junto al calendario) lo que se va a
+# pisar, junto con el tamaño y el hash que tendrá el rango tocado después del
+# parche; ``recover`` lo restaura si el proceso murió antes de borrar el diario.
+# Si el calendario no está en ese estado (lo editó otro después de la caída) el
+# diario se descarta sin restaurar nada. Toda escritura del calendario llama a
+# ``recover`` al tomar el lock (tools/calendar_lock.py), así que un diario nunca
+# sobrevive a la siguiente escritura.
+
+FORMAT = 1
+
+# La misma regex que CalendarDoc, sobre bytes (\w queda en ASCII: ver _token_ok)
+_TOKEN_RE_B = re.compile(_TOKEN_RE.pattern.encode("ascii"), _TOKEN_RE.flags & ~re.UNICODE)
+_NO_HASH = bytes(32)
+
+Span = Tuple[int, int]
+
+
+def index_path(calendar: Path) -> Path:
+    key = hashlib.sha1(str(calendar.resolve()).encode("utf-8")).hexdigest()[:20]
+    return index_cache.CACHE_DIR / "offsets" / f"{key}.bin"
+
+
+def journal_path(calendar: Path) -> Path:
+    return calendar.with_name(f".{calendar.name}.undo")
+
+
+class OffsetIndex:
+    def __init__(self, size: int, mtime_ns: int, names: str, gaps: array, lengths: array, digests: bytearray) -> None:
+        self.size, self.mtime_ns = size, mtime_ns
+        self.names = names  # "\nB<marker>:<semana>\nH<semana>\n...", en orden del archivo
+        self.gaps = gaps  # bytes entre el fin de la entrada anterior y el inicio de esta
+        self.lengths = lengths
+        self.digests = digests  # 32 bytes por entrada (ceros en los encabezados)
+
+    @classmethod
+    def build(cls, calendar: Path) -> "OffsetIndex":
+        """Una pasada completa sobre el archivo."""
+        st = calendar.stat()
+        names: List[str] = []
+        gaps, lengths, digests = array("q"), array("q"), bytearray()
+        if st.st_size:
+            with timings.span("indexar offsets"), open(calendar, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                end = 0
+                for m in _TOKEN_RE_B.finditer(mm):
+                    if m.group("marker"):
+                        names.append(f"B{m.group('marker').decode()}:{m.group('mweek').decode('utf-8', 'replace')}")
+                        digests += hashlib.sha256(m.group(0)).digest()
+                    else:
+                        names.append(f"H{m.group('hweek').decode('utf-8', 'replace')}")
+                        digests += _NO_HASH
+                    gaps.append(m.start() - end)
+                    lengths.append(m.end() - m.start())
+                    end = m.end()
+        return cls(st.st_size, st.st_mtime_ns, "".join(f"\n{n}" for n in names) + "\n", gaps, lengths, digests)
+
+    @classmethod
+    def load(cls, calendar: Path) -> "OffsetIndex":
+        """Índice vigente desde la caché o, si no coincide, reconstruido (y guardado)."""
+        st = calendar.stat()
+        if index_cache.enabled():
+            try:
+                rec = marshal.loads(index_path(calendar).read_bytes())
+                if rec[0] == FORMAT and rec[1] == st.st_size and rec[2] == st.st_mtime_ns:
+                    gaps, lengths = array("q"), array("q")
+                    gaps.frombytes(rec[4])
+                    lengths.frombytes(rec[5])
+                    return cls(rec[1], rec[2], rec[3], gaps, lengths, bytearray(rec[6]))
+            except (OSError, ValueError, EOFError, TypeError, IndexError):
+                pass
+        index = cls.build(calendar)
+        index.save(calendar)
+        return index
+
+    def save(self, calendar: Path) -> None:
+        if not index_cache.enabled():
+            return
+        entry = index_path(calendar)
+        rec = (
+            FORMAT,
+            self.size,
+            self.mtime_ns,
+            self.names,
+            self.gaps.tobytes(),
+            self.lengths.tobytes(),
+            bytes(self.digests),
+        )
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(marshal.dumps(rec))
+            os.replace(tmp, entry)
+        except OSError:
+            pass  # la caché es opcional
+
+    def find(self, name: str) -> Tuple[int, bool]:
+        """Posición de la primera entrada ``name`` (-1 si no hay) y si aparece más de una vez."""
+        needle = f"\n{name}\n"
+        at = self.names.find(needle)
+        if at < 0:
+            return -1, False
+        return self.names.count("\n", 0, at), self.names.find(needle, at + 1) >= 0
+
+    def span(self, i: int) -> Span:
+        start = sum(self.gaps[: i + 1]) + sum(self.lengths[:i])
+        return start, start + self.lengths[i]
+
+    def digest(self, i: int) -> bytes:
+        return bytes(self.digests[32 * i : 32 * i + 32])
+
+    def replace(self, i: int, block: bytes) -> None:
+        self.lengths[i] = len(block)
+        self.digests[32 * i : 32 * i + 32] = hashlib.sha256(block).digest()
+
+    def insert_after(self, i: int, after: str, name: str, block: bytes) -> None:
+        """Registra ``"\\n\\n" + block + "\\n"`` insertado justo después de la entrada ``i`` (``after``)."""
+        at = self.names.find(f"\n{after}\n") + len(after) + 2
+        self.names = f"{self.names[:at]}{name}\n{self.names[at:]}"
+        if i + 1 < len(self.gaps):
+            self.gaps[i + 1] += 1  # el "\n" final queda antes de la siguiente entrada
+        self.gaps.insert(i + 1, 2)
+        self.lengths.insert(i + 1, len(block))
+        self.digests[32 * (i + 1) : 32 * (i + 1)] = hashlib.sha256(block).digest()
+
+
+def _write_journal(calendar: Path, start: int, size: int, old: bytes, post_size: int, post_hash: str) -> None:
+    # Cabecera "inicio tamaño_original largo tamaño_final sha256_final\n" + bytes originales;
+    # se sincroniza antes de parchear
+    with open(journal_path(calendar), "wb") as f:
+        f.write(f"{start} {size} {len(old)} {post_size} {post_hash}\n".encode("ascii") + old)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover(calendar: Path) -> bool:
+    """Deshace un parche interrumpido (si quedó el diario). Indica si restauró algo.
+
+    Solo restaura si el calendario está tal como lo dejó el parche (tamaño y hash
+    del rango tocado); si no, descarta el diario con un aviso.
+    """
+    journal = journal_path(calendar)
+    try:
+        raw = journal.read_bytes()
+    except OSError:
+        return False
+    head, _, old = raw.partition(b"\n")
+    try:
+        start, size, length, post_size = (int(x) for x in head.split()[:4])
+        post_hash = head.split()[4].decode("ascii")
+    except (ValueError, IndexError, UnicodeDecodeError):
+        start, size, length, post_size, post_hash = 0, 0, -1, 0, ""
+    restored = False
+    # Con el diario a medias el calendario todavía no se había tocado
+    if length == len(old) and calendar.exists():
+        with open(calendar, "r+b") as f:
+            current = f.seek(0, os.SEEK_END)
+            f.seek(start)
+            region = f.read(length + post_size - size)
+            if current == post_size and hashlib.sha256(region).hexdigest() == post_hash:
+                f.seek(start)
+                f.write(old)
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+                restored = True
+            elif current != size or region[:length] != old:
+                print(
+                    f"AVISO: {journal} no corresponde al contenido actual de {calendar}; se descarta sin restaurar",
+                    file=sys.stderr,
+                )
+    journal.unlink()
+    return restored
+
+
+def _token_ok(mm: mmap.mmap, span: Span, marker: Optional[str], week: str) -> bool:
+    # Se relee el rango con la regex de CalendarDoc (\w de str, no de bytes)
+    s, e = span
+    if e > len(mm):
+        return False
+    m = _TOKEN_RE.fullmatch(mm[s:e].decode("utf-8", "replace"))
+    if not m:
+        return False
+    if marker is None:
+        return m.group("hweek") == week and (e == len(mm) or mm[e : e + 1] == b"\n")
+    return (m.group("marker"), m.group("mweek")) == (marker, week)
+
+
+def _splice(mm: mmap.mmap, start: int, end: int, new: bytes) -> None:
+    """Reemplaza ``mm[start:end]`` por ``new`` moviendo solo la cola (memmove en el mapeo)."""
+    size = len(mm)
+    delta = len(new) - (end - start)
+    if delta > 0:
+        mm.resize(size + delta)
+        mm.move(end + delta, end, size - end)
+    elif delta < 0:
+        mm.move(end + delta, end, size - end)
+        mm.resize(size + delta)
+    mm[start : start + len(new)] = new
+
+
+def _changes(index: OffsetIndex, marker: str, week: str, md: str) -> bool:
+    i, _ = index.find(f"B{marker}:{week}")
+    return i < 0 or index.digest(i) != hashlib.sha256(make_block(marker, week, md).encode("utf-8")).digest()
+
+
+def patch_blocks(
+    calendar: Path,
+    updates: Iterable[Tuple[str, str, str]],
+    backup: Optional[Callable[[Path], None]] = None,
+) -> Optional[List[Tuple[str, str, str]]]:
+    """Aplica ``(marker, semana, sección)`` parcheando el archivo en su sitio.
+
+    Devuelve las acciones (como ``apply_blocks``) o None si algún cambio necesita
+    la reescritura completa: bloque repetido, semana sin encabezado (se añade al
+    final) o índice que no coincide con el archivo. ``backup`` se llama antes de
+    escribir, solo si algún bloque cambia.
+    """
+    recover(calendar)
+    updates = list(updates)
+    index = OffsetIndex.load(calendar)
+    if not index.size:
+        return None
+    results: List[Tuple[str, str, str]] = []
+    with open(calendar, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        # Comprobar todo antes de escribir nada
+        for marker, week, _ in updates:
+            i, repeated = index.find(f"B{marker}:{week}")
+            if repeated:
+                return None
+            if i >= 0:
+                s, e = index.span(i)
+                ok = hashlib.sha256(mm[s:e]).digest() == index.digest(i) and _token_ok(mm, (s, e), marker, week)
+            else:
+                h, _ = index.find(f"H{week}")
+                ok = h >= 0 and _token_ok(mm, index.span(h), None, week)
+            if not ok:
+                return None
+
+        if backup is not None and any(_changes(index, m, w, md) for m, w, md in updates):
+            with timings.span("backup"):
+                backup(calendar)
+
+        for marker, week, md in updates:
+            name = f"B{marker}:{week}"
+            block = make_block(marker, week, md).encode("utf-8")
+            i, _ = index.find(name)
+            if i >= 0:
+                if index.digest(i) == hashlib.sha256(block).digest():
+                    results.append((marker, week, UNCHANGED))
+                    continue
+                start, end = index.span(i)
+                new, action = block, REPLACED
+            else:
+                # Igual que CalendarDoc: justo bajo el encabezado, separado por una línea en blanco
+                h, _ = index.find(f"H{week}")
+                start = end = index.span(h)[1]
+                new, action = b"\n\n" + block + b"\n", INSERTED
+
+            with timings.span("parchear bloque"):
+                # Lo que se va a pisar: el bloque si mide lo mismo, si no desde el bloque hasta el final
+                old = mm[start:end] if len(new) == end - start else mm[start:]
+                post = hashlib.sha256(new)
+                if len(new) != end - start:
+                    post.update(mm[end:])
+                _write_journal(calendar, start, len(mm), old, len(mm) + len(new) - (end - start), post.hexdigest())
+                _splice(mm, start, end, new)
+                mm.flush()
+            if action == REPLACED:
+                index.replace(i, block)
+            else:
+                index.insert_after(h, f"H{week}", name, block)
+            results.append((marker, week, action))
+
+    if any(action != UNCHANGED for *_, action in results):
+        journal_path(calendar).unlink(missing_ok=True)
+        st = calendar.stat()
+        index.size, index.mtime_ns = st.st_size, st.st_mtime_ns
+        index.save(calendar)
+    return results
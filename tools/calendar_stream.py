@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tools import timings
+from tools.calendar_doc import APPENDED, INSERTED, REPLACED, UNCHANGED, Key, make_block, read_calendar
+
+# Reescritura en streaming de Calendario.md para archivos muy grandes.
+#
+# Mismo resultado que CalendarDoc/apply_blocks, pero línea a línea: una primera
+# pasada registra qué bloques y encabezados existen (y el hash de cada bloque) y
+# la segunda copia el archivo a un temporal sustituyendo bloques al vuelo; al final
+# un os.replace atómico deja el archivo nuevo. La memoria usada depende del bloque
+# más grande, no del tamaño del calendario.
+#
+# Requisito: los marcadores START empiezan línea (así los escriben los inyectores).
+
+_START_RE = re.compile(r"<!-- (?P<marker>[A-Z]+_BASE):(?P<week>\S+) START -->")
+_HEADER_RE = re.compile(r"###[ \t]*(?P<week>\w+)\b")
+
+
+def _end_marker(key: Key) -> str:
+    return f"<!-- {key[0]}:{key[1]} END -->"
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def scan(path: Path) -> Tuple[Dict[Key, str], Set[str]]:
+    """Primera pasada: hash (sha256) de cada bloque con marcadores y semanas con encabezado."""
+    blocks: Dict[Key, str] = {}
+    headers: Set[str] = set()
+    key: Optional[Key] = None
+    h = hashlib.sha256()
+    with path.open(encoding="utf-8", newline="") as f:
+        for line in f:
+            if key is None:
+                m = _START_RE.match(line)
+                if m is None:
+                    hm = _HEADER_RE.match(line)
+                    if hm:
+                        headers.add(hm.group("week"))
+                    continue
+                key, h = (m.group("marker"), m.group("week")), hashlib.sha256()
+            end = _end_marker(key)
+            idx = line.find(end)
+            if idx < 0:
+                h.update(line.encode("utf-8"))
+                continue
+            h.update(line[: idx + len(end)].encode("utf-8"))
+            blocks.setdefault(key, h.hexdigest())
+            key = None
+    return blocks, headers
+
+
+class _RStripWriter:
+    """Escribe a ``out`` reteniendo el espacio en blanco final (equivale a ``rstrip()``)."""
+
+    def __init__(self, out: IO[str]) -> None:
+        self.out = out
+        self.pending = ""
+
+    def write(self, s: str) -> None:
+        combined = self.pending + s
+        stripped = combined.rstrip()
+        if stripped:
+            self.out.write(stripped)
+            self.pending = combined[len(stripped) :]
+        else:
+            self.pending = combined
+
+    def close(self, tail: str) -> None:
+        # Con bloques añadidos al final se descarta el espacio en blanco (como rstrip())
+        self.out.write(tail + "\n" if tail else self.pending)
+
+
+def _rewrite(
+    src: IO[str],
+    out: IO[str],
+    existing: Dict[Key, str],
+    new_blocks: Dict[Key, str],
+    inserts: Dict[str, List[Key]],
+    tail: List[Key],
+) -> None:
+    w = _RStripWriter(out)
+    key: Optional[Key] = None
+    seen_headers: Set[str] = set()
+    for line in src:
+        if key is None:
+            m = _START_RE.match(line)
+            if m and (m.group("marker"), m.group("week")) in existing:
+                key = (m.group("marker"), m.group("week"))
+            else:
+                hm = _HEADER_RE.match(line)
+                week = hm.group("week") if hm else None
+                if week is not None and week not in seen_headers:
+                    seen_headers.add(week)
+                    if week in inserts:
+                        body = line.rstrip("\n")
+                        w.write(body)
+                        for k in inserts[week]:
+                            w.write("\n\n" + new_blocks[k] + "\n")
+                        w.write(line[len(body) :])
+                        continue
+                w.write(line)
+                continue
+        # Dentro de un bloque existente
+        end = _end_marker(key)
+        idx = line.find(end)
+        if key in new_blocks:
+            if idx >= 0:
+                w.write(new_blocks[key] + line[idx + len(end) :])
+        else:
+            w.write(line)
+        if idx >= 0:
+            key = None
+    w.close("".join(f"\n\n## {k[1]}\n\n{new_blocks[k]}" for k in tail))
+
+
+def stream_blocks(
+    calendar_path: Path,
+    updates: Iterable[Tuple[str, str, str]],
+    create_if_missing: bool = False,
+    backup: Optional[Callable[[Path], None]] = None,
+    dry_run: bool = False,
+    scanned: Optional[Tuple[Dict[Key, str], Set[str]]] = None,
+) -> List[Tuple[str, str, str]]:
+    """Como ``apply_blocks`` pero en streaming y con reemplazo atómico del archivo.
+
+    ``scanned`` permite reutilizar el resultado de ``scan`` si ya se calculó.
+    """
+    if not calendar_path.exists() and not dry_run:
+        read_calendar(calendar_path, create_if_missing)
+    if scanned is None:
+        with timings.span("escanear calendario"):
+            scanned = scan(calendar_path) if calendar_path.exists() else ({}, set())
+    existing, headers = scanned
+
+    new_blocks: Dict[Key, str] = {}
+    inserts: Dict[str, List[Key]] = {}
+    tail: List[Key] = []
+    results = []
+    for marker, week, md in updates:
+        key = (marker, week)
+        block = make_block(marker, week, md)
+        if key in existing or key in new_blocks:
+            action = UNCHANGED if existing.get(key) == _sha(block) else REPLACED
+        elif week in headers:
+            inserts.setdefault(week, []).insert(0, key)
+            action = INSERTED
+        else:
+            tail.append(key)
+            action = APPENDED
+        new_blocks[key] = block
+        results.append((marker, week, action))
+
+    if dry_run or all(action == UNCHANGED for *_, action in results):
+        return results
+
+    fd, tmp = tempfile.mkstemp(dir=calendar_path.parent, prefix=f".{calendar_path.name}.", suffix=".tmp")
+    try:
+        with open(calendar_path, encoding="utf-8", newline="") as src, os.fdopen(
+            fd, "w", encoding="utf-8", newline=""
+        ) as out:
+            with timings.span("reescribir (stream)"):
+                _rewrite(src, out, existing, new_blocks, inserts, tail)
+        os.chmod(tmp, calendar_path.stat().st_mode & 0o777)
+        if backup is not None:
+            with timings.span("backup"):
+                backup(calendar_path)
+        os.replace(tmp, calendar_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return results
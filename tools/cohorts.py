@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from tools import index_cache, timings
+from tools.calendar_doc import BOOKS, UNCHANGED, VIDEOS, CalendarDoc, apply_blocks
+from tools.inject_books import md_section
+from tools.inject_videos import build_md_section
+from tools.records import BLOCKS, Resource
+from tools.resource_index import ResourceIndex
+
+# Calendarios por cohorte (``python -m tools.plan cohorts cohortes.yml``).
+#
+# Un manifiesto YAML describe cada variante del programa:
+#
+#   defaults:                      # se mezcla en cada cohorte (opcional)
+#     template: Calendario.md      # texto inicial si el calendario no existe
+#   cohorts:
+#     - name: b5a-es
+#       calendar: cohortes/b5a-es.md
+#       blocks: [B0, B1, B2, B3, B4, B5A]
+#       lang: es                   # uno o varios
+#       difficulty: [basico, intermedio]
+#       weeks: {S1: [S1, S2], S2: S3}   # semana de la cohorte <- semanas del catálogo
+#       books: true                # false = sin "Lecturas base"
+#       videos: true
+#
+# Un item pasa un filtro si alguno de sus valores está permitido o si no tiene el
+# campo (un item sin bloques o sin idioma es general). Sin ``weeks`` se usa S1..S24;
+# con ``weeks``, las secciones que la plantilla traiga para otras semanas se
+# vacían (no deben mostrar recursos sin filtrar del calendario principal).
+# Las rutas son relativas al manifiesto.
+#
+# Los catálogos se cargan una vez; cada cohorte se genera y se escribe (una sola
+# vez) en un proceso del pool, que recibe los índices al arrancar. Los calendarios
+# de cohorte son derivados: no se guarda instantánea en .backups/.
+
+Update = Tuple[str, str, str]
+
+
+class Cohort(NamedTuple):
+    name: str
+    calendar: Path
+    template: Optional[Path]
+    blocks: Optional[FrozenSet[str]]
+    langs: Optional[FrozenSet[str]]
+    difficulties: Optional[FrozenSet[str]]
+    weeks: Tuple[Tuple[str, Tuple[str, ...]], ...]  # (semana destino, semanas de origen)
+    markers: Tuple[str, ...]
+
+
+def _names(value: Any, field: str, name: str) -> Optional[FrozenSet[str]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"cohorte {name}: '{field}' debe ser un texto o una lista de textos")
+    return frozenset(v.strip() for v in value)
+
+
+def _weeks(value: Any, name: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    from tools.plan import normalize_week, select_weeks
+
+    if value is None:
+        return tuple((w, (w,)) for w in select_weeks(True, None, None))
+    if isinstance(value, list):
+        value = {w: w for w in value}
+    if not isinstance(value, dict):
+        raise ValueError(f"cohorte {name}: 'weeks' debe ser una lista o un dict destino -> origen")
+    out = []
+    for target, sources in value.items():
+        if isinstance(sources, str):
+            sources = [sources]
+        if not isinstance(sources, list) or not sources:
+            raise ValueError(f"cohorte {name}: semana {target} sin semanas de origen")
+        out.append((normalize_week(str(target)), tuple(normalize_week(str(s)) for s in sources)))
+    return tuple(out)
+
+
+def load_manifest(path: Path) -> List[Cohort]:
+    """Cohortes del manifiesto ``path`` (ValueError si está mal formado)."""
+    data = index_cache.parse_yaml(path.read_text(encoding="utf-8")) or {}
+    if not isinstance(data, dict) or not isinstance(data.get("cohorts"), list):
+        raise ValueError(f"{path}: falta la lista 'cohorts'")
+    defaults = data.get("defaults") or {}
+    base = path.parent
+    cohorts: List[Cohort] = []
+    seen: Dict[Path, str] = {}
+    for n, raw in enumerate(data["cohorts"]):
+        if not isinstance(raw, dict):
+            raise ValueError(f"{path}: la cohorte #{n + 1} debe ser un dict")
+        spec = {**defaults, **raw}
+        name = str(spec.get("name") or f"#{n + 1}")
+        if not spec.get("calendar"):
+            raise ValueError(f"cohorte {name}: falta 'calendar'")
+        calendar = (base / str(spec["calendar"])).resolve()
+        if calendar in seen:
+            raise ValueError(f"cohortes {seen[calendar]} y {name} escriben el mismo calendario {calendar}")
+        seen[calendar] = name
+        template = base / str(spec["template"]) if spec.get("template") else None
+        markers = tuple(m for m, key in ((VIDEOS, "videos"), (BOOKS, "books")) if spec.get(key, True))
+        cohorts.append(
+            Cohort(
+                name,
+                calendar,
+                template,
+                _names(spec.get("blocks"), "blocks", name),
+                _names(spec.get("lang"), "lang", name),
+                _names(spec.get("difficulty"), "difficulty", name),
+                _weeks(spec.get("weeks"), name),
+                markers,
+            )
+        )
+    return cohorts
+
+
+def _difficulty(it: Resource) -> Any:
+    value = getattr(it, "difficulty", None)
+    if value is None and it.extra:
+        value = it.extra.get("difficulty")
+    return value
+
+
+def allowed(index: ResourceIndex, cohort: Cohort) -> Set[int]:
+    """Posiciones de ``index`` que pasan los filtros de bloque, idioma y dificultad."""
+    blocks = BLOCKS.mask(cohort.blocks, add=False) if cohort.blocks is not None else None
+    langs, levels = cohort.langs, cohort.difficulties
+    out: Set[int] = set()
+    for i, it in enumerate(index.items):
+        if blocks is not None and it.blocks_mask and not it.blocks_mask & blocks:
+            continue
+        if langs is not None and it.lang is not None and it.lang not in langs:
+            continue
+        if levels is not None:
+            level = _difficulty(it)
+            if level is not None and str(level) not in levels:
+                continue
+        out.add(i)
+    return out
+
+
+def cohort_updates(
+    cohort: Cohort,
+    videos: Optional[ResourceIndex],
+    books: Optional[ResourceIndex],
+    existing: Sequence[Tuple[str, str]] = (),
+) -> List[Update]:
+    """Secciones ``(marker, semana, Markdown)`` de la cohorte (videos primero, como ``plan inject``).
+
+    ``existing``: bloques ``(marker, semana)`` que ya tiene el calendario; los de
+    semanas que la cohorte no usa se regeneran vacíos.
+    """
+    targets = {target for target, _ in cohort.weeks}
+    updates: List[Update] = []
+    for marker, index, render in ((VIDEOS, videos, build_md_section), (BOOKS, books, md_section)):
+        if index is None or marker not in cohort.markers:
+            continue
+        keep = allowed(index, cohort)
+        for target, sources in cohort.weeks:
+            pos = set().union(*(index.weeks.get(s, ()) for s in sources)) & keep
+            items = [index.items[i] for i in sorted(pos)]
+            updates.append((marker, target, render(target, items)))
+        for m, week in existing:
+            if m == marker and week not in targets:
+                updates.append((marker, week, render(week, [])))
+    return updates
+
+
+def render_cohort(
+    cohort: Cohort, videos: Optional[ResourceIndex], books: Optional[ResourceIndex]
+) -> Tuple[str, int]:
+    """Genera y escribe el calendario de la cohorte; devuelve (nombre, bloques modificados)."""
+    with timings.span("cohorte"):
+        if not cohort.calendar.exists():
+            cohort.calendar.parent.mkdir(parents=True, exist_ok=True)
+            if cohort.template is not None:
+                cohort.calendar.write_bytes(cohort.template.read_bytes())
+        existing: List[Tuple[str, str]] = []
+        if cohort.calendar.exists():
+            existing = list(CalendarDoc(cohort.calendar.read_text(encoding="utf-8")).blocks())
+        updates = cohort_updates(cohort, videos, books, existing)
+        results = apply_blocks(cohort.calendar, updates, create_if_missing=True)
+    return cohort.name, sum(1 for *_, action in results if action != UNCHANGED)
+
+
+# Índices de cada proceso del pool (se envían una vez por proceso)
+_WORKER: Dict[str, Optional[ResourceIndex]] = {}
+
+
+def _init_worker(videos: Optional[ResourceIndex], books: Optional[ResourceIndex]) -> None:
+    _WORKER["videos"], _WORKER["books"] = videos, books
+
+
+def _render_in_worker(cohort: Cohort) -> Tuple[str, int]:
+    return render_cohort(cohort, _WORKER["videos"], _WORKER["books"])
+
+
+def fan_out(
+    cohorts: Sequence[Cohort],
+    videos: Optional[ResourceIndex],
+    books: Optional[ResourceIndex],
+    jobs: Optional[int] = None,
+) -> List[Tuple[str, int]]:
+    """Genera todas las cohortes, en orden; con ``jobs > 1`` en un pool de procesos."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(cohorts) <= 1:
+        return [render_cohort(c, videos, books) for c in cohorts]
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(jobs, len(cohorts))
+    chunksize = max(1, len(cohorts) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(videos, books)) as pool:
+        return list(pool.map(_render_in_worker, cohorts, chunksize=chunksize))
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import io
+from statistics import median
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from tools import timings
+from tools.records import BLOCKS, WEEKS
+from tools.resource_index import ResourceIndex, norm_topics
+
+# Cobertura del programa (``python -m tools.plan coverage``).
+#
+# Matrices temas x semanas y temas x bloques: cuántos recursos de los catálogos
+# tratan cada tema en cada semana (o bloque). A partir de ellas:
+#   - por semana y por bloque: recursos y temas distintos cubiertos;
+#   - huecos: temas sin recursos (los de --expect que no aparecen), temas cuyos
+#     recursos no están en ninguna semana y semanas vacías;
+#   - semanas sobrecargadas: más de OVERSERVED veces la mediana de recursos de
+#     las semanas con alguno.
+#
+# El cubo items x temas x semanas nunca se materializa (100k x 1k x 24 no cabe):
+# con numpy se arma la incidencia item -> semanas (items x semanas) y se suma por
+# tramos contiguos de los pares (tema, item) con ``np.add.reduceat``; sin numpy,
+# cada celda es el popcount del AND entre los bitsets del tema y de la semana que
+# ResourceIndex ya mantiene. Las dos formas son O(asignaciones), no O(celdas).
+# Las reducciones posteriores (temas por columna, huecos, sobrecarga) también se
+# hacen sobre arrays cuando numpy está disponible.
+
+OVERSERVED = 2.0
+
+
+class Coverage(NamedTuple):
+    topics: List[str]
+    weeks: List[str]
+    blocks: List[str]
+    by_week: List[List[int]]  # [tema][semana] -> recursos
+    by_block: List[List[int]]  # [tema][bloque] -> recursos
+    topic_items: List[int]  # recursos por tema (con o sin semana)
+    week_items: List[int]  # recursos por semana
+    block_items: List[int]  # recursos por bloque
+    items: int
+
+
+def _numpy() -> Any:
+    # numpy es opcional: sin él se cuenta con los bitsets enteros del índice
+    try:
+        import numpy  # type: ignore
+    except ImportError:
+        return None
+    return numpy
+
+
+def _counts_numpy(np: Any, index: ResourceIndex, topics: Sequence[str], columns: Sequence[Set[int]]) -> List[List[int]]:
+    member = np.zeros((len(index.items), len(columns)), dtype=np.uint8)
+    for k, pos in enumerate(columns):
+        if pos:
+            member[np.fromiter(pos, dtype=np.intp, count=len(pos)), k] = 1
+    rows: List[int] = []
+    chunks = []
+    for r, t in enumerate(topics):
+        pos = index.topics.get(t)
+        if pos:
+            rows.append(r)
+            chunks.append(np.fromiter(pos, dtype=np.intp, count=len(pos)))
+    out = np.zeros((len(topics), len(columns)), dtype=np.int64)
+    if chunks and len(columns):
+        starts = np.cumsum([0] + [len(c) for c in chunks[:-1]])
+        # Los pares de cada tema son contiguos: una suma por tramo da su fila
+        out[rows] = np.add.reduceat(member[np.concatenate(chunks)], starts, axis=0, dtype=np.int64)
+    return out.tolist()
+
+
+def _counts_bits(index: ResourceIndex, topics: Sequence[str], columns: Sequence[int]) -> List[List[int]]:
+    topic_bits = index.bitsets()[2]
+    return [[(row & col).bit_count() for col in columns] if row else [0] * len(columns) for row in (topic_bits.get(t, 0) for t in topics)]
+
+
+def _columns(defaults: Iterable[str], registry_names: List[str], present: Iterable[str]) -> List[str]:
+    # Las predeterminadas más las que aparezcan en los catálogos, en orden de registro
+    wanted = set(defaults) | set(present)
+    return [name for name in registry_names if name in wanted]
+
+
+def build(
+    indexes: Sequence[ResourceIndex],
+    expect: Iterable[str] = (),
+    weeks: Optional[Sequence[str]] = None,
+    blocks: Optional[Sequence[str]] = None,
+) -> Coverage:
+    """Cobertura conjunta de ``indexes`` (p. ej. videos y libros).
+
+    ``expect``: temas que el programa debería cubrir aunque ningún recurso los tenga.
+    """
+    indexes = [ix for ix in indexes if ix is not None]
+    topics = sorted(norm_topics(expect).union(*(ix.topics for ix in indexes)))
+    if weeks is None:
+        weeks = _columns((f"S{i}" for i in range(1, 25)), WEEKS.names, (w for ix in indexes for w in ix.weeks))
+    if blocks is None:
+        blocks = _columns(BLOCKS.names[: BLOCKS.ids["B5B"] + 1], BLOCKS.names, (b for ix in indexes for b in ix.blocks))
+
+    np = _numpy()
+    by_week = [[0] * len(weeks) for _ in topics]
+    by_block = [[0] * len(blocks) for _ in topics]
+    with timings.span("matriz de cobertura"):
+        for ix in indexes:
+            for total, names, sets, bits in ((by_week, weeks, ix.weeks, 0), (by_block, blocks, ix.blocks, 1)):
+                if np is not None:
+                    counts = _counts_numpy(np, ix, topics, [sets.get(name, set()) for name in names])
+                else:
+                    col_bits = ix.bitsets()[bits]
+                    counts = _counts_bits(ix, topics, [col_bits.get(name, 0) for name in names])
+                for acc, row in zip(total, counts):
+                    acc[:] = [a + b for a, b in zip(acc, row)]
+
+    def sizes(names: Sequence[str], attr: str) -> List[int]:
+        return [sum(len(getattr(ix, attr).get(name, ())) for ix in indexes) for name in names]
+
+    return Coverage(
+        topics,
+        list(weeks),
+        list(blocks),
+        by_week,
+        by_block,
+        sizes(topics, "topics"),
+        sizes(weeks, "weeks"),
+        sizes(blocks, "blocks"),
+        sum(len(ix.items) for ix in indexes),
+    )
+
+
+def covered(matrix: List[List[int]], ncols: int) -> List[int]:
+    """Temas distintos con algún recurso, por columna."""
+    np = _numpy()
+    if np is not None:
+        if not matrix:
+            return [0] * ncols
+        return np.count_nonzero(np.asarray(matrix, dtype=np.int64), axis=0).tolist()
+    out = [0] * ncols
+    for row in matrix:
+        for k, v in enumerate(row):
+            if v:
+                out[k] += 1
+    return out
+
+
+def overserved(cov: Coverage, factor: float = OVERSERVED) -> List[str]:
+    np = _numpy()
+    if np is not None:
+        items = np.asarray(cov.week_items, dtype=np.int64)
+        loaded = items[items > 0]
+        if not loaded.size:
+            return []
+        return [cov.weeks[k] for k in np.flatnonzero(items > factor * float(np.median(loaded)))]
+    loaded = [n for n in cov.week_items if n]
+    if not loaded:
+        return []
+    limit = factor * median(loaded)
+    return [w for w, n in zip(cov.weeks, cov.week_items) if n > limit]
+
+
+def gaps(cov: Coverage) -> Dict[str, List[str]]:
+    np = _numpy()
+    if np is not None:
+        topic_items = np.asarray(cov.topic_items, dtype=np.int64)
+        by_week = np.asarray(cov.by_week, dtype=np.int64).reshape(len(cov.topics), len(cov.weeks))
+        # Una pasada por la matriz: temas con recursos y ninguna semana con alguno
+        unplaced = (topic_items > 0) & ~by_week.any(axis=1)
+        return {
+            "topics_without_resources": [cov.topics[k] for k in np.flatnonzero(topic_items == 0)],
+            "topics_without_week": [cov.topics[k] for k in np.flatnonzero(unplaced)],
+            "empty_weeks": [cov.weeks[k] for k in np.flatnonzero(np.asarray(cov.week_items, dtype=np.int64) == 0)],
+        }
+    return {
+        "topics_without_resources": [t for t, n in zip(cov.topics, cov.topic_items) if not n],
+        "topics_without_week": [t for t, n, row in zip(cov.topics, cov.topic_items, cov.by_week) if n and not any(row)],
+        "empty_weeks": [w for w, n in zip(cov.weeks, cov.week_items) if not n],
+    }
+
+
+def to_json(cov: Coverage, factor: float = OVERSERVED) -> Dict[str, Any]:
+    week_topics = covered(cov.by_week, len(cov.weeks))
+    block_topics = covered(cov.by_block, len(cov.blocks))
+    return {
+        "items": cov.items,
+        "topics": len(cov.topics),
+        "weeks": [
+            {"week": w, "resources": n, "topics": t} for w, n, t in zip(cov.weeks, cov.week_items, week_topics)
+        ],
+        "blocks": [
+            {"block": b, "resources": n, "topics": t} for b, n, t in zip(cov.blocks, cov.block_items, block_topics)
+        ],
+        "overserved_weeks": overserved(cov, factor),
+        **gaps(cov),
+        "matrix": {
+            t: {"total": n, "weeks": dict(zip(cov.weeks, row)), "blocks": dict(zip(cov.blocks, brow))}
+            for t, n, row, brow in zip(cov.topics, cov.topic_items, cov.by_week, cov.by_block)
+        },
+    }
+
+
+def to_csv(cov: Coverage) -> str:
+    """Matriz completa: una fila por tema, columnas total, semanas y bloques."""
+    import csv
+
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["tema", "total", *cov.weeks, *cov.blocks])
+    for t, n, row, brow in zip(cov.topics, cov.topic_items, cov.by_week, cov.by_block):
+        w.writerow([t, n, *row, *brow])
+    return buf.getvalue()
+
+
+def _table(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[str]:
+    lines = ["| " + " | ".join(header) + " |", "|" + "|".join("---" for _ in header) + "|"]
+    lines.extend("| " + " | ".join(str(v) for v in row) + " |" for row in rows)
+    return lines
+
+
+def to_markdown(cov: Coverage, factor: float = OVERSERVED, matrix: bool = False) -> str:
+    heavy = set(overserved(cov, factor))
+    week_topics = covered(cov.by_week, len(cov.weeks))
+    block_topics = covered(cov.by_block, len(cov.blocks))
+    lines = [
+        "# Cobertura del programa",
+        "",
+        f"{cov.items} recursos, {len(cov.topics)} temas, {len(cov.weeks)} semanas.",
+        "",
+        "## Por semana",
+        "",
+    ]
+    lines += _table(
+        ["Semana", "Recursos", "Temas", "Nota"],
+        (
+            (w, n, t, "sobrecargada" if w in heavy else ("vacía" if not n else ""))
+            for w, n, t in zip(cov.weeks, cov.week_items, week_topics)
+        ),
+    )
+    lines += ["", "## Por bloque", ""]
+    lines += _table(["Bloque", "Recursos", "Temas"], zip(cov.blocks, cov.block_items, block_topics))
+    lines += ["", "## Huecos", ""]
+    labels = {
+        "topics_without_resources": "Temas sin recursos",
+        "topics_without_week": "Temas sin semana asignada",
+        "empty_weeks": "Semanas sin recursos",
+    }
+    for key, names in gaps(cov).items():
+        lines.append(f"- {labels[key]}: {', '.join(names) if names else 'ninguno'}")
+    if matrix:
+        lines += ["", "## Temas × semanas", ""]
+        lines += _table(["Tema", "Total", *cov.weeks], ((t, n, *row) for t, n, row in zip(cov.topics, cov.topic_items, cov.by_week)))
+    return "\n".join(lines) + "\n"
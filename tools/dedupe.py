@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import re
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from tools import shards, timings
+from tools.search import tokenize
+
+# Duplicados probables entre resources/videos.yml y resources/books.yml
+# (``python -m tools.plan dedupe``).
+#
+# Dos señales:
+#   - misma URL normalizada (youtu.be/X = youtube.com/watch?v=X&t=30s, los
+#     sufijos ?usp= de Drive, mayúsculas del host, "www.", "/" final...);
+#   - título y temas parecidos: Jaccard de los "shingles" (palabras y pares de
+#     palabras del título sin tildes, más "#tema") >= THRESHOLD.
+#
+# Para no comparar todos contra todos, cada item se resume en una firma MinHash
+# de PERMUTATIONS valores (SHAKE-128: estable entre ejecuciones) y se reparte en
+# BANDS cubetas (LSH): solo se comparan, con el Jaccard exacto, los items que
+# coinciden en alguna banda. Con 32 bandas de 3 filas, un par con Jaccard 0.5
+# comparte alguna banda con probabilidad 0.986 y uno con 0.05, con 0.004.
+# Los grupos salen de unir los pares (union-find) y en cada uno se sugiere como
+# canónico el item más completo.
+
+THRESHOLD = 0.5
+PERMUTATIONS = 96
+BANDS = 32
+ROWS = PERMUTATIONS // BANDS
+MAX_BUCKET = 64  # cubetas más grandes se comparan contra su primer item, no todos contra todos
+
+# Parámetros que no cambian el recurso (marca de tiempo, rastreo, origen del enlace)
+_NOISE = {"t", "si", "feature", "usp", "ab_channel", "pp", "fbclid", "gclid", "ref", "index"}
+_DRIVE_RE = re.compile(r"/(?:file/)?d/([\w-]+)")
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """Forma canónica de ``url`` para comparar ("" si no hay)."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    path = parts.path.rstrip("/")
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in _NOISE and not k.startswith("utm_")]
+
+    if host == "youtu.be" and path:
+        host, query = "youtube.com", [("v", path[1:])] + query
+        path = "/watch"
+    if host == "youtube.com":
+        if path.startswith(("/shorts/", "/embed/", "/live/")):
+            query = [("v", path.split("/")[2])] + query
+            path = "/watch"
+        if path == "/watch":
+            query = [(k, v) for k, v in query if k == "v"]  # el video, no la lista desde la que se abrió
+    if host in ("drive.google.com", "docs.google.com"):
+        m = _DRIVE_RE.search(path)
+        file_id = m.group(1) if m else dict(query).get("id")
+        if file_id:
+            return f"drive:{file_id}"
+    return f"{host}{path}?{urlencode(sorted(query))}" if query else f"{host}{path}"
+
+
+def shingles(item: Dict[str, Any]) -> Set[str]:
+    words = tokenize(item.get("title") or "")
+    out = set(words)
+    out.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    out.update(f"#{t}" for t in tokenize(" ".join(str(t) for t in item.get("topics") or [])))
+    return out
+
+
+# Las PERMUTATIONS funciones de hash de un shingle van empaquetadas en un solo
+# entero, una por cada 32 bits: valor de 31 bits y un bit de guarda encima. Así
+# el mínimo elemento a elemento entre dos shingles son unas pocas operaciones
+# de enteros grandes (en C) en lugar de PERMUTATIONS comparaciones en Python.
+_GUARDS = int.from_bytes(array("I", [1 << 31] * PERMUTATIONS).tobytes(), "little")
+_VALUES = _GUARDS - (_GUARDS >> 31)
+
+
+def _hashes(shingle: str) -> int:
+    # PERMUTATIONS hashes independientes de 31 bits de una sola llamada a SHAKE-128
+    return int.from_bytes(hashlib.shake_128(shingle.encode("utf-8")).digest(4 * PERMUTATIONS), "little") & _VALUES
+
+
+def signature(shingle_set: Set[str], cache: Optional[Dict[str, int]] = None) -> bytes:
+    """Firma MinHash: por cada una de las PERMUTATIONS funciones, el mínimo sobre los shingles.
+
+    Se devuelve como bytes (4 por función, little-endian): las bandas son cortes.
+    """
+    sig = None
+    for s in shingle_set:
+        h = cache.get(s) if cache is not None else None
+        if h is None:
+            h = _hashes(s)
+            if cache is not None and " " not in s:  # palabras y temas se repiten; los pares casi nunca
+                cache[s] = h
+        if sig is None:
+            sig = h
+            continue
+        # Bit de guarda de cada celda de (sig | guardas) - h: encendido si sig >= h
+        ge = ((sig | _GUARDS) - h) & _GUARDS
+        sig ^= (sig ^ h) & (ge - (ge >> 31))  # en esas celdas, h
+    if sig is None:
+        return b""
+    return sig.to_bytes(4 * PERMUTATIONS, "little")
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class Entry(NamedTuple):
+    key: str  # "videos:serie4_v3"
+    item: Dict[str, Any]
+    url: str
+    shingles: Set[str]
+
+
+class Cluster(NamedTuple):
+    canonical: Entry
+    others: List[Tuple[Entry, str]]  # (item, motivo)
+
+
+def completeness(entry: Entry) -> Tuple[int, int]:
+    it = entry.item
+    filled = sum(1 for v in it.values() if v not in (None, "", [], {}))
+    return filled, len(it.get("topics") or []) + len(it.get("timestamps") or {})
+
+
+def entries(paths: Iterable[Tuple[str, Path]], use_cache: bool = True) -> List[Entry]:
+    out: List[Entry] = []
+    for kind, path in paths:
+        data = shards.load_catalogue(path, use_cache=use_cache) or {}
+        for coll, items in (data.get("collections") or {}).items():
+            for n, it in enumerate(items or []):
+                if isinstance(it, dict):
+                    key = f"{kind}:{it.get('id', f'{coll}#{n}')}"
+                    out.append(Entry(key, it, normalize_url(it.get("url") or it.get("local_path")), shingles(it)))
+    return out
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_duplicates(
+    items: Sequence[Entry], threshold: float = THRESHOLD, allowed: Iterable[Set[str]] = ()
+) -> List[Cluster]:
+    """Grupos de duplicados probables, cada uno con su canónico sugerido.
+
+    ``allowed``: conjuntos de claves que pueden coexistir: nunca quedan en el mismo
+    grupo, tampoco a través de un tercero (A~C y C~B con A, B permitidos).
+    """
+    n = len(items)
+    parent = list(range(n))
+    reason: Dict[int, str] = {}
+    allow: Dict[str, Set[str]] = {}
+    for group in allowed:
+        for k in group:
+            allow.setdefault(k, set()).update(group - {k})
+    # Por raíz, los miembros del grupo que están en la lista de permitidos
+    listed: Dict[int, List[int]] = {i: [i] for i, e in enumerate(items) if e.key in allow}
+
+    def union(i: int, j: int, why: str) -> None:
+        ri, rj = _find(parent, i), _find(parent, j)
+        if ri != rj:
+            a, b = listed.get(ri, ()), listed.get(rj, ())
+            if any(items[y].key in allow[items[x].key] for x in a for y in b):
+                return
+            parent[rj] = ri
+            if b:
+                listed.setdefault(ri, []).extend(listed.pop(rj))
+        reason.setdefault(j, why)
+        reason.setdefault(i, why)
+
+    with timings.span("urls"):
+        by_url: Dict[str, int] = {}
+        for i, e in enumerate(items):
+            if e.url:
+                first = by_url.setdefault(e.url, i)
+                if first != i:
+                    union(first, i, "misma URL")
+
+    # Sin GC mientras se llenan las cubetas: son cientos de miles de listas que
+    # siguen vivas y, como en index_cache._read, las recolecciones no liberan nada.
+    enabled_gc = gc.isenabled()
+    gc.disable()
+    try:
+        with timings.span("minhash"):
+            bands: List[Dict[bytes, List[int]]] = [{} for _ in range(BANDS)]
+            hashes: Dict[str, int] = {}
+            width = 4 * ROWS
+            for i, e in enumerate(items):
+                sig = signature(e.shingles, hashes)
+                if not sig:
+                    continue
+                for band, buckets in enumerate(bands):
+                    buckets.setdefault(sig[band * width : (band + 1) * width], []).append(i)
+
+        with timings.span("comparar candidatos"):
+            seen: Set[Tuple[int, int]] = set()
+            for members in (m for buckets in bands for m in buckets.values()):
+                if len(members) < 2:
+                    continue
+                pairs = (
+                    ((a, b) for x, a in enumerate(members) for b in members[x + 1 :])
+                    if len(members) <= MAX_BUCKET
+                    else ((members[0], b) for b in members[1:])
+                )
+                for a, b in pairs:
+                    if (a, b) in seen:
+                        continue
+                    seen.add((a, b))
+                    sim = jaccard(items[a].shingles, items[b].shingles)
+                    if sim >= threshold:
+                        union(a, b, f"título/temas {sim:.2f}")
+    finally:
+        if enabled_gc:
+            gc.enable()
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+    clusters: List[Cluster] = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        # Más campos completos primero; a igualdad, el que aparece antes en el catálogo
+        best = max(members, key=lambda i: (completeness(items[i]), -i))
+        others = [(items[i], reason.get(i, "")) for i in members if i != best]
+        clusters.append(Cluster(items[best], others))
+    clusters.sort(key=lambda c: c.canonical.key)
+    return clusters
+
+
+def load_allowlist(path: Path) -> List[Set[str]]:
+    """Una línea por grupo permitido: claves separadas por espacios (``#`` comenta)."""
+    groups = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        keys = line.split("#", 1)[0].split()
+        if len(keys) > 1:
+            groups.append(set(keys))
+    return groups
+
+
+def format_cluster(cluster: Cluster) -> str:
+    c = cluster.canonical
+    lines = [f"* {c.key} — {c.item.get('title') or 'Sin título'} (canónico)"]
+    for e, why in cluster.others:
+        lines.append(f"  {e.key} — {e.item.get('title') or 'Sin título'} [{why}]")
+    return "\n".join(lines)
+
+
+def to_json(clusters: List[Cluster]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "canonical": c.canonical.key,
+            "duplicates": [{"key": e.key, "reason": why, "url": e.item.get("url")} for e, why in c.others],
+        }
+        for c in clusters
+    ]
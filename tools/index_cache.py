@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from tools import timings
+
+# Caché binaria del YAML ya parseado (resources/videos.yml, resources/books.yml).
+#
+#   <CACHE_DIR>/index/<sha1 de la ruta>.bin  =  b"M" + marshal(...)  |  b"P" + pickle(...)
+#
+# La entrada guarda (ruta, tamaño, mtime_ns, sha256 del contenido). Si tamaño y mtime
+# coinciden se usa sin leer el YAML; si no, se compara el hash y solo se vuelve a
+# parsear (con CSafeLoader cuando existe) si el contenido cambió de verdad.
+#
+# TOOLS_CACHE_DIR cambia la carpeta y TOOLS_NO_CACHE=1 desactiva la caché.
+
+CACHE_DIR = Path(os.environ.get("TOOLS_CACHE_DIR", ".cache"))
+FORMAT = 1
+
+
+def enabled() -> bool:
+    return os.environ.get("TOOLS_NO_CACHE", "") in ("", "0")
+
+
+def cache_path(path: Path, cache_dir: Optional[Path] = None) -> Path:
+    key = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:20]
+    return (cache_dir or CACHE_DIR) / "index" / f"{key}.bin"
+
+
+def parse_yaml(text: str) -> Any:
+    # PyYAML solo se importa al parsear: con la caché vigente no se carga
+    try:
+        import yaml  # type: ignore
+    except ImportError:
+        print("ERROR: PyYAML no está instalado. Ejecuta:\n  python -m pip install pyyaml", file=sys.stderr)
+        sys.exit(2)
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with timings.span("parsear yaml"):
+        return yaml.load(text, Loader=loader)
+
+
+def _validate(path: Path, data: Any) -> Any:
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: la raíz del YAML debe ser un dict")
+    if not isinstance(data.get("collections") or {}, dict):
+        raise ValueError(f"{path}: 'collections' debe ser un dict")
+    return data
+
+
+def _read(entry: Path) -> Optional[Tuple[Any, ...]]:
+    # Sin GC durante la carga: crear cientos de miles de dicts/listas dispara
+    # recolecciones inútiles (todo lo creado sigue vivo) y duplica el tiempo.
+    enabled_gc = gc.isenabled()
+    gc.disable()
+    try:
+        raw = entry.read_bytes()
+        body = memoryview(raw)[1:]
+        if raw[:1] == b"M":
+            rec = marshal.loads(body)
+        elif raw[:1] == b"P":
+            import pickle
+
+            rec = pickle.loads(body)
+        else:
+            return None
+    except Exception:
+        return None
+    finally:
+        if enabled_gc:
+            gc.enable()
+    if not isinstance(rec, tuple) or len(rec) != 6 or rec[0] != FORMAT:
+        return None
+    return rec
+
+
+def _write(entry: Path, rec: Tuple[Any, ...]) -> None:
+    try:
+        payload = b"M" + marshal.dumps(rec)
+    except ValueError:  # fechas u otros tipos que marshal no soporta
+        import pickle
+
+        payload = b"P" + pickle.dumps(rec, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, entry)
+    except OSError:
+        pass  # la caché es opcional: sin permisos se sigue sin ella
+
+
+def load_yaml(path: Path, use_cache: bool = True, cache_dir: Optional[Path] = None) -> Any:
+    """Carga ``path`` usando la caché binaria cuando está vigente."""
+    with timings.span(f"cargar {path.name}"):
+        return _load(path, use_cache, cache_dir)
+
+
+def _load(path: Path, use_cache: bool, cache_dir: Optional[Path]) -> Any:
+    if not (use_cache and enabled()):
+        return _validate(path, parse_yaml(path.read_text(encoding="utf-8")))
+
+    st = path.stat()
+    entry = cache_path(path, cache_dir)
+    rec = _read(entry)
+    src = str(path.resolve())
+    if rec is not None and rec[1] == src and rec[2] == st.st_size and rec[3] == st.st_mtime_ns:
+        return rec[5]
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if rec is not None and rec[1] == src and rec[4] == digest:
+        data = rec[5]  # mismo contenido, solo cambió el mtime
+    else:
+        data = _validate(path, parse_yaml(raw.decode("utf-8")))
+    _write(entry, (FORMAT, src, st.st_size, st.st_mtime_ns, digest, data))
+    return data
+
+
+def clear(cache_dir: Optional[Path] = None) -> int:
+    d = (cache_dir or CACHE_DIR) / "index"
+    n = 0
+    if d.exists():
+        for f in d.glob("*.bin"):
+            f.unlink()
+            n += 1
+    return n
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="index_cache", description="Caché binaria de los índices YAML.")
+    ap.add_argument("cmd", choices=["clear", "info"], help="clear: vaciar la caché · info: ver entradas")
+    timings.add_args(ap)
+    args = ap.parse_args(argv)
+
+    with timings.session(args), timings.span(args.cmd):
+        if args.cmd == "clear":
+            print(f"OK: eliminadas {clear()} entradas de {CACHE_DIR / 'index'}")
+            return 0
+        for f in sorted((CACHE_DIR / "index").glob("*.bin")):
+            rec = _read(f)
+            src = rec[1] if rec else "(entrada inválida)"
+            print(f"{f.name}  {f.stat().st_size:>9} B  {src}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,113 +1,88 @@
 from __future__ import annotations
 
-import argparse
-import datetime as dt
-import re
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Set
 
-try:
-    import yaml  # type: ignore
-except Exception:
-    print("ERROR: PyYAML no está instalado. Ejecuta:\n  python -m pip install pyyaml", file=sys.stderr)
-    sys.exit(2)
+if __package__ in (None, ""):  # ejecutado como script: python tools/inject_videos.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools import links, shards, timings
+from tools.calendar_doc import INSERTED, REPLACED, UNCHANGED, VIDEOS, apply_blocks
+from tools.records import VideoItem
+from tools.resource_index import ResourceIndex
 
 INDEX_PATH = Path("resources/videos.yml")
 CALENDAR_PATH = Path("Calendario.md")
+DEAD_FLAG = " — ⚠️ enlace caído"
 
 
-def load_index(path: Path) -> Dict[str, Any]:
+def load_index(
+    path: Path, use_cache: bool = True, weeks: Optional[Iterable[str]] = None, blocks: Optional[Iterable[str]] = None
+) -> ResourceIndex:
+    """Índice de ``path`` (YAML o carpeta de shards; ``weeks``/``blocks``: ver shards.load_catalogue)."""
+    path = shards.source(path)
     if not path.exists():
         sys.exit(f"ERROR: No existe el índice {path}")
-    return yaml.safe_load(path.read_text(encoding="utf-8"))
+    return ResourceIndex(shards.load_catalogue(path, use_cache=use_cache, weeks=weeks, blocks=blocks), VideoItem)
 
 
-def videos_for_week(index: Dict[str, Any], week: str) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    for items in (index.get("collections") or {}).values():
-        for item in items:
-            if week in (item.get("weeks") or []):
-                out.append(item)
-    # orden alfabético por título
-    out.sort(key=lambda d: d.get("title", "").lower())
-    return out
+def videos_for_week(index: Dict[str, Any], week: str) -> List[VideoItem]:
+    # orden alfabético por título (lo garantiza el índice)
+    return ResourceIndex.ensure(index, VideoItem).query(week=week)
 
 
-def build_md_section(week: str, items: List[Dict[str, Any]]) -> str:
+def build_md_section(week: str, items: List[VideoItem], dead: Optional[Set[str]] = None) -> str:
     lines = [f"### Videos base — {week}", ""]
     if not items:
         lines.append("_(No se encontraron videos para esta semana en resources/videos.yml)_")
         return "\n".join(lines) + "\n"
     for v in items:
-        title = v.get("title", "Sin título")
-        url = v.get("url", "#")
-        topics = ", ".join(v.get("topics", []))
-        ts = v.get("timestamps") or {}
+        title = v.title if v.title is not None else "Sin título"
+        url = v.url if v.url is not None else "#"
+        topics = ", ".join(v.topics)
+        ts = v.timestamps or {}
         ts_inline = ""
         if isinstance(ts, dict) and ts:
             ts_inline = " · " + ", ".join(f"{k}: {val}" for k, val in ts.items())
-        lines.append(f"- [{title}]({url}) — temas: {topics}{ts_inline}")
+        flag = DEAD_FLAG if dead and url in dead else ""
+        lines.append(f"- [{title}]({url}) — temas: {topics}{ts_inline}{flag}")
     lines.append("")
     return "\n".join(lines) + "\n"
 
 
 def inject_into_calendar(week: str, section_md: str, calendar_path: Path, create_if_missing: bool) -> None:
-    if not calendar_path.exists():
-        if not create_if_missing:
-            sys.exit(f"ERROR: No existe {calendar_path}. Crea el archivo primero.")
-        calendar_path.write_text(f"# Calendario del Programa\n\n", encoding="utf-8")
-
-    original = calendar_path.read_text(encoding="utf-8")
-
-    # marcadores
-    start_marker = f"<!-- VIDEOS_BASE:{week} START -->"
-    end_marker = f"<!-- VIDEOS_BASE:{week} END -->"
-
-    # bloque a inyectar (con marcadores)
-    block = f"{start_marker}\n{section_md}{end_marker}\n"
-
-    # 1) Si ya hay marcadores para esa semana, reemplazar lo de adentro
-    pattern = re.compile(
-        rf"(?s){re.escape(start_marker)}.*?{re.escape(end_marker)}"
+    # 1) Si ya hay marcadores para esa semana, se reemplaza lo de adentro
+    # 2) Si no, se inserta debajo del encabezado "### S11 — ..." o "### S11"
+    # 3) Si no se encontró encabezado de la semana, se añade al final
+    [(_, _, action)] = apply_blocks(
+        calendar_path,
+        [(VIDEOS, week, section_md)],
+        create_if_missing=create_if_missing,
+        backup=_backup,
     )
-    if pattern.search(original):
-        updated = pattern.sub(block.strip() + "\n", original)
-        if updated != original:
-            _backup(calendar_path)
-            calendar_path.write_text(updated, encoding="utf-8")
-            print(f"OK: Reemplazado bloque existente {week}")
-            return
-
-    # 2) Si no hay marcadores, intentar insertar debajo del encabezado de la semana
-    #    Encabezados válidos tipo: "### S11 — Decoradores..." o "### S11"
-    header_re = re.compile(rf"^###\s*{re.escape(week)}\b.*$", re.MULTILINE)
-    m = header_re.search(original)
-    if m:
-        insert_pos = m.end()
-        updated = original[:insert_pos] + "\n\n" + block + original[insert_pos:]
-        _backup(calendar_path)
-        calendar_path.write_text(updated, encoding="utf-8")
+    if action == REPLACED:
+        print(f"OK: Reemplazado bloque existente {week}")
+    elif action == UNCHANGED:
+        print(f"OK: Bloque {week} sin cambios")
+    elif action == INSERTED:
         print(f"OK: Insertado bloque bajo encabezado {week}")
-        return
-
-    # 3) Si no se encontró encabezado de la semana, añadir al final
-    updated = original.rstrip() + f"\n\n## {week}\n\n{block}"
-    _backup(calendar_path)
-    calendar_path.write_text(updated, encoding="utf-8")
-    print(f"OK: Añadido bloque {week} al final (no se encontró encabezado).")
+    else:
+        print(f"OK: Añadido bloque {week} al final (no se encontró encabezado).")
 
 
 def _backup(path: Path) -> None:
-    ts = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup = path.with_suffix(path.suffix + f".bak-{ts}")
-    backup.write_text(path.read_text(encoding="utf-8"), encoding="utf-8")
-    # Solo informativo:
-    print(f"(Backup creado: {backup.name})")
+    # Una instantánea por ejecución en el almacén .backups/ (ver tools/backups.py)
+    from tools import backups
+
+    digest = backups.snapshot(path, label="videos")
+    if digest:
+        print(f"(Backup creado: {digest[:12]})")
 
 
 def main(argv: List[str]) -> int:
+    import argparse
+
     ap = argparse.ArgumentParser(
         description="Inyecta la sección 'Videos base' en Calendario.md usando resources/videos.yml."
     )
@@ -115,13 +90,19 @@ def main(argv: List[str]) -> int:
     ap.add_argument("--index", default=str(INDEX_PATH), help="Ruta al YAML (resources/videos.yml)")
     ap.add_argument("--calendar", default=str(CALENDAR_PATH), help="Ruta a Calendario.md")
     ap.add_argument("--create-if-missing", action="store_true", help="Crear Calendario.md si no existe")
+    ap.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    ap.add_argument("--flag-dead-links", action="store_true", help="Marcar enlaces caídos (según check-links)")
+    timings.add_args(ap)
     args = ap.parse_args(argv)
 
     week = args.week.upper()
-    index = load_index(Path(args.index))
-    items = videos_for_week(index, week)
-    section = build_md_section(week, items)
-    inject_into_calendar(week, section, Path(args.calendar), create_if_missing=args.create_if_missing)
+    with timings.session(args):
+        index = load_index(Path(args.index), use_cache=not args.no_cache, weeks=[week])
+        with timings.span("selección"):
+            items = videos_for_week(index, week)
+        with timings.span("render"):
+            section = build_md_section(week, items, dead=links.dead_links() if args.flag_dead_links else None)
+        inject_into_calendar(week, section, Path(args.calendar), create_if_missing=args.create_if_missing)
     return 0
 
 
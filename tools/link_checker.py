@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from tools.links import CONCURRENCY, MAX_REDIRECTS, PER_HOST, TIMEOUT, Entry
+
+# Motor de tools/links.py: peticiones en asyncio con concurrencia acotada; cada host
+# tiene su propio pool de conexiones keep-alive (http.client en hilos) y un límite
+# de peticiones por segundo.
+
+USER_AGENT = "python-learning-program-linkcheck/1.0"
+_BODY_LIMIT = 64 * 1024
+
+
+class HostPool:
+    """Conexiones keep-alive a un host (esquema + host:puerto) con límite de tasa."""
+
+    def __init__(self, scheme: str, netloc: str, size: int, rate: float, timeout: float) -> None:
+        self.scheme, self.netloc, self.timeout = scheme, netloc, timeout
+        self.slots = asyncio.Semaphore(size)
+        self.idle: List[http.client.HTTPConnection] = []
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def throttle(self) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def connect(self, fresh: bool = False) -> http.client.HTTPConnection:
+        if self.idle and not fresh:
+            return self.idle.pop()
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.netloc, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+def _request(
+    conn: http.client.HTTPConnection, method: str, target: str, headers: Dict[str, str]
+) -> Tuple[int, Dict[str, str], bool]:
+    """Petición bloqueante (corre en un hilo). Devuelve (status, cabeceras, reutilizable)."""
+    conn.request(method, target, headers=headers)
+    resp = conn.getresponse()
+    hdrs = {k.lower(): v for k, v in resp.getheaders()}
+    if method == "HEAD":
+        resp.read()
+        reusable = not resp.will_close
+    else:
+        # Solo interesa el estado: cuerpos grandes cierran la conexión en vez de leerse
+        length = hdrs.get("content-length")
+        if length is not None and length.isdigit() and int(length) <= _BODY_LIMIT:
+            resp.read()
+            reusable = not resp.will_close
+        else:
+            resp.close()
+            reusable = False
+    return resp.status, hdrs, reusable
+
+
+class LinkChecker:
+    def __init__(
+        self,
+        concurrency: int = CONCURRENCY,
+        per_host: int = PER_HOST,
+        rate: float = 0.0,
+        timeout: float = TIMEOUT,
+        max_redirects: int = MAX_REDIRECTS,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.rate = rate
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.pools: Dict[Tuple[str, str], HostPool] = {}
+        self.requests = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self, scheme: str, netloc: str) -> HostPool:
+        key = (scheme, netloc)
+        if key not in self.pools:
+            self.pools[key] = HostPool(scheme, netloc, self.per_host, self.rate, self.timeout)
+        return self.pools[key]
+
+    async def _send(
+        self, pool: HostPool, method: str, target: str, headers: Dict[str, str], fresh: bool
+    ) -> Tuple[int, Dict[str, str]]:
+        conn = pool.connect(fresh)
+        try:
+            status, hdrs, reusable = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _request, conn, method, target, headers
+            )
+        except BaseException:
+            conn.close()
+            raise
+        pool.release(conn, reusable)
+        return status, hdrs
+
+    async def _fetch(self, method: str, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str]]:
+        parts = urlsplit(url)
+        pool = self._pool(parts.scheme.lower(), parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        async with pool.slots:
+            await pool.throttle()
+            self.requests += 1
+            try:
+                return await self._send(pool, method, target, headers, fresh=False)
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # El servidor cerró una conexión keep-alive ociosa: un reintento con una nueva
+                return await self._send(pool, method, target, headers, fresh=True)
+
+    async def check(self, url: str, previous: Optional[Entry] = None) -> Entry:
+        """Sigue redirecciones con HEAD (GET si el servidor no lo admite)."""
+        current = url
+        prev_final = (previous or {}).get("final_url")
+        try:
+            for _ in range(self.max_redirects + 1):
+                headers = {"User-Agent": USER_AGENT}
+                if previous and current == prev_final:
+                    if previous.get("etag"):
+                        headers["If-None-Match"] = previous["etag"]
+                    if previous.get("last_modified"):
+                        headers["If-Modified-Since"] = previous["last_modified"]
+                status, hdrs = await self._fetch("HEAD", current, headers)
+                if status in (405, 501):
+                    status, hdrs = await self._fetch("GET", current, headers)
+                if status == 304 and previous:
+                    return {**previous, "checked_at": time.time(), "error": None}
+                if status in (301, 302, 303, 307, 308) and hdrs.get("location"):
+                    current = urljoin(current, hdrs["location"])
+                    continue
+                return {
+                    "status": status,
+                    "final_url": current,
+                    "etag": hdrs.get("etag"),
+                    "last_modified": hdrs.get("last-modified"),
+                    "checked_at": time.time(),
+                    "error": None,
+                }
+            error = f"más de {self.max_redirects} redirecciones"
+        except (OSError, http.client.HTTPException) as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "status": None,
+            "final_url": current,
+            "etag": None,
+            "last_modified": None,
+            "checked_at": time.time(),
+            "error": error,
+        }
+
+    async def run(self, urls: Iterable[str], previous: Optional[Dict[str, Entry]] = None) -> Dict[str, Entry]:
+        previous = previous or {}
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(url: str) -> Tuple[str, Entry]:
+            async with limit:
+                return url, await self.check(url, previous.get(url))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="links")
+        try:
+            return dict(await asyncio.gather(*(one(u) for u in urls)))
+        finally:
+            self._executor.shutdown(wait=True)
+            for pool in self.pools.values():
+                pool.close()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+from tools import index_cache, shards
+
+if TYPE_CHECKING:
+    from tools.link_checker import LinkChecker
+
+# Verificación de los enlaces (url) de resources/videos.yml y resources/books.yml.
+#
+#   python -m tools.plan check-links                 (solo revalida lo vencido)
+#   python -m tools.plan check-links --force --concurrency 32
+#
+# Los resultados se guardan en <CACHE_DIR>/links.json con estado, URL final,
+# ETag/Last-Modified y fecha de comprobación; dentro del TTL no se vuelven a pedir
+# y, vencidos, se revalidan con peticiones condicionales. Las peticiones las hace
+# tools/link_checker.py (asyncio), que solo se importa cuando hay algo que pedir;
+# los inyectores solo leen el informe (dead_links).
+#
+# Un fallo sin respuesta HTTP (timeout, DNS, conexión cortada, bucle de
+# redirecciones) no cambia el estado conocido: la entrada conserva el último
+# status obtenido y cuenta los fallos seguidos ("failures"). El enlace se da por
+# caído recién con FAILURES_DEAD fallos seguidos.
+
+TTL_SECONDS = 7 * 24 * 3600
+CONCURRENCY = 16
+PER_HOST = 4
+TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+# Respuestas que no indican un enlace roto (login, bloqueo anti-bots, límite de peticiones)
+NOT_DEAD = {401, 403, 429}
+FAILURES_DEAD = 3
+
+Entry = Dict[str, Any]
+
+
+def cache_file() -> Path:
+    return index_cache.CACHE_DIR / "links.json"
+
+
+def load_cache(path: Optional[Path] = None) -> Dict[str, Entry]:
+    try:
+        data = json.loads((path or cache_file()).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(entries: Dict[str, Entry], path: Optional[Path] = None) -> None:
+    path = path or cache_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entries, indent=1, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def is_dead(entry: Entry) -> bool:
+    if int(entry.get("failures") or 0) >= FAILURES_DEAD:
+        return True
+    status = entry.get("status")
+    return status is not None and status >= 400 and status not in NOT_DEAD
+
+
+def reason(entry: Entry) -> str:
+    """Por qué ``entry`` cuenta como caído: el status HTTP o el último error."""
+    if int(entry.get("failures") or 0) >= FAILURES_DEAD:
+        return f"{entry.get('error')} ({entry['failures']} fallos seguidos)"
+    return str(entry.get("status"))
+
+
+def merge(previous: Optional[Entry], new: Entry) -> Entry:
+    """Entrada nueva del caché: un fallo sin respuesta conserva el último status."""
+    if new.get("status") is not None:
+        return {**new, "failures": 0}
+    prev = previous or {"status": None, "final_url": new.get("final_url"), "etag": None, "last_modified": None}
+    return {
+        **prev,
+        "checked_at": new.get("checked_at"),
+        "error": new.get("error"),
+        "failures": int(prev.get("failures") or 0) + 1,
+    }
+
+
+def is_fresh(entry: Optional[Entry], ttl: float, now: Optional[float] = None) -> bool:
+    if not entry:
+        return False
+    return (now if now is not None else time.time()) - float(entry.get("checked_at", 0)) < ttl
+
+
+def dead_links(path: Optional[Path] = None) -> Set[str]:
+    """URLs marcadas como caídas en el último informe (sin importar el TTL)."""
+    return {url for url, e in load_cache(path).items() if isinstance(e, dict) and is_dead(e)}
+
+
+def catalogue_urls(paths: Iterable[Path], use_cache: bool = True) -> List[str]:
+    """URLs http(s) distintas de los catálogos, en orden de aparición."""
+    urls: Dict[str, None] = {}
+    for path in paths:
+        data = shards.load_catalogue(path, use_cache=use_cache)
+        for items in (data.get("collections") or {}).values():
+            for it in items or []:
+                url = it.get("url") if isinstance(it, dict) else None
+                if isinstance(url, str) and url.lower().startswith(("http://", "https://")):
+                    urls.setdefault(url)
+    return list(urls)
+
+
+def check_links(
+    urls: Iterable[str],
+    ttl: float = TTL_SECONDS,
+    force: bool = False,
+    cache: Optional[Path] = None,
+    checker: Optional["LinkChecker"] = None,
+) -> Dict[str, Entry]:
+    """Comprueba ``urls`` y actualiza la caché; solo se piden las entradas vencidas.
+
+    Devuelve el resultado (nuevo o en caché) de cada URL pedida.
+    """
+    entries = load_cache(cache)
+    now = time.time()
+    urls = list(dict.fromkeys(urls))
+    stale = [u for u in urls if force or not is_fresh(entries.get(u), ttl, now)]
+    if stale:
+        import asyncio
+
+        from tools.link_checker import LinkChecker
+
+        checker = checker or LinkChecker()
+        for url, entry in asyncio.run(checker.run(stale, entries)).items():
+            entries[url] = merge(entries.get(url), entry)
+        save_cache(entries, cache)
+    return {u: entries[u] for u in urls}
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools import index_cache
+
+# Manifiesto de regeneración incremental de un calendario.
+#
+# Por cada bloque ("VIDEOS_BASE:S3") guarda el hash de la entrada (items
+# seleccionados + versión del render) y el hash del bloque escrito. Un bloque está
+# "limpio" si la entrada no cambió y el calendario sigue teniendo ese mismo bloque.
+# Vive en la caché: con TOOLS_NO_CACHE=1 ni se lee ni se escribe (todo se regenera).
+
+# Subir al cambiar el formato de md_section / build_md_section
+RENDER_VERSION = 1
+
+
+def input_hash(marker: str, week: str, items: List[Dict[str, Any]], extra: Any = None) -> str:
+    # ``extra``: otras entradas del render (p. ej. enlaces caídos marcados)
+    key = [RENDER_VERSION, marker, week, items] + ([extra] if extra is not None else [])
+    payload = json.dumps(key, sort_keys=True, ensure_ascii=False, default=_encode)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode(obj: Any) -> Any:
+    # Registros de tools/records.py: se hashean como el dict del YAML
+    as_dict = getattr(obj, "as_dict", None)
+    return as_dict() if as_dict is not None else str(obj)
+
+
+def block_hash(block: Optional[str]) -> Optional[str]:
+    if block is None:
+        return None
+    return hashlib.sha256(block.encode("utf-8")).hexdigest()
+
+
+def manifest_path(calendar: Path) -> Path:
+    key = hashlib.sha1(str(calendar.resolve()).encode("utf-8")).hexdigest()[:20]
+    return index_cache.CACHE_DIR / "manifest" / f"{key}.json"
+
+
+class Manifest:
+    def __init__(self, calendar: Path) -> None:
+        self.path = manifest_path(calendar)
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if not index_cache.enabled():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == RENDER_VERSION:
+                self.entries = data.get("blocks") or {}
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(marker: str, week: str) -> str:
+        return f"{marker}:{week}"
+
+    def is_clean(self, marker: str, week: str, inp: str, current_hash: Optional[str]) -> bool:
+        """``current_hash``: hash del bloque que hay ahora en el calendario (None si no hay)."""
+        e = self.entries.get(self.key(marker, week))
+        return (
+            e is not None
+            and current_hash is not None
+            and e.get("input") == inp
+            and e.get("block") == current_hash
+        )
+
+    def record(self, marker: str, week: str, inp: str, written_hash: str) -> None:
+        self.entries[self.key(marker, week)] = {"input": inp, "block": written_hash}
+
+    def save(self) -> None:
+        if not index_cache.enabled():
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            data = {"version": RENDER_VERSION, "blocks": self.entries}
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # sin manifiesto la próxima ejecución simplemente regenera todo
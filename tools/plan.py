@@ -0,0 +1,686 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+from tools import links, shards, timings
+from tools.calendar_doc import (
+    BOOKS,
+    SKIPPED,
+    STREAM_THRESHOLD,
+    VIDEOS,
+    CalendarDoc,
+    count_changed,
+    make_block,
+    read_calendar,
+    write_doc,
+)
+from tools.inject_books import INDEX as BOOKS_INDEX
+from tools.inject_books import books_for_week, md_section
+from tools.inject_books import load_index as load_books
+from tools.inject_videos import CALENDAR_PATH
+from tools.inject_videos import INDEX_PATH as VIDEOS_INDEX
+from tools.inject_videos import build_md_section, videos_for_week
+from tools.inject_videos import load_index as load_videos
+from tools.manifest import Manifest, block_hash, input_hash
+from tools.resource_index import ResourceIndex
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Punto de entrada único para regenerar el calendario:
+#
+#   python -m tools.plan inject --all                 (libros y videos)
+#   python -m tools.plan inject --range S3 S8 --videos
+#   python -m tools.plan watch                        (reinyecta al guardar los YAML)
+#   python -m tools.plan cohorts cohortes.yml         (un calendario por cohorte)
+#   python -m tools.plan dedupe --strict              (duplicados, como chequeo de CI)
+#   python -m tools.plan coverage --format csv        (temas x semanas y huecos)
+#   python -m tools.plan schedule --suggest semanas.yml  (semanas con carga equilibrada)
+#
+# Carga cada índice una vez, genera todas las secciones y hace una sola pasada
+# (y una sola escritura) sobre Calendario.md. Los módulos pesados (pools de
+# procesos, streaming, backups, asyncio) se importan solo en los caminos que los usan.
+
+FIRST_WEEK, LAST_WEEK = 1, 24
+
+Task = Tuple[str, str]  # (marker, semana)
+Update = Tuple[str, str, str]
+
+
+def normalize_week(w: str) -> str:
+    w = w.strip().upper()
+    if not w.startswith("S"):
+        raise ValueError(f"Semana inválida: {w} (usa formato S1..S24)")
+    return w
+
+
+def weeks_from_range(wfrom: str, wto: str) -> List[str]:
+    wf, wt = normalize_week(wfrom), normalize_week(wto)
+    try:
+        sf, st = int(wf[1:]), int(wt[1:])
+    except ValueError:
+        raise ValueError("Rango inválido: usa S1..S24") from None
+    if sf < FIRST_WEEK or st > LAST_WEEK or sf > st:
+        raise ValueError("Rango fuera de límites (1..24) o invertido")
+    return [f"S{i}" for i in range(sf, st + 1)]
+
+
+def select_weeks(all_weeks: bool, week_range: Optional[Sequence[str]], weeks: Optional[Sequence[str]]) -> List[str]:
+    if all_weeks:
+        return [f"S{i}" for i in range(FIRST_WEEK, LAST_WEEK + 1)]
+    if week_range:
+        return weeks_from_range(week_range[0], week_range[1])
+    return [normalize_week(w) for w in weeks or []]
+
+
+def select_items(task: Task, videos: Optional[ResourceIndex], books: Optional[ResourceIndex]) -> List[dict]:
+    marker, week = task
+    if marker == VIDEOS:
+        return videos_for_week(videos, week)
+    return books_for_week(books, week)
+
+
+def render_one(
+    task: Task,
+    videos: Optional[ResourceIndex],
+    books: Optional[ResourceIndex],
+    dead: Optional[AbstractSet[str]] = None,
+) -> str:
+    """Selecciona los items de ``(marker, semana)`` y genera su sección Markdown.
+
+    ``dead``: URLs caídas (informe de ``check-links``) que se marcan en la sección.
+    """
+    marker, week = task
+    items = select_items(task, videos, books)
+    with timings.span("render"):
+        if marker == VIDEOS:
+            return build_md_section(week, items, dead=dead)
+        return md_section(week, items, dead=dead)
+
+
+# Índices de cada proceso del pool (se envían una vez por proceso, no por tarea)
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(
+    videos: Optional[ResourceIndex], books: Optional[ResourceIndex], dead: Optional[AbstractSet[str]] = None
+) -> None:
+    _WORKER["videos"], _WORKER["books"], _WORKER["dead"] = videos, books, dead
+
+
+def _render_in_worker(task: Task) -> str:
+    return render_one(task, _WORKER["videos"], _WORKER["books"], _WORKER["dead"])  # type: ignore[arg-type]
+
+
+def _make_pool(
+    executor: str,
+    jobs: int,
+    videos: Optional[ResourceIndex],
+    books: Optional[ResourceIndex],
+    dead: Optional[AbstractSet[str]] = None,
+) -> Executor:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=jobs)
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(videos, books, dead))
+
+
+def make_tasks(
+    weeks: Sequence[str], videos: Optional[ResourceIndex], books: Optional[ResourceIndex]
+) -> List[Task]:
+    # Los videos van primero: al insertar bajo un encabezado, el último bloque queda
+    # arriba, así que las semanas nuevas quedan con "Lecturas base" antes que "Videos base".
+    tasks: List[Task] = []
+    if videos is not None:
+        tasks += [(VIDEOS, w) for w in weeks]
+    if books is not None:
+        tasks += [(BOOKS, w) for w in weeks]
+    return tasks
+
+
+def render_updates(
+    weeks: Sequence[str],
+    videos: Optional[ResourceIndex] = None,
+    books: Optional[ResourceIndex] = None,
+    jobs: int = 1,
+    executor: str = "process",
+    dead: Optional[AbstractSet[str]] = None,
+) -> List[Update]:
+    """Secciones ``(marker, semana, Markdown)`` para todas las semanas pedidas."""
+    return render_tasks(make_tasks(weeks, videos, books), videos, books, jobs, executor, dead)
+
+
+def render_tasks(
+    tasks: Sequence[Task],
+    videos: Optional[ResourceIndex] = None,
+    books: Optional[ResourceIndex] = None,
+    jobs: int = 1,
+    executor: str = "process",
+    dead: Optional[AbstractSet[str]] = None,
+) -> List[Update]:
+    """Genera las secciones de ``tasks`` en el mismo orden.
+
+    Con ``jobs > 1`` la selección y el render se reparten en un pool (``process`` o
+    ``thread``); ``map`` conserva el orden, así que el resultado es idéntico al secuencial.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        sections = [render_one(t, videos, books, dead) for t in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with _make_pool(executor, jobs, videos, books, dead) as pool:
+            if executor == "thread":
+                fn = partial(render_one, videos=videos, books=books, dead=dead)
+            else:
+                fn = _render_in_worker
+            sections = list(pool.map(fn, tasks, chunksize=chunksize))
+    return [(marker, week, md) for (marker, week), md in zip(tasks, sections)]
+
+
+def run_inject(
+    weeks: Sequence[str],
+    calendar: Path,
+    videos_index: Optional[Path] = None,
+    books_index: Optional[Path] = None,
+    create_if_missing: bool = False,
+    use_cache: bool = True,
+    jobs: int = 1,
+    executor: str = "process",
+    incremental: bool = True,
+    dry_run: bool = False,
+    stream: Optional[bool] = None,
+    dead: Optional[AbstractSet[str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """Carga los índices pedidos, genera las secciones y las aplica en una escritura.
+
+    En modo incremental solo se generan los bloques cuya entrada cambió según el
+    manifiesto (o que ya no coinciden con lo escrito); el resto queda ``skipped``.
+    Con ``dry_run`` no se escribe nada: las acciones indican qué cambiaría.
+    ``stream`` fuerza (o evita) la reescritura en streaming; por defecto se usa
+    a partir de ``STREAM_THRESHOLD`` bytes. ``dead`` marca esas URLs como caídas.
+    """
+    # Con catálogos en carpetas solo se cargan los shards con items de esas semanas
+    videos = load_videos(videos_index, use_cache=use_cache, weeks=weeks) if videos_index else None
+    books = load_books(books_index, use_cache=use_cache, weeks=weeks) if books_index else None
+    return inject_indexes(
+        weeks,
+        calendar,
+        videos,
+        books,
+        create_if_missing=create_if_missing,
+        jobs=jobs,
+        executor=executor,
+        incremental=incremental,
+        dry_run=dry_run,
+        stream=stream,
+        dead=dead,
+    )
+
+
+def inject_indexes(
+    weeks: Sequence[str],
+    calendar: Path,
+    videos: Optional[ResourceIndex] = None,
+    books: Optional[ResourceIndex] = None,
+    create_if_missing: bool = False,
+    jobs: int = 1,
+    executor: str = "process",
+    incremental: bool = True,
+    dry_run: bool = False,
+    stream: Optional[bool] = None,
+    dead: Optional[AbstractSet[str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """Como ``run_inject`` pero con los índices ya cargados (``None`` = ese catálogo no se toca).
+
+    Lee, genera y escribe bajo el lock del calendario (ver tools/calendar_lock.py).
+    """
+    from tools.calendar_lock import locked
+
+    with nullcontext() if dry_run else locked(calendar):
+        return _inject_locked(
+            weeks, calendar, videos, books, create_if_missing, jobs, executor, incremental, dry_run, stream, dead
+        )
+
+
+def _inject_locked(
+    weeks: Sequence[str],
+    calendar: Path,
+    videos: Optional[ResourceIndex],
+    books: Optional[ResourceIndex],
+    create_if_missing: bool,
+    jobs: int,
+    executor: str,
+    incremental: bool,
+    dry_run: bool,
+    stream: Optional[bool],
+    dead: Optional[AbstractSet[str]],
+) -> List[Tuple[str, str, str]]:
+    label = "+".join(k for k, idx in (("books", books), ("videos", videos)) if idx is not None)
+
+    def backup(path: Path) -> None:
+        from tools import backups
+
+        digest = backups.snapshot(path, label=label)
+        if digest:
+            print(f"(Backup: {digest[:12]})")
+
+    if stream is None:
+        stream = calendar.exists() and calendar.stat().st_size >= STREAM_THRESHOLD
+    if not calendar.exists() and not dry_run:
+        read_calendar(calendar, create_if_missing)
+    exists = calendar.exists()  # la simulación no crea el calendario
+
+    if stream:
+        from tools.calendar_stream import scan, stream_blocks
+
+        with timings.span("escanear calendario"):
+            scanned = scan(calendar) if exists else ({}, set())
+        current = scanned[0]
+    else:
+        with timings.span("leer calendario"):
+            original = calendar.read_text(encoding="utf-8") if exists else ""
+        with timings.span("analizar calendario"):
+            doc = CalendarDoc(original)
+            current = {k: block_hash(b) for k, b in doc.blocks().items()}
+
+    manifest = Manifest(calendar)
+    tasks = make_tasks(weeks, videos, books)
+    hashes = {}
+    with timings.span("selección + hash de entrada"):
+        for t in tasks:
+            items = select_items(t, videos, books)
+            flagged = sorted({it.url for it in items} & dead) if dead else None
+            hashes[t] = input_hash(t[0], t[1], items, flagged or None)
+    dirty = [t for t in tasks if not (incremental and manifest.is_clean(t[0], t[1], hashes[t], current.get(t)))]
+    with timings.span("generar secciones"):
+        updates = render_tasks(dirty, videos, books, jobs=jobs, executor=executor, dead=dead)
+
+    if stream:
+        applied = stream_blocks(calendar, updates, backup=backup, dry_run=dry_run, scanned=scanned)
+    else:
+        with timings.span("aplicar bloques"):
+            applied = [(m, w, doc.set_block(m, w, md)) for m, w, md in updates]
+        if not dry_run:
+            write_doc(calendar, original, doc, backup)
+    if not dry_run:
+        with timings.span("manifiesto"):
+            for m, w, md in updates:
+                manifest.record(m, w, hashes[(m, w)], block_hash(make_block(m, w, md)) or "")
+            manifest.save()
+    actions = {(m, w): action for m, w, action in applied}
+    return [(m, w, actions.get((m, w), SKIPPED)) for m, w in tasks]
+
+
+def add_week_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--all", action="store_true", help="Inyectar S1..S24")
+    g.add_argument("--range", nargs=2, metavar=("FROM", "TO"), help="Rango inclusivo (ej. --range S3 S8)")
+    g.add_argument("--weeks", nargs="+", metavar="Sxx", help="Lista explícita (ej. --weeks S2 S5 S11)")
+
+
+def add_jobs_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("-j", "--jobs", type=int, default=1, help="Procesos/hilos para generar las secciones")
+    p.add_argument("--executor", choices=["process", "thread"], default="process", help="Tipo de pool con --jobs > 1")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="plan", description="Herramientas del calendario del programa.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("inject", help="Inyecta libros y/o videos para varias semanas en una pasada")
+    add_week_args(p)
+    p.add_argument("--books", action="store_true", help="Inyectar 'Lecturas base'")
+    p.add_argument("--videos", action="store_true", help="Inyectar 'Videos base'")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--calendar", default=str(CALENDAR_PATH), help="Ruta a Calendario.md")
+    p.add_argument("--create-if-missing", action="store_true", help="Crear Calendario.md si no existe")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    p.add_argument("--full", action="store_true", help="Regenerar todas las semanas (ignorar el manifiesto)")
+    p.add_argument("--dry-run", action="store_true", help="Solo listar los bloques que cambiarían")
+    p.add_argument(
+        "--stream",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Reescribir línea a línea (por defecto, solo para calendarios muy grandes)",
+    )
+    p.add_argument("--flag-dead-links", action="store_true", help="Marcar enlaces caídos (según check-links)")
+    add_jobs_args(p)
+    timings.add_args(p)
+    p.set_defaults(func=cmd_inject)
+
+    p = sub.add_parser("check-links", help="Comprueba las URLs de los catálogos (con caché y TTL)")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--ttl", type=float, default=links.TTL_SECONDS / 3600, help="Horas de validez de un resultado")
+    p.add_argument("--force", action="store_true", help="Revalidar todo, aunque no haya vencido")
+    p.add_argument("--concurrency", type=int, default=links.CONCURRENCY, help="Peticiones simultáneas en total")
+    p.add_argument("--per-host", type=int, default=links.PER_HOST, help="Conexiones simultáneas por host")
+    p.add_argument("--rate", type=float, default=0.0, help="Máximo de peticiones por segundo y host (0 = sin límite)")
+    p.add_argument("--timeout", type=float, default=links.TIMEOUT, help="Segundos por petición")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    p.add_argument("--strict", action="store_true", help="Salir con código 3 si hay enlaces caídos")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_check_links)
+
+    p = sub.add_parser("search", help="Busca en títulos, autores, temas y timestamps de ambos catálogos")
+    p.add_argument("query", nargs="+", help="Palabras o fragmentos (ej. asyncio, 'decor gener')")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--books", action="store_true", help="Solo libros")
+    p.add_argument("--videos", action="store_true", help="Solo videos")
+    p.add_argument("--top", type=int, default=10, metavar="K", help="Cantidad de resultados")
+    p.add_argument("--no-cache", action="store_true", help="No usar ni guardar el índice persistido")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("watch", help="Vigila los catálogos y reinyecta las semanas afectadas al guardar")
+    p.add_argument("--books", action="store_true", help="Vigilar solo resources/books.yml")
+    p.add_argument("--videos", action="store_true", help="Vigilar solo resources/videos.yml")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--calendar", default=str(CALENDAR_PATH), help="Ruta a Calendario.md")
+    p.add_argument("--create-if-missing", action="store_true", help="Crear Calendario.md si no existe")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    p.add_argument("--poll", action="store_true", help="Sondear mtime en vez de usar inotify")
+    p.add_argument("--debounce", type=float, default=0.1, metavar="SEG", help="Calma antes de reinyectar una ráfaga")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("cohorts", help="Genera los calendarios de todas las cohortes de un manifiesto")
+    p.add_argument("manifest", help="YAML con la lista de cohortes (ver tools/cohorts.py)")
+    p.add_argument("--only", nargs="+", metavar="NOMBRE", help="Generar solo estas cohortes")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    p.add_argument("-j", "--jobs", type=int, default=0, help="Procesos (0 = uno por CPU)")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_cohorts)
+
+    p = sub.add_parser("dedupe", help="Busca items duplicados (misma URL o título/temas parecidos) en los catálogos")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--threshold", type=float, default=0.5, help="Similitud mínima de título/temas (Jaccard, 0..1)")
+    p.add_argument("--allow", metavar="ARCHIVO", help="Grupos permitidos: una línea por grupo, claves 'videos:id'")
+    p.add_argument("--json", action="store_true", help="Salida en JSON")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    p.add_argument("--strict", action="store_true", help="Salir con código 3 si hay duplicados")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_dedupe)
+
+    p = sub.add_parser("coverage", help="Matriz temas x semanas/bloques: cobertura, huecos y semanas sobrecargadas")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--format", choices=["md", "csv", "json"], default="md", help="Formato de salida")
+    p.add_argument("-o", "--output", help="Archivo de salida (por defecto, la consola)")
+    p.add_argument("--expect", nargs="+", default=[], metavar="TEMA", help="Temas que el programa debería cubrir")
+    p.add_argument("--overserved", type=float, default=2.0, help="Semana sobrecargada: más de N veces la mediana")
+    p.add_argument("--matrix", action="store_true", help="En Markdown, incluir la matriz temas x semanas")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_coverage)
+
+    p = sub.add_parser("schedule", help="Propone semanas para los videos equilibrando la carga semanal")
+    p.add_argument("--books-index", default=str(BOOKS_INDEX), help="Ruta a resources/books.yml")
+    p.add_argument("--videos-index", default=str(VIDEOS_INDEX), help="Ruta a resources/videos.yml")
+    p.add_argument("--no-books", action="store_true", help="No contar la lectura de los libros como carga fija")
+    p.add_argument("--max-per-week", type=float, default=180, metavar="MIN", help="Minutos de un video por semana")
+    p.add_argument("--passes", type=int, default=20, help="Pasadas máximas de búsqueda local")
+    p.add_argument("--suggest", metavar="ARCHIVO", help="Guardar las semanas propuestas (YAML id: [semanas])")
+    p.add_argument("--preview", metavar="ARCHIVO", help="Escribir un calendario de muestra con la propuesta")
+    p.add_argument("--calendar", default=str(CALENDAR_PATH), help="Calendario de partida para --preview")
+    p.add_argument("--create-if-missing", action="store_true", help="Partir de un calendario vacío si no existe")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    timings.add_args(p)
+    p.set_defaults(func=cmd_schedule)
+    return ap.parse_args(argv)
+
+
+def cmd_inject(args: argparse.Namespace) -> int:
+    weeks = select_weeks(args.all, args.range, args.weeks)
+    # Sin --books ni --videos se inyectan ambos
+    both = not (args.books or args.videos)
+    calendar = Path(args.calendar)
+    if not calendar.exists() and not args.create_if_missing:
+        print(f"ERROR: No existe {calendar}. Usa --create-if-missing o créalo manualmente.", file=sys.stderr)
+        return 2
+
+    results = run_inject(
+        weeks,
+        calendar,
+        videos_index=Path(args.videos_index) if (both or args.videos) else None,
+        books_index=Path(args.books_index) if (both or args.books) else None,
+        create_if_missing=args.create_if_missing,
+        use_cache=not args.no_cache,
+        jobs=args.jobs,
+        executor=args.executor,
+        incremental=not args.full,
+        dry_run=args.dry_run,
+        stream=args.stream,
+        dead=links.dead_links() if args.flag_dead_links else None,
+    )
+    changed = count_changed(results)
+    if args.dry_run:
+        dirty = [f"{m.split('_')[0]} {w}" for m, w, action in results if action != SKIPPED]
+        print(f"Simulación: {len(dirty)} bloques por regenerar ({changed} cambiarían)")
+        if dirty:
+            print("  " + ", ".join(dirty))
+        return 0
+    kinds = "+".join(k for k, on in (("LIBROS", both or args.books), ("VIDEOS", both or args.videos)) if on)
+    skipped = sum(1 for *_, action in results if action == SKIPPED)
+    print(
+        f"Listo: {len(weeks)} semanas de {kinds} procesadas, {changed} bloques modificados "
+        f"({skipped} sin cambios en la entrada) en {calendar}"
+    )
+    return 0
+
+
+def cmd_check_links(args: argparse.Namespace) -> int:
+    paths = [Path(p) for p in (args.videos_index, args.books_index) if shards.source(Path(p)).exists()]
+    urls = links.catalogue_urls(paths, use_cache=not args.no_cache)
+    from tools.link_checker import LinkChecker
+
+    checker = LinkChecker(
+        concurrency=args.concurrency, per_host=args.per_host, rate=args.rate, timeout=args.timeout
+    )
+    with timings.span("comprobar enlaces"):
+        results = links.check_links(urls, ttl=args.ttl * 3600, force=args.force, checker=checker)
+    dead = {u: e for u, e in results.items() if links.is_dead(e)}
+    for url, e in dead.items():
+        print(f"CAÍDO  {links.reason(e)}  {url}")
+    print(
+        f"Listo: {len(results)} enlaces, {checker.requests} peticiones, {len(dead)} caídos "
+        f"(informe en {links.cache_file()})"
+    )
+    return 3 if dead and args.strict else 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    from tools import search
+
+    both = not (args.books or args.videos)
+    catalogues = [
+        (Path(path), kind)
+        for path, kind, on in ((args.videos_index, "videos", args.videos), (args.books_index, "books", args.books))
+        if (both or on) and shards.source(Path(path)).exists()
+    ]
+    # Un segmento por archivo: en un catálogo en carpeta, uno por shard
+    segments = [
+        search.load_segment(shard, kind, use_cache=not args.no_cache)
+        for path, kind in catalogues
+        for shard in shards.expand([path])
+    ]
+    query = " ".join(args.query)
+    with timings.span("buscar"):
+        hits = search.search(query, segments, k=args.top)
+    for hit in hits:
+        print(search.format_hit(hit, query))
+    if not hits:
+        print(f"Sin resultados para: {query}")
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    from tools import watch
+
+    both = not (args.books or args.videos)
+    calendar = Path(args.calendar)
+    if not calendar.exists() and not args.create_if_missing:
+        print(f"ERROR: No existe {calendar}. Usa --create-if-missing o créalo manualmente.", file=sys.stderr)
+        return 2
+    paths = {
+        "videos": Path(args.videos_index) if both or args.videos else None,
+        "books": Path(args.books_index) if both or args.books else None,
+    }
+    for path in paths.values():
+        if path is not None and not shards.source(path).exists():
+            print(f"ERROR: No existe el índice {path}", file=sys.stderr)
+            return 2
+
+    session = watch.Session(
+        calendar,
+        videos_index=paths["videos"],
+        books_index=paths["books"],
+        use_cache=not args.no_cache,
+        create_if_missing=args.create_if_missing,
+    )
+    results = session.sync(select_weeks(True, None, None))
+    print(f"Calendario al día ({count_changed(results)} bloques modificados) en {calendar}")
+    watcher = watch.open_watcher(session.watched(), poll=args.poll)
+    mode = "inotify" if isinstance(watcher, watch.InotifyWatcher) else "sondeo"
+    print(f"Vigilando {', '.join(p.name for p in session.paths.values())} ({mode}); Ctrl+C para salir")
+    try:
+        watch.run(session, watcher, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+def cmd_cohorts(args: argparse.Namespace) -> int:
+    from tools import cohorts
+
+    manifest = Path(args.manifest)
+    if not manifest.exists():
+        print(f"ERROR: No existe {manifest}", file=sys.stderr)
+        return 2
+    selected = cohorts.load_manifest(manifest)
+    if args.only:
+        unknown = set(args.only) - {c.name for c in selected}
+        if unknown:
+            raise ValueError(f"Cohortes desconocidas: {', '.join(sorted(unknown))}")
+        selected = [c for c in selected if c.name in args.only]
+    markers = {m for c in selected for m in c.markers}
+    videos = load_videos(Path(args.videos_index), use_cache=not args.no_cache) if VIDEOS in markers else None
+    books = load_books(Path(args.books_index), use_cache=not args.no_cache) if BOOKS in markers else None
+    with timings.span("generar cohortes"):
+        results = cohorts.fan_out(selected, videos, books, jobs=args.jobs)
+    for name, changed in results:
+        if changed:
+            print(f"  {name}: {changed} bloques modificados")
+    written = sum(1 for _, changed in results if changed)
+    print(f"Listo: {len(results)} cohortes, {written} calendarios escritos")
+    return 0
+
+
+def cmd_dedupe(args: argparse.Namespace) -> int:
+    from tools import dedupe
+
+    catalogues = [
+        (kind, Path(path)) for kind, path in (("videos", args.videos_index), ("books", args.books_index))
+        if shards.source(Path(path)).exists()
+    ]
+    with timings.span("cargar"):
+        entries = dedupe.entries(catalogues, use_cache=not args.no_cache)
+    allowed = dedupe.load_allowlist(Path(args.allow)) if args.allow else []
+    clusters = dedupe.find_duplicates(entries, threshold=args.threshold, allowed=allowed)
+    if args.json:
+        import json
+
+        print(json.dumps(dedupe.to_json(clusters), ensure_ascii=False, indent=1))
+    else:
+        for cluster in clusters:
+            print(dedupe.format_cluster(cluster))
+        dups = sum(len(c.others) for c in clusters)
+        print(f"Listo: {len(entries)} items, {len(clusters)} grupos, {dups} duplicados probables")
+    return 3 if clusters and args.strict else 0
+
+
+def cmd_coverage(args: argparse.Namespace) -> int:
+    from tools import coverage
+
+    indexes = [
+        load(Path(path), use_cache=not args.no_cache)
+        for load, path in ((load_videos, args.videos_index), (load_books, args.books_index))
+        if shards.source(Path(path)).exists()
+    ]
+    cov = coverage.build(indexes, expect=args.expect)
+    if args.format == "json":
+        import json
+
+        text = json.dumps(coverage.to_json(cov, args.overserved), ensure_ascii=False, indent=1) + "\n"
+    elif args.format == "csv":
+        text = coverage.to_csv(cov)
+    else:
+        text = coverage.to_markdown(cov, args.overserved, matrix=args.matrix)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"Listo: {len(cov.topics)} temas x {len(cov.weeks)} semanas en {args.output}")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+def cmd_schedule(args: argparse.Namespace) -> int:
+    from tools import schedule
+
+    calendar = Path(args.calendar)
+    if args.preview and not calendar.exists() and not args.create_if_missing:
+        print(f"ERROR: No existe {calendar}. Usa --create-if-missing o créalo manualmente.", file=sys.stderr)
+        return 2
+
+    videos = load_videos(Path(args.videos_index), use_cache=not args.no_cache)
+    books_path = Path(args.books_index)
+    books = None if args.no_books or not shards.source(books_path).exists() else load_books(books_path, use_cache=not args.no_cache)
+    weeks = select_weeks(True, None, None)
+    with timings.span("planificar"):
+        proposal = schedule.propose(videos, weeks, books, max_per_week=args.max_per_week, passes=args.passes)
+    for line in schedule.report(proposal):
+        print(line)
+    moved = schedule.changes(proposal, videos)
+    for key, old, new in moved:
+        print(f"  {key}: {', '.join(old) or '-'} -> {', '.join(new)}")
+    if args.suggest:
+        Path(args.suggest).write_text(schedule.suggestions_yaml(proposal, videos), encoding="utf-8")
+    if args.preview:
+        from tools.calendar_doc import DEFAULT_HEADER, apply_blocks
+
+        preview = Path(args.preview)
+        if calendar.exists():
+            preview.write_bytes(calendar.read_bytes())
+        else:
+            preview.write_text(DEFAULT_HEADER, encoding="utf-8")
+        apply_blocks(preview, render_updates(weeks, schedule.apply_proposal(proposal, videos)), create_if_missing=True)
+        print(f"Calendario de muestra: {preview}")
+    print(f"Listo: {len(proposal.tasks)} videos, {len(moved)} con semanas distintas")
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        with timings.session(args):
+            return args.func(args)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
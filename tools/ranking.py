@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import heapq
+import math
+from itertools import product
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from tools.records import BLOCKS, WEEKS, Codes, Resource
+from tools.resource_index import ResourceIndex, norm_topics
+
+# Ranking top-k para suggest_videos / suggest_books (--rank).
+#
+# Puntaje de un item = suma del IDF de los temas pedidos que tiene
+#                      + PROXIMITY / (1 + distancia) a la semana y/o bloque pedidos.
+#
+# El puntaje solo depende de (qué temas coinciden, a qué distancia está), así que
+# el catálogo se parte en pocas clases de igual puntaje usando bitsets por
+# posición (ResourceIndex.bitsets). Las clases salen de un heap de mayor a menor
+# y de cada una se extraen posiciones en orden (= orden por título) hasta juntar
+# k items: nunca se puntúa ni se ordena el catálogo completo.
+
+TOP = 10  # k por defecto con --rank
+PROXIMITY = 1.0  # estar en la misma semana/bloque pesa como un tema presente en ~2/3 del catálogo
+
+Part = List[Tuple[float, int]]  # (puntaje parcial, bitset de posiciones)
+
+
+def idf(df: int, n: int) -> float:
+    return math.log(1 + n / df)
+
+
+def _topic_regions(everyone: int, postings: Dict[str, int], need: List[str], n: int) -> Part:
+    # Partición por subconjunto exacto de temas coincidentes; sin temas pedidos, una sola clase
+    regions: Part = [(0.0, everyone)]
+    for t in need:
+        p = postings.get(t, 0)
+        if not p:
+            continue
+        w = idf(p.bit_count(), n)
+        split: Part = []
+        for score, bits in regions:
+            hit, miss = bits & p, bits & ~p
+            if hit:
+                split.append((score + w, hit))
+            if miss:
+                split.append((score, miss))
+        regions = split
+    if need:
+        regions = [r for r in regions if r[0] > 0]  # al menos un tema en común
+    return regions
+
+
+def _proximity_bands(everyone: int, postings: Dict[str, int], codes: Codes, anchor: Optional[str]) -> Part:
+    # Bandas por distancia (en orden S1..S24 / B0..B5B) al ancla; sin ancla, una sola banda
+    pos = codes.ids.get(anchor) if anchor else None
+    if pos is None:
+        return [(0.0, everyone)]
+    by_dist: Dict[int, int] = {}
+    for name, bits in postings.items():
+        d = abs(codes.ids[name] - pos)
+        by_dist[d] = by_dist.get(d, 0) | bits
+    bands: Part = []
+    seen = 0
+    for d in sorted(by_dist):  # un item en varias semanas cuenta por la más cercana
+        bits = by_dist[d] & ~seen
+        if bits:
+            bands.append((PROXIMITY / (1 + d), bits))
+            seen |= bits
+    rest = everyone & ~seen
+    if rest:
+        bands.append((0.0, rest))
+    return bands
+
+
+def rank(
+    index: Any,
+    topics: Iterable[str] = (),
+    week: Optional[str] = None,
+    block: Optional[str] = None,
+    k: int = TOP,
+    item_cls: Type[Resource] = Resource,
+) -> List[Tuple[float, Resource]]:
+    """Los ``k`` items más relevantes como (puntaje, item), de mayor a menor puntaje.
+
+    Con temas, solo entran items con al menos uno en común. La semana y el bloque
+    no filtran: acercan. Los empates se resuelven por título.
+    """
+    index = ResourceIndex.ensure(index, item_cls)
+    items = index.items
+    if not items or k <= 0:
+        return []
+    weeks, blocks, postings = index.bitsets()
+    everyone = (1 << len(items)) - 1
+    parts = [
+        _topic_regions(everyone, postings, sorted(norm_topics(topics)), len(items)),
+        _proximity_bands(everyone, weeks, WEEKS, week),
+        _proximity_bands(everyone, blocks, BLOCKS, block),
+    ]
+    # Redondeo: clases distintas con el mismo puntaje (p. ej. misma semana o mismo bloque) se funden
+    heap = [(-round(sum(s for s, _ in combo), 9), n, combo) for n, combo in enumerate(product(*parts))]
+    heapq.heapify(heap)
+
+    out: List[Tuple[float, Resource]] = []
+    while heap and len(out) < k:
+        neg, _, combo = heapq.heappop(heap)
+        bits = combo[0][1] & combo[1][1] & combo[2][1]
+        while heap and heap[0][0] == neg:
+            combo = heapq.heappop(heap)[2]
+            bits |= combo[0][1] & combo[1][1] & combo[2][1]
+        while bits and len(out) < k:
+            low = bits & -bits
+            out.append((-neg, items[low.bit_length() - 1]))
+            bits ^= low
+    return out
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Registros compactos para los items de resources/videos.yml y resources/books.yml.
+#
+# En lugar de guardar cada item como el dict del YAML, ResourceIndex construye un
+# objeto con __slots__ por item: semanas y bloques como máscaras de bits, temas
+# como tupla de cadenas internadas (para mostrarlos) más una máscara de bits de
+# los temas en minúsculas (para filtrar). Las cadenas repetidas (autor, idioma,
+# temas, colección) se internan, así que todos los items comparten una sola copia.
+
+
+class Codes:
+    """Cadena <-> posición de bit. Las semanas, bloques y temas comparten un registro por proceso."""
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.ids: Dict[str, int] = {}
+        self.bits: Dict[str, int] = {}  # nombre -> 1 << id
+        self.names: List[str] = []
+        for name in names:
+            self.id(name)
+
+    def id(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.bits[name] = 1 << i
+            self.names.append(sys.intern(name))
+        return i
+
+    def mask(self, names: Iterable[Any], add: bool = True) -> int:
+        """Máscara de ``names``; con ``add=False`` se ignoran los nombres desconocidos."""
+        bits = self.bits
+        m = 0
+        for name in names:
+            bit = bits.get(name)
+            if bit is None:
+                if not add:
+                    continue
+                bit = 1 << self.id(str(name))
+            m |= bit
+        return m
+
+    def decode(self, mask: int) -> List[str]:
+        out: List[str] = []
+        names = self.names
+        while mask:
+            low = mask & -mask
+            out.append(names[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+
+# El orden de registro fija el orden al decodificar (S1..S24, B0..B5B)
+WEEKS = Codes(f"S{i}" for i in range(1, 25))
+BLOCKS = Codes(["B0", "B1", "B2", "B3", "B4", "B5A", "B5B"])
+TOPICS = Codes()  # temas normalizados (strip + minúsculas)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _lower_topics(topics: Iterable[Any]) -> List[str]:
+    return [t.strip().lower() for t in topics if isinstance(t, str) and t.strip()]
+
+
+_LISTS = ("topics", "weeks", "blocks")
+
+
+class Resource:
+    """Item genérico del catálogo. Las claves no conocidas se conservan en ``extra``."""
+
+    __slots__ = (
+        "id",
+        "title",
+        "url",
+        "author",
+        "year",
+        "lang",
+        "access",
+        "topics",
+        "topic_mask",
+        "weeks_mask",
+        "blocks_mask",
+        "collection",
+        "extra",
+    )
+    # Campos escalares del YAML (los de _SHARED se internan); __init__ los asigna
+    _PLAIN: Tuple[str, ...] = ("id", "title", "url", "year")
+    _SHARED: Tuple[str, ...] = ("author", "lang", "access")
+    _KNOWN: frozenset = frozenset()
+
+    def __init__(self, data: Dict[str, Any], collection: str = "") -> None:
+        get = data.get
+        self.id = get("id")
+        self.title = get("title")
+        self.url = get("url")
+        self.year = get("year")
+        self.author = _intern(get("author"))
+        self.lang = _intern(get("lang"))
+        self.access = _intern(get("access"))
+        topics = get("topics") or ()
+        self.topics: Tuple[str, ...] = tuple([_intern(t) for t in topics])
+        self.topic_mask = TOPICS.mask(_lower_topics(topics))
+        self.weeks_mask = WEEKS.mask(get("weeks") or ())
+        self.blocks_mask = BLOCKS.mask(get("blocks") or ())
+        self.collection = sys.intern(collection)
+        unknown = data.keys() - self._KNOWN
+        self.extra: Optional[Dict[str, Any]] = {k: data[k] for k in unknown} if unknown else None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._KNOWN = frozenset(cls._PLAIN + cls._SHARED + _LISTS)
+
+    @property
+    def weeks(self) -> List[str]:
+        return WEEKS.decode(self.weeks_mask)
+
+    @property
+    def blocks(self) -> List[str]:
+        return BLOCKS.decode(self.blocks_mask)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Dict equivalente al item del YAML (sin claves vacías)."""
+        d: Dict[str, Any] = {}
+        for name in self._PLAIN + self._SHARED:
+            value = getattr(self, name)
+            if value is not None:
+                d[name] = value
+        for name, value in (("topics", list(self.topics)), ("weeks", self.weeks), ("blocks", self.blocks)):
+            if value:
+                d[name] = value
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    # Compatibilidad con código que trata los items como dicts (it["id"], it.get("url"))
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.as_dict().get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.as_dict()[key]
+
+    def __reduce__(self) -> Any:
+        # Las máscaras dependen del registro del proceso: se reconstruye desde el dict
+        return (self.__class__, (self.as_dict(), self.collection))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id!r}, title={self.title!r})"
+
+
+Resource._KNOWN = frozenset(Resource._PLAIN + Resource._SHARED + _LISTS)
+
+
+class VideoItem(Resource):
+    __slots__ = ("difficulty", "timestamps", "notes")
+    _SHARED = Resource._SHARED + ("difficulty",)
+    _PLAIN = Resource._PLAIN + ("timestamps", "notes")
+
+    def __init__(self, data: Dict[str, Any], collection: str = "") -> None:
+        super().__init__(data, collection)
+        self.difficulty = _intern(data.get("difficulty"))
+        self.timestamps = data.get("timestamps")
+        self.notes = data.get("notes")
+
+
+class BookItem(Resource):
+    __slots__ = ("local_path",)
+    _PLAIN = Resource._PLAIN + ("local_path",)
+
+    def __init__(self, data: Dict[str, Any], collection: str = "") -> None:
+        super().__init__(data, collection)
+        self.local_path = data.get("local_path")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+from tools import timings
+from tools.records import BLOCKS, TOPICS, WEEKS, Resource
+
+
+def norm_topics(topics: Iterable[str]) -> Set[str]:
+    return {t.strip().lower() for t in topics if t and t.strip()}
+
+
+def to_bits(positions: Iterable[int], n: int) -> int:
+    """Entero con un bit encendido por posición (se arma en un bytearray: O(n), no O(n²))."""
+    buf = bytearray((n >> 3) + 1)
+    for i in positions:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+Bitsets = Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]
+
+
+class ResourceIndex(Mapping):
+    """Índice invertido sobre resources/videos.yml o resources/books.yml.
+
+    Se construye una sola vez a partir del YAML cargado: cada item pasa a ser un
+    registro compacto (``item_cls``, ver tools/records.py) y se mantienen mapas
+    semana -> items, bloque -> items y tema -> items (temas en minúsculas). El
+    YAML crudo no se conserva; ``index["collections"]`` lo reconstruye a pedido,
+    así que puede pasarse a código que espera el dict original.
+
+    Los items se numeran por título (minúsculas) y orden de aparición, de modo
+    que cualquier consulta devuelve los resultados ya ordenados por título.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]], item_cls: Type[Resource] = Resource) -> None:
+        with timings.span("índice"):
+            self._build(data or {}, item_cls)
+
+    def _build(self, data: Dict[str, Any], item_cls: Type[Resource]) -> None:
+        self.item_cls = item_cls
+        self.meta: Dict[str, Any] = {k: v for k, v in data.items() if k != "collections"}
+        self._has_collections = "collections" in data
+        self._source: List[Resource] = [
+            item_cls(it, coll) for coll, items in (data.get("collections") or {}).items() for it in (items or [])
+        ]
+        self.items: List[Resource] = sorted(self._source, key=lambda r: str(r.title or "").lower())
+        self.weeks: Dict[str, Set[int]] = {}
+        self.blocks: Dict[str, Set[int]] = {}
+        self.topics: Dict[str, Set[int]] = {}
+        self._bitsets: Optional[Bitsets] = None
+
+        for i, it in enumerate(self.items):
+            for w in WEEKS.decode(it.weeks_mask):
+                self.weeks.setdefault(w, set()).add(i)
+            for b in BLOCKS.decode(it.blocks_mask):
+                self.blocks.setdefault(b, set()).add(i)
+            for t in TOPICS.decode(it.topic_mask):
+                self.topics.setdefault(t, set()).add(i)
+
+    def __reduce__(self) -> Any:
+        # Se reconstruye al deserializar (p. ej. en procesos hijos), con su propio registro de códigos
+        return (self.__class__, (self.data, self.item_cls))
+
+    @classmethod
+    def ensure(cls, index: Any, item_cls: Type[Resource] = Resource) -> "ResourceIndex":
+        return index if isinstance(index, cls) else cls(index, item_cls)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """YAML equivalente al original (reconstruido desde los registros)."""
+        data = dict(self.meta)
+        if self._has_collections:
+            collections: Dict[str, List[Dict[str, Any]]] = {}
+            for it in self._source:
+                collections.setdefault(it.collection, []).append(it.as_dict())
+            data["collections"] = collections
+        return data
+
+    # --- Mapping: se comporta como el YAML original ---
+    def __getitem__(self, key: str) -> Any:
+        if key == "collections" and self._has_collections:
+            return self.data["collections"]
+        return self.meta[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.meta
+        if self._has_collections:
+            yield "collections"
+
+    def __len__(self) -> int:
+        return len(self.meta) + self._has_collections
+
+    def bitsets(self) -> Bitsets:
+        """Mapas (semanas, bloques, temas) -> bitset de posiciones; se construyen una vez.
+
+        Los usa tools/ranking.py: con enteros de Python, AND/OR sobre todo el
+        catálogo cuestan microsegundos aunque haya 100k items.
+        """
+        if self._bitsets is None:
+            n = len(self.items)
+
+            def bits(m: Dict[str, Set[int]]) -> Dict[str, int]:
+                return {name: to_bits(pos, n) for name, pos in m.items()}
+
+            self._bitsets = (bits(self.weeks), bits(self.blocks), bits(self.topics))
+        return self._bitsets
+
+    # --- Consultas ---
+    def ids(
+        self,
+        week: Optional[str] = None,
+        block: Optional[str] = None,
+        topics: Optional[Iterable[str]] = None,
+    ) -> Set[int]:
+        """Posiciones que cumplen todos los filtros dados (intersección de conjuntos).
+
+        Los temas cuentan si hay al menos uno en común con el item.
+        """
+        sets: List[Set[int]] = []
+        if week:
+            sets.append(self.weeks.get(week, set()))
+        if block:
+            sets.append(self.blocks.get(block, set()))
+        need = norm_topics(topics or [])
+        if need:
+            sets.append(set().union(*(self.topics.get(t, set()) for t in need)))
+        if not sets:
+            return set(range(len(self.items)))
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def query(
+        self,
+        week: Optional[str] = None,
+        block: Optional[str] = None,
+        topics: Optional[Iterable[str]] = None,
+    ) -> List[Resource]:
+        """Items que cumplen los filtros, ordenados por título."""
+        return [self.items[i] for i in sorted(self.ids(week, block, topics))]
+
+    def topics_of(self, item: Any) -> FrozenSet[str]:
+        """Temas (minúsculas) de un item."""
+        if isinstance(item, Resource):
+            return frozenset(TOPICS.decode(item.topic_mask))
+        return frozenset(norm_topics(item.get("topics") or []))
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import math
+import re
+from statistics import pstdev
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tools import timings
+from tools.records import Resource
+from tools.resource_index import ResourceIndex
+
+# Propuesta de semanas para los videos (``python -m tools.plan schedule``).
+#
+# Cada video dura ``duration`` (minutos, "H:MM:SS" o "MM:SS"), o lo que marca su
+# último timestamp, o DEFAULT_VIDEO_MINUTES. Los que pasan de MAX_PER_WEEK se
+# reparten en varias semanas seguidas, a partes iguales. Los libros no se mueven:
+# su lectura (``duration``, ``pages`` x MINUTES_PER_PAGE o DEFAULT_BOOK_MINUTES)
+# cuenta como carga fija repartida entre sus semanas.
+#
+# Orden de prerequisitos: cada video se ubica según su primer bloque (B0 < B1 <
+# ... < B5A = B5B) dentro de una ventana de semanas proporcional a la carga de
+# ese bloque, así que los bloques avanzan en orden por el calendario. Los videos
+# sin bloques pueden ir en cualquier semana.
+#
+# Ramas: un alumno sigue B5A o B5B, así que la carga se mide por rama (lo común
+# más lo de su rama) y un video solo de B5A no pesa en la semana de B5B.
+#
+# Algoritmo: voraz (de mayor a menor duración, cada video en la posición de su
+# ventana con menos carga acumulada) y después búsqueda local: se mueve cada
+# video a la mejor posición mientras baje la suma de cuadrados de las cargas
+# semanales, hasta PASSES pasadas o que ninguna mejore.
+
+DEFAULT_VIDEO_MINUTES = 60.0
+DEFAULT_BOOK_MINUTES = 120.0
+MINUTES_PER_PAGE = 2.0
+MAX_PER_WEEK = 180.0
+PASSES = 20
+TRACKS = ("B5A", "B5B")
+RANKS = {"B0": 0, "B1": 1, "B2": 2, "B3": 3, "B4": 4, "B5A": 5, "B5B": 5}
+
+_CLOCK_RE = re.compile(r"^(?:(\d+):)?(\d{1,2}):(\d{1,2})$")
+
+
+def parse_minutes(value: Any) -> Optional[float]:
+    """Minutos de ``value``: número (minutos), "H:MM:SS" o "MM:SS"; ``None`` si no se entiende."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    m = _CLOCK_RE.match(text)
+    if m:
+        h, mm, ss = int(m.group(1) or 0), int(m.group(2)), int(m.group(3))
+        minutes = h * 60 + mm + ss / 60
+        return minutes or None
+    try:
+        minutes = float(text)
+    except ValueError:
+        return None
+    return minutes if minutes > 0 else None
+
+
+def duration(item: Resource, default: float) -> float:
+    extra = item.extra or {}
+    minutes = parse_minutes(extra.get("duration"))
+    if minutes:
+        return minutes
+    pages = extra.get("pages")
+    if isinstance(pages, (int, float)) and not isinstance(pages, bool) and pages > 0:
+        return pages * MINUTES_PER_PAGE
+    stamps = getattr(item, "timestamps", None)
+    if isinstance(stamps, dict):
+        marks = [m for m in map(parse_minutes, stamps.values()) if m]
+        if marks:
+            return max(marks)
+    return default
+
+
+def tracks_of(item: Resource) -> Tuple[int, ...]:
+    """Ramas en las que pesa el item: solo la suya si es de B5A/B5B, si no todas."""
+    own = tuple(n for n, t in enumerate(TRACKS) if t in item.blocks)
+    if own and all(b in TRACKS for b in item.blocks):
+        return own
+    return tuple(range(len(TRACKS)))
+
+
+class Task(NamedTuple):
+    pos: int  # posición en index.items
+    key: str
+    minutes: float
+    span: int  # semanas seguidas que ocupa
+    tracks: Tuple[int, ...]
+    rank: Optional[int]
+
+
+def tasks_for(index: ResourceIndex, max_per_week: float = MAX_PER_WEEK) -> List[Task]:
+    out = []
+    for pos, it in enumerate(index.items):
+        minutes = duration(it, DEFAULT_VIDEO_MINUTES)
+        ranks = [RANKS[b] for b in it.blocks if b in RANKS]
+        out.append(
+            Task(
+                pos,
+                str(it.id or it.title),
+                minutes,
+                max(1, math.ceil(minutes / max_per_week)),
+                tracks_of(it),
+                min(ranks) if ranks else None,
+            )
+        )
+    return out
+
+
+Loads = List[List[float]]  # [rama][semana] -> minutos
+
+
+def empty_loads(nweeks: int) -> Loads:
+    return [[0.0] * nweeks for _ in TRACKS]
+
+
+def fixed_loads(index: ResourceIndex, weeks: Sequence[str], default: float = DEFAULT_BOOK_MINUTES) -> Loads:
+    """Carga actual de ``index`` (p. ej. los libros) según sus ``weeks``."""
+    col = {w: n for n, w in enumerate(weeks)}
+    loads = empty_loads(len(weeks))
+    for it in index.items:
+        cols = [col[w] for w in it.weeks if w in col]
+        if not cols:
+            continue
+        share = duration(it, default) / len(cols)
+        for t in tracks_of(it):
+            for c in cols:
+                loads[t][c] += share
+    return loads
+
+
+def windows(tasks: Sequence[Task], nweeks: int) -> List[Tuple[int, int]]:
+    """Primera y última semana de inicio posibles de cada tarea (índices de columna)."""
+    per_rank: Dict[int, List[float]] = {}
+    widest: Dict[int, int] = {}
+    for t in tasks:
+        if t.rank is None:
+            continue
+        acc = per_rank.setdefault(t.rank, [0.0] * len(TRACKS))
+        for k in t.tracks:
+            acc[k] += t.minutes
+        widest[t.rank] = max(widest.get(t.rank, 1), t.span)
+    # Cada bloque ocupa una franja proporcional a su carga (la de la rama más cargada)
+    load = {r: max(acc) for r, acc in per_rank.items()}
+    total = sum(load.values()) or 1.0
+    bounds: Dict[int, Tuple[int, int]] = {}
+    done = 0.0
+    for r in sorted(load):
+        lo = min(int(done / total * nweeks), nweeks - 1)
+        done += load[r]
+        end = max(math.ceil(done / total * nweeks), lo + widest[r])
+        if end > nweeks:
+            lo, end = max(0, lo - (end - nweeks)), nweeks
+        bounds[r] = (lo, end)
+
+    out = []
+    for t in tasks:
+        lo, end = bounds[t.rank] if t.rank is not None else (0, nweeks)
+        last = max(lo, min(end, nweeks) - t.span)
+        out.append((min(lo, max(0, nweeks - t.span)), max(0, min(last, nweeks - t.span))))
+    return out
+
+
+def _add(loads: Loads, task: Task, start: int, sign: float) -> None:
+    share = sign * task.minutes / task.span
+    for k in task.tracks:
+        row = loads[k]
+        for c in range(start, min(start + task.span, len(row))):
+            row[c] += share
+
+
+def _best_start(loads: Loads, task: Task, lo: int, hi: int) -> Tuple[int, float]:
+    # Suma de carga de las ramas del item en cada ventana [s, s + span): la menor
+    # es la que menos sube la suma de cuadrados al ubicarlo ahí
+    end = min(hi + task.span, len(loads[0]))
+    if len(task.tracks) == 1:
+        col = loads[task.tracks[0]][lo:end]
+    else:
+        col = [sum(v) for v in zip(*(loads[k][lo:end] for k in task.tracks))]
+    run = sum(col[: task.span])
+    best, best_cost = lo, run
+    for s in range(lo + 1, hi + 1):
+        run += col[s - lo + task.span - 1] - col[s - lo - 1]
+        if run < best_cost - 1e-9:
+            best, best_cost = s, run
+    return best, best_cost
+
+
+def schedule(
+    tasks: Sequence[Task], nweeks: int, fixed: Optional[Loads] = None, passes: int = PASSES
+) -> Tuple[List[int], Loads]:
+    """Semana de inicio (columna) de cada tarea y cargas resultantes por rama."""
+    loads = [list(row) for row in fixed] if fixed is not None else empty_loads(nweeks)
+    bounds = windows(tasks, nweeks)
+    starts = [0] * len(tasks)
+    order = sorted(range(len(tasks)), key=lambda i: (-tasks[i].minutes, tasks[i].key))
+
+    with timings.span("voraz"):
+        for i in order:
+            starts[i], _ = _best_start(loads, tasks[i], *bounds[i])
+            _add(loads, tasks[i], starts[i], 1.0)
+
+    with timings.span("búsqueda local"):
+        for _ in range(passes):
+            moved = False
+            for i in order:
+                task, lo, hi = tasks[i], *bounds[i]
+                if lo == hi:
+                    continue
+                _add(loads, task, starts[i], -1.0)
+                best, cost = _best_start(loads, task, lo, hi)
+                _, current = _best_start(loads, task, starts[i], starts[i])
+                if cost < current - 1e-6:
+                    starts[i], moved = best, True
+                _add(loads, task, starts[i], 1.0)
+            if not moved:
+                break
+    return starts, loads
+
+
+def current_loads(tasks: Sequence[Task], index: ResourceIndex, weeks: Sequence[str], fixed: Optional[Loads] = None) -> Loads:
+    """Cargas por rama con las ``weeks`` escritas a mano en el catálogo."""
+    col = {w: n for n, w in enumerate(weeks)}
+    loads = [list(row) for row in fixed] if fixed is not None else empty_loads(len(weeks))
+    for t in tasks:
+        cols = [col[w] for w in index.items[t.pos].weeks if w in col]
+        for k in t.tracks:
+            for c in cols:
+                loads[k][c] += t.minutes / len(cols)
+    return loads
+
+
+class Proposal(NamedTuple):
+    weeks: List[str]
+    tasks: List[Task]
+    assigned: List[List[str]]  # semanas propuestas por tarea
+    before: Loads
+    after: Loads
+
+
+def propose(
+    videos: ResourceIndex,
+    weeks: Sequence[str],
+    books: Optional[ResourceIndex] = None,
+    max_per_week: float = MAX_PER_WEEK,
+    passes: int = PASSES,
+) -> Proposal:
+    tasks = tasks_for(videos, max_per_week)
+    fixed = fixed_loads(books, weeks) if books is not None else None
+    starts, after = schedule(tasks, len(weeks), fixed, passes)
+    assigned = [list(weeks[s : s + t.span]) for t, s in zip(tasks, starts)]
+    return Proposal(list(weeks), tasks, assigned, current_loads(tasks, videos, weeks, fixed), after)
+
+
+def changes(proposal: Proposal, videos: ResourceIndex) -> List[Tuple[str, List[str], List[str]]]:
+    """``(id, semanas actuales, propuestas)`` de los videos que cambian."""
+    out = []
+    for t, new in zip(proposal.tasks, proposal.assigned):
+        old = videos.items[t.pos].weeks
+        if old != new:
+            out.append((t.key, old, new))
+    return out
+
+
+def hours(minutes: float) -> str:
+    m = int(round(minutes))
+    return f"{m // 60}:{m % 60:02d}"
+
+
+def stats(loads: Loads) -> Tuple[float, float]:
+    """(máximo, desviación estándar) de la carga semanal, sobre todas las ramas."""
+    values = [v for row in loads for v in row]
+    return max(values, default=0.0), pstdev(values) if len(values) > 1 else 0.0
+
+
+def report(proposal: Proposal) -> List[str]:
+    names = "/".join(TRACKS)
+    lines = [f"{'Semana':<7} {'Actual ' + names:>18} {'Propuesta ' + names:>21}"]
+    for c, w in enumerate(proposal.weeks):
+        before = " / ".join(hours(row[c]) for row in proposal.before)
+        after = " / ".join(hours(row[c]) for row in proposal.after)
+        lines.append(f"{w:<7} {before:>18} {after:>21}")
+    (bmax, bdev), (amax, adev) = stats(proposal.before), stats(proposal.after)
+    lines.append(
+        f"Máximo semanal: {hours(bmax)} -> {hours(amax)}; desviación: {hours(bdev)} -> {hours(adev)}"
+    )
+    return lines
+
+
+def suggestions_yaml(proposal: Proposal, videos: ResourceIndex) -> str:
+    """Semanas propuestas de los videos que cambian, como YAML ``id: [S1, S2]``."""
+    lines = ["# Semanas propuestas por `python -m tools.plan schedule` (campo weeks de resources/videos.yml)"]
+    for key, _, new in changes(proposal, videos):
+        lines.append(f"{key}: [{', '.join(new)}]")
+    return "\n".join(lines) + "\n"
+
+
+def apply_proposal(proposal: Proposal, videos: ResourceIndex) -> ResourceIndex:
+    """Índice igual a ``videos`` pero con las semanas propuestas."""
+    collections: Dict[str, List[Dict[str, Any]]] = {}
+    for t, new in zip(proposal.tasks, proposal.assigned):
+        it = videos.items[t.pos]
+        collections.setdefault(it.collection, []).append({**it.as_dict(), "weeks": new})
+    return ResourceIndex({**videos.meta, "collections": collections}, videos.item_cls)
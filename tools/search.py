@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import marshal
+import math
+import os
+import re
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from tools import index_cache, timings
+
+# Búsqueda de texto sobre los catálogos (``python -m tools.plan search ...``).
+#
+# Por catálogo se guarda un segmento en <CACHE_DIR>/search/<sha1 de la ruta>.bin:
+#
+#   docs      un marshal por item (lo que se muestra + sus términos); None = borrado
+#   postings  término -> array de ids de documento + array de pesos (tf ponderado)
+#   vocab     "\ntérmino\ntérmino\n...": un fragmento ("decor") se expande a los
+#             términos que lo contienen con un str.find en C, sin recorrer el vocabulario
+#
+# Se indexan título, autor, temas y etiquetas de timestamps (con pesos por campo)
+# y se puntúa con BM25. Si el YAML cambia solo se vuelven a tokenizar los items
+# nuevos o modificados: los demás conservan su id y sus postings.
+
+FORMAT = 1
+K1, B = 1.2, 0.75
+FIELD_WEIGHTS = {"title": 3.0, "topics": 2.0, "timestamps": 1.5, "author": 1.0}
+MIN_FRAGMENT = 3  # largo mínimo de un término de consulta para buscarlo como fragmento
+MAX_EXPANSIONS = 64
+TOP = 10
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Minúsculas, sin tildes, separado en letras y dígitos ("pyqt5_intro" -> pyqt5, intro)."""
+    return list(_tokens(str(text)))
+
+
+@lru_cache(maxsize=1 << 16)
+def _tokens(text: str) -> Tuple[str, ...]:
+    # Autores, temas y etiquetas se repiten mucho entre items: se tokenizan una vez
+    import unicodedata
+
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return tuple(_WORD_RE.findall(text.lower()))
+
+
+def timestamp_labels(ts: Any) -> List[Tuple[str, str]]:
+    """(etiqueta, instante) de ``timestamps``, sea dict ``{etiqueta: hh:mm:ss}`` o lista."""
+    if isinstance(ts, dict):
+        return [(str(k), str(v)) for k, v in ts.items()]
+    if isinstance(ts, list):
+        out: List[Tuple[str, str]] = []
+        for t in ts:
+            if isinstance(t, dict):
+                out += [(str(k), str(v)) for k, v in t.items()]
+            else:
+                out.append((str(t), ""))
+        return out
+    return []
+
+
+class Doc(NamedTuple):
+    key: str
+    kind: str
+    title: str
+    url: str
+    author: str
+    topics: List[str]
+    timestamps: List[Tuple[str, str]]
+    terms: Tuple[str, ...]  # para quitar sus postings si el item cambia
+
+
+def make_doc(kind: str, key: str, item: Dict[str, Any]) -> Tuple[Doc, Dict[str, float]]:
+    """Documento a mostrar y sus términos con el tf ponderado por campo."""
+    fields = {
+        "title": _tokens(str(item.get("title") or "")),
+        "author": _tokens(str(item.get("author") or "")),
+        "topics": [t for topic in item.get("topics") or [] for t in _tokens(str(topic))],
+        "timestamps": [t for label, _ in timestamp_labels(item.get("timestamps")) for t in _tokens(label)],
+    }
+    terms: Dict[str, float] = {}
+    for field, tokens in fields.items():
+        w = FIELD_WEIGHTS[field]
+        for t in tokens:
+            terms[t] = terms.get(t, 0.0) + w
+    doc = Doc(
+        key,
+        kind,
+        str(item.get("title") or "Sin título"),
+        str(item.get("url") or item.get("local_path") or ""),
+        str(item.get("author") or ""),
+        [str(t) for t in item.get("topics") or []],
+        timestamp_labels(item.get("timestamps")),
+        tuple(terms),
+    )
+    return doc, terms
+
+
+def _digest(item: Dict[str, Any]) -> bytes:
+    return hashlib.sha1(repr(item).encode("utf-8")).digest()
+
+
+def _items(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # Clave estable por item: colección/id (con sufijo si el id se repite)
+    seen: Dict[str, int] = {}
+    for coll, items in (data.get("collections") or {}).items():
+        for n, it in enumerate(items or []):
+            if not isinstance(it, dict):
+                continue
+            key = f"{coll}/{it.get('id', n)}"
+            dup = seen[key] = seen.get(key, 0) + 1
+            yield (key if dup == 1 else f"{key}#{dup}"), it
+
+
+class Segment:
+    """Índice invertido de un catálogo."""
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.stamp: Tuple[str, int, int, str] = ("", 0, 0, "")  # (ruta, tamaño, mtime_ns, sha256)
+        self.docs: List[Optional[bytes]] = []
+        self.keys: Dict[str, int] = {}
+        self.digests: Dict[str, bytes] = {}
+        self.lengths = array("f")
+        self.postings: Dict[str, bytes] = {}
+        self.vocab = "\n"
+        self.live = 0
+
+    # --- construcción ---
+    def update(self, data: Dict[str, Any]) -> Tuple[int, int]:
+        """Sincroniza con el YAML ``data``; devuelve (items re-tokenizados, items borrados)."""
+        current = dict(_items(data))
+        gone = [k for k in self.keys if k not in current]
+        changed: List[Tuple[str, Dict[str, Any], bytes]] = []
+        for key, it in current.items():
+            digest = _digest(it)
+            if self.digests.get(key) != digest:
+                changed.append((key, it, digest))
+
+        dead: Set[int] = set()
+        touched: Set[str] = set()
+        for key in gone + [k for k, *_ in changed if k in self.keys]:
+            i = self.keys.pop(key)
+            del self.digests[key]
+            old = self.doc(i)
+            touched.update(old.terms)
+            dead.add(i)
+            self.docs[i] = None
+            self.lengths[i] = 0.0
+
+        added: Dict[str, List[Tuple[int, float]]] = {}
+        for key, it, digest in changed:
+            doc, terms = make_doc(self.kind, key, it)
+            i = len(self.docs)
+            self.docs.append(marshal.dumps(tuple(doc)))
+            self.lengths.append(sum(terms.values()))
+            self.keys[key], self.digests[key] = i, digest
+            for t, w in terms.items():
+                added.setdefault(t, []).append((i, w))
+
+        for t in touched | set(added):
+            ids, weights = self.postings_of(t)
+            pairs = [(i, w) for i, w in zip(ids, weights) if i not in dead] + added.get(t, [])
+            if pairs:
+                self.postings[t] = array("I", [i for i, _ in pairs]).tobytes() + array("f", [w for _, w in pairs]).tobytes()
+            else:
+                self.postings.pop(t, None)
+        if touched or added:
+            self.vocab = "\n" + "\n".join(self.postings) + "\n"
+        self.live = len(self.keys)
+        return len(changed), len(gone)
+
+    # --- lectura ---
+    def doc(self, i: int) -> Doc:
+        return Doc(*marshal.loads(self.docs[i]))  # type: ignore[arg-type]
+
+    def postings_of(self, term: str) -> Tuple[array, array]:
+        raw = self.postings.get(term)
+        ids, weights = array("I"), array("f")
+        if raw:
+            half = len(raw) // 2
+            ids.frombytes(raw[:half])
+            weights.frombytes(raw[half:])
+        return ids, weights
+
+    def expand(self, token: str) -> List[Tuple[str, float]]:
+        """Términos del vocabulario para ``token``: exacto (peso 1) y, si es largo, los que lo contienen."""
+        out = [(token, 1.0)] if token in self.postings else []
+        if len(token) < MIN_FRAGMENT:
+            return out
+        vocab, pos = self.vocab, 0
+        while len(out) < MAX_EXPANSIONS:
+            pos = vocab.find(token, pos)
+            if pos < 0:
+                break
+            start = vocab.rfind("\n", 0, pos) + 1
+            end = vocab.index("\n", pos)
+            term = vocab[start:end]
+            if term != token:
+                out.append((term, len(token) / len(term)))
+            pos = end
+        return out
+
+    # --- persistencia ---
+    def dumps(self) -> bytes:
+        rec = (
+            FORMAT,
+            self.kind,
+            self.stamp,
+            self.docs,
+            self.keys,
+            self.digests,
+            self.lengths.tobytes(),
+            self.postings,
+            self.live,
+        )
+        return marshal.dumps(rec)
+
+    @classmethod
+    def loads(cls, raw: bytes) -> Optional["Segment"]:
+        rec = marshal.loads(raw)
+        if rec[0] != FORMAT:
+            return None
+        seg = cls(rec[1])
+        seg.stamp, seg.docs, seg.keys, seg.digests = tuple(rec[2]), rec[3], rec[4], rec[5]
+        seg.lengths.frombytes(rec[6])
+        seg.postings, seg.live = rec[7], rec[8]
+        seg.vocab = "\n" + "\n".join(seg.postings) + "\n"
+        return seg
+
+
+def segment_path(path: Path) -> Path:
+    key = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:20]
+    return index_cache.CACHE_DIR / "search" / f"{key}.bin"
+
+
+def load_segment(path: Path, kind: str, use_cache: bool = True) -> Segment:
+    """Segmento de ``path`` vigente: desde la caché, actualizado por items o construido."""
+    cached = use_cache and index_cache.enabled()
+    st = path.stat()
+    src = str(path.resolve())
+    seg: Optional[Segment] = None
+    if cached:
+        try:
+            seg = Segment.loads(segment_path(path).read_bytes())
+        except (OSError, ValueError, EOFError, TypeError, IndexError):
+            seg = None
+    if seg is not None and seg.stamp[:3] == (src, st.st_size, st.st_mtime_ns):
+        return seg
+
+    with timings.span(f"indexar búsqueda {path.name}"):
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if seg is None or seg.kind != kind or seg.stamp[0] != src:
+            seg = Segment(kind)
+        if seg.stamp[3] != digest:
+            seg.update(index_cache.load_yaml(path, use_cache=use_cache))
+            # Demasiados borrados: se reconstruye para compactar ids y postings
+            if len(seg.docs) > 2 * max(seg.live, 1):
+                seg = Segment(kind)
+                seg.update(index_cache.load_yaml(path, use_cache=use_cache))
+        seg.stamp = (src, st.st_size, st.st_mtime_ns, digest)
+    if cached:
+        entry = segment_path(path)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(seg.dumps())
+            os.replace(tmp, entry)
+        except OSError:
+            pass  # la caché es opcional
+    return seg
+
+
+class Hit(NamedTuple):
+    score: float
+    doc: Doc
+
+
+def search(query: str, segments: Iterable[Segment], k: int = TOP) -> List[Hit]:
+    """Los ``k`` documentos con mayor BM25 para ``query`` (estadísticas comunes a todos los segmentos)."""
+    segments = [s for s in segments if s.live]
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not segments or not tokens or k <= 0:
+        return []
+    n = sum(s.live for s in segments)
+    avglen = sum(sum(s.lengths) for s in segments) / n or 1.0
+    norm, scale = K1 * (1 - B), K1 * B / avglen
+
+    expansions = [[s.expand(t) for s in segments] for t in tokens]
+    # df por término distinto: dos palabras de la consulta pueden expandirse al mismo
+    df: Dict[str, int] = {}
+    for si, seg in enumerate(segments):
+        for term in {term for per_seg in expansions for term, _ in per_seg[si]}:
+            df[term] = df.get(term, 0) + len(seg.postings.get(term, b"")) // 8
+
+    top: List[Tuple[float, int, int]] = []
+    for si, seg in enumerate(segments):
+        lengths = seg.lengths
+        scores: Dict[int, float] = {}
+        for per_seg in expansions:
+            # Cada término de la consulta cuenta una vez por documento (la mejor de sus expansiones)
+            best: Dict[int, float] = {}
+            for term, qw in per_seg[si]:
+                ids, weights = seg.postings_of(term)
+                c = qw * math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5)) * (K1 + 1)
+                vals = [c * tf / (tf + norm + scale * dl) for tf, dl in zip(weights, map(lengths.__getitem__, ids))]
+                if not best:
+                    best = dict(zip(ids, vals))
+                    continue
+                for i, v in zip(ids, vals):
+                    if v > best.get(i, 0.0):
+                        best[i] = v
+            if not scores:
+                scores = best
+                continue
+            if len(best) > len(scores):
+                scores, best = best, scores
+            for i, v in best.items():
+                scores[i] = scores.get(i, 0.0) + v
+        top += heapq.nlargest(k, ((v, -i, si) for i, v in scores.items()))
+    top = heapq.nlargest(k, top)
+    return [Hit(score, segments[si].doc(-neg)) for score, neg, si in top]
+
+
+def format_hit(hit: Hit, query: str) -> str:
+    doc = hit.doc
+    wanted = set(tokenize(query))
+    marks = [
+        f"{label} @ {at}" if at else label
+        for label, at in doc.timestamps
+        if any(q in t for q in wanted for t in tokenize(label))
+    ]
+    extra = f" — {', '.join(marks)}" if marks else ""
+    author = f" — {doc.author}" if doc.author else ""
+    kind = "video" if doc.kind == "videos" else "libro"
+    return f"{hit.score:6.2f}  [{kind}] {doc.title}{author} ({doc.url}){extra}"
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from tools import suggest_books, suggest_videos, timings
+from tools.resource_index import ResourceIndex
+
+# Servidor local que mantiene cargados videos.yml y books.yml y responde las mismas
+# secciones Markdown que suggest_videos / suggest_books. Cliente: tools/suggest_client.py
+#
+#   GET /videos?week=S11&topics=poo,decoradores
+#   GET /books?block=B3
+#   GET /health
+
+HOST = "127.0.0.1"
+PORT = 8765
+POLL_SECONDS = 0.5
+
+
+class Catalogs:
+    """Índices en memoria con recarga cuando cambia el YAML (tamaño o mtime)."""
+
+    def __init__(self, videos: Path, books: Path, use_cache: bool = True) -> None:
+        self.paths: Dict[str, Path] = {"videos": videos, "books": books}
+        self.use_cache = use_cache
+        self.indexes: Dict[str, ResourceIndex] = {}
+        self.errors: Dict[str, str] = {}  # último error de carga, por catálogo
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _load(self, kind: str) -> ResourceIndex:
+        if kind == "videos":
+            return suggest_videos.load_index(self.paths[kind], use_cache=self.use_cache)
+        return suggest_books.load_index(self.paths[kind], use_cache=self.use_cache)
+
+    def refresh(self) -> List[str]:
+        """Recarga los índices cuyo archivo cambió; devuelve cuáles se recargaron."""
+        reloaded = []
+        with self._lock:
+            for kind, path in self.paths.items():
+                try:
+                    st = path.stat()
+                except OSError as e:
+                    self.errors[kind] = str(e)
+                    continue  # durante un guardado el archivo puede no existir un instante
+                stamp = (st.st_size, st.st_mtime_ns)
+                if self._stamps.get(kind) == stamp:
+                    continue
+                try:
+                    self.indexes[kind] = self._load(kind)
+                except Exception as e:  # YAML a medio escribir: se conserva el índice anterior
+                    print(f"AVISO: no se pudo recargar {path}: {e}", file=sys.stderr)
+                    self.errors[kind] = str(e)
+                    continue
+                self.errors.pop(kind, None)
+                self._stamps[kind] = stamp
+                reloaded.append(kind)
+        return reloaded
+
+    def render(
+        self, kind: str, week: Optional[str], block: Optional[str], topics: List[str]
+    ) -> Tuple[str, int]:
+        """Devuelve (Markdown, nº de items) igual que las CLIs suggest_*.
+
+        LookupError (con el error de carga) si el catálogo nunca se pudo cargar.
+        """
+        index = self.indexes.get(kind)
+        if index is None:
+            raise LookupError(self.errors.get(kind, f"{self.paths[kind]} sin cargar"))
+        week = week.upper() if week else None
+        block = block.upper() if block else None
+        items = index.query(week=week, block=block, topics=topics)
+        if kind == "videos":
+            return suggest_videos.md_section(week, items), len(items)
+        return suggest_books.to_md(week, items), len(items)
+
+
+def watch(catalogs: Catalogs, stop: threading.Event, interval: float = POLL_SECONDS) -> None:
+    while not stop.wait(interval):
+        for kind in catalogs.refresh():
+            print(f"(Recargado: {catalogs.paths[kind]})", file=sys.stderr)
+
+
+def make_handler(catalogs: Catalogs) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            url = urlparse(self.path)
+            kind = url.path.strip("/")
+            if kind == "health":
+                return self._reply(200, "ok\n", 0)
+            if kind not in catalogs.paths:
+                return self._reply(404, f"Ruta desconocida: {url.path}\n", 0)
+            q = parse_qs(url.query)
+            topics = [t for v in q.get("topics", []) for t in v.split(",") if t]
+            try:
+                with timings.span(f"GET /{kind}"):
+                    body, count = catalogs.render(
+                        kind, q.get("week", [None])[0], q.get("block", [None])[0], topics
+                    )
+            except LookupError as e:
+                return self._reply(503, f"Catálogo {kind} no disponible: {e.args[0]}\n", 0)
+            self._reply(200, body, count)
+
+        def _reply(self, status: int, body: str, count: int) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/markdown; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("X-Count", str(count))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def make_server(catalogs: Catalogs, host: str = HOST, port: int = PORT) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), make_handler(catalogs))
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        prog="serve",
+        description="Servidor local con los índices de videos y libros cargados en memoria.",
+    )
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--videos", default=str(suggest_videos.INDEX_PATH), help="Ruta a resources/videos.yml")
+    ap.add_argument("--books", default=str(suggest_books.INDEX), help="Ruta a resources/books.yml")
+    ap.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    timings.add_args(ap)
+    args = ap.parse_args(argv)
+
+    # Con --timings la tabla (carga inicial, recargas y cada consulta) sale al cerrar el servidor
+    with timings.session(args):
+        catalogs = Catalogs(Path(args.videos), Path(args.books), use_cache=not args.no_cache)
+        server = make_server(catalogs, args.host, args.port)
+        stop = threading.Event()
+        threading.Thread(target=watch, args=(catalogs, stop), daemon=True).start()
+        print(f"Escuchando en http://{args.host}:{server.server_port} (Ctrl+C para salir)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tools import index_cache, timings
+
+# Catálogos partidos en carpetas: resources/videos.d/*.yml en lugar de resources/videos.yml.
+#
+# Cada shard tiene el mismo formato que el catálogo único (``collections`` con una
+# o más colecciones) y el catálogo es la unión de todos, por orden de nombre de
+# archivo; si dos shards traen la misma colección, sus items se concatenan. Los
+# archivos que empiezan por "." o "_" se ignoran. Las rutas de siempre siguen
+# valiendo: si resources/videos.yml no existe pero resources/videos.d/ sí, se usa
+# la carpeta (``source``).
+#
+# Cada shard tiene su propia entrada en la caché binaria (tools/index_cache.py),
+# así que editar uno solo vuelve a parsear ese. Los que hay que parsear se
+# reparten en un pool de procesos cuando son varios.
+#
+# Manifiesto: <CACHE_DIR>/shards/<sha1 de la carpeta>.bin guarda por shard
+# (tamaño, mtime_ns, semanas, bloques). Se deriva de los shards (no se edita ni
+# se versiona). Con un filtro de semanas o bloques solo se cargan los shards que
+# pueden tener items que lo cumplan; los que cambiaron desde el manifiesto se
+# cargan siempre (y lo actualizan).
+
+SUFFIXES = (".yml", ".yaml")
+FORMAT = 1
+
+Summary = Tuple[int, int, Tuple[str, ...], Tuple[str, ...]]  # tamaño, mtime_ns, semanas, bloques
+
+
+def source(path: Path) -> Path:
+    """``path``, o la carpeta ``<nombre>.d`` de al lado si el archivo no existe y la carpeta sí."""
+    if path.exists() or path.suffix not in SUFFIXES:
+        return path
+    shard_dir = path.with_suffix(".d")
+    return shard_dir if shard_dir.is_dir() else path
+
+
+def is_sharded(path: Path) -> bool:
+    return path.is_dir()
+
+
+def files(shard_dir: Path) -> List[Path]:
+    """Shards de la carpeta, por nombre."""
+    return sorted(
+        p for p in shard_dir.iterdir() if p.suffix in SUFFIXES and not p.name.startswith((".", "_")) and p.is_file()
+    )
+
+
+def expand(paths: Iterable[Path]) -> List[Path]:
+    """Archivos YAML de ``paths``: cada carpeta de shards se reemplaza por sus shards."""
+    out: List[Path] = []
+    for path in paths:
+        path = source(Path(path))
+        out.extend(files(path) if is_sharded(path) else [path])
+    return out
+
+
+def manifest_path(shard_dir: Path, cache_dir: Optional[Path] = None) -> Path:
+    key = hashlib.sha1(str(shard_dir.resolve()).encode("utf-8")).hexdigest()[:20]
+    return (cache_dir or index_cache.CACHE_DIR) / "shards" / f"{key}.bin"
+
+
+def _read_manifest(entry: Path) -> Dict[str, Summary]:
+    try:
+        rec = marshal.loads(entry.read_bytes())
+    except (OSError, ValueError, EOFError, TypeError):
+        return {}
+    if not isinstance(rec, tuple) or len(rec) != 2 or rec[0] != FORMAT or not isinstance(rec[1], dict):
+        return {}
+    return rec[1]
+
+
+def _write_manifest(entry: Path, manifest: Dict[str, Summary]) -> None:
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps((FORMAT, manifest)))
+        os.replace(tmp, entry)
+    except OSError:
+        pass  # como la caché: sin permisos se sigue sin manifiesto
+
+
+def summarize(data: Dict[str, Any]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Semanas y bloques que aparecen en los items de un shard."""
+    weeks, blocks = set(), set()
+    for items in (data.get("collections") or {}).values():
+        for it in items or []:
+            if isinstance(it, dict):
+                weeks.update(str(w) for w in it.get("weeks") or ())
+                blocks.update(str(b) for b in it.get("blocks") or ())
+    return tuple(sorted(weeks)), tuple(sorted(blocks))
+
+
+def _wanted(summary: Summary, weeks: Optional[Iterable[str]], blocks: Optional[Iterable[str]]) -> bool:
+    if weeks is not None and not set(summary[2]).intersection(weeks):
+        return False
+    if blocks is not None and not set(summary[3]).intersection(blocks):
+        return False
+    return True
+
+
+def _parse(path: Path, use_cache: bool) -> Any:
+    return index_cache.load_yaml(path, use_cache=use_cache)
+
+
+def _load_all(paths: List[Path], stale: List[Path], use_cache: bool, jobs: Optional[int]) -> Dict[Path, Any]:
+    """Carga ``paths``; los ``stale`` (caché vencida o sin manifiesto) en paralelo si son varios."""
+    jobs = jobs or os.cpu_count() or 1
+    out: Dict[Path, Any] = {}
+    if jobs > 1 and len(stale) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with timings.span("parsear shards"), ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as pool:
+            for path, data in zip(stale, pool.map(_parse, stale, [use_cache] * len(stale))):
+                out[path] = data
+    for path in paths:
+        if path not in out:
+            out[path] = _parse(path, use_cache)
+    return out
+
+
+def merge(parts: Iterable[Any]) -> Dict[str, Any]:
+    """Une shards ya cargados en un solo catálogo (los metadatos salen del primero)."""
+    data: Dict[str, Any] = {}
+    collections: Dict[str, List[Any]] = {}
+    for part in parts:
+        for key, value in (part or {}).items():
+            if key != "collections":
+                data.setdefault(key, value)
+        for name, items in ((part or {}).get("collections") or {}).items():
+            collections.setdefault(name, []).extend(items or [])
+    data["collections"] = collections
+    return data
+
+
+def load_catalogue(
+    path: Path,
+    use_cache: bool = True,
+    weeks: Optional[Iterable[str]] = None,
+    blocks: Optional[Iterable[str]] = None,
+    jobs: Optional[int] = None,
+) -> Any:
+    """YAML de ``path`` (archivo o carpeta de shards), como ``index_cache.load_yaml``.
+
+    ``weeks``/``blocks``: en una carpeta, omitir los shards que según el manifiesto
+    no tienen items de esas semanas/bloques. El resultado puede traer items de más
+    (filtrar sigue siendo cosa de la consulta), nunca de menos.
+    """
+    path = source(path)
+    if not is_sharded(path):
+        return index_cache.load_yaml(path, use_cache=use_cache)
+    weeks = None if weeks is None else set(weeks)
+    blocks = None if blocks is None else set(blocks)
+
+    with timings.span(f"cargar {path.name}"):
+        cached = use_cache and index_cache.enabled()
+        entry = manifest_path(path)
+        manifest = _read_manifest(entry) if cached else {}
+        selected: List[Path] = []
+        stale: List[Path] = []
+        stamps: Dict[str, Tuple[int, int]] = {}
+        for shard in files(path):
+            st = shard.stat()
+            stamps[shard.name] = (st.st_size, st.st_mtime_ns)
+            known = manifest.get(shard.name)
+            if known is not None and tuple(known[:2]) == stamps[shard.name]:
+                if _wanted(known, weeks, blocks):
+                    selected.append(shard)
+            else:
+                selected.append(shard)
+                stale.append(shard)
+
+        loaded = _load_all(selected, stale, use_cache, jobs)
+
+        if cached:
+            fresh = {name: manifest[name] for name in stamps if name in manifest}
+            for shard in stale:
+                fresh[shard.name] = (*stamps[shard.name], *summarize(loaded[shard] or {}))
+            if fresh != manifest:
+                _write_manifest(entry, fresh)
+        return merge(loaded[shard] for shard in selected)
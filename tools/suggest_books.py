@@ -1,68 +1,74 @@
 from __future__ import annotations
-import argparse, sys
+import sys
 from pathlib import Path
-from typing import Any, Dict, List
-import yaml  # type: ignore
+from typing import Any, Dict, Iterable, List, Optional
+
+if __package__ in (None, ""):  # ejecutado como script: python tools/suggest_books.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import ranking, shards, timings
+from tools.records import BookItem
+from tools.resource_index import ResourceIndex
 
 INDEX = Path("resources/books.yml")
 
-def load_index() -> Dict[str, Any]:
-    if not INDEX.exists():
-        sys.exit("ERROR: no existe resources/books.yml")
-    return yaml.safe_load(INDEX.read_text(encoding="utf-8"))
+def load_index(path: Path = INDEX, use_cache: bool = True, weeks: Optional[Iterable[str]] = None, blocks: Optional[Iterable[str]] = None) -> ResourceIndex:
+    path = shards.source(path)
+    if not path.exists():
+        sys.exit(f"ERROR: no existe {path}")
+    return ResourceIndex(shards.load_catalogue(path, use_cache=use_cache, weeks=weeks, blocks=blocks), BookItem)
 
-def select(colls: List[List[Dict[str,Any]]], week: str|None, block: str|None, topics: List[str]) -> List[Dict[str,Any]]:
-    out: List[Dict[str,Any]] = []
-    for items in colls:
-        for it in items:
-            ok = True
-            if week:
-                ok &= week in (it.get("weeks") or [])
-            if block:
-                ok &= block in (it.get("blocks") or [])
-            if topics:
-                need = {t.lower() for t in topics}
-                has = {t.lower() for t in (it.get("topics") or [])}
-                ok &= bool(need <= has or need & has)
-            if ok:
-                out.append(it)
-    out.sort(key=lambda d: d.get("title","").lower())
-    return out
+def select(index: Dict[str,Any], week: str|None, block: str|None, topics: List[str]) -> List[BookItem]:
+    # semana ∩ bloque ∩ (algún tema en común), ordenado por título
+    return ResourceIndex.ensure(index, BookItem).query(week=week, block=block, topics=topics)
 
-def to_md(week: str|None, items: List[Dict[str,Any]]) -> str:
+def to_md(week: str|None, items: List[BookItem]) -> str:
     title = f"### Lecturas base — {week}" if week else "### Lecturas base"
     lines = [title, ""]
     if not items:
         lines.append("_(No se encontraron libros para este filtro)_")
         return "\n".join(lines)
     for it in items:
-        title = it.get("title","Sin título")
-        author = it.get("author","")
-        url = it.get("url")
-        lp = it.get("local_path")
-        link = url or (f"`{lp}`" if lp else "#")
-        topics = ", ".join(it.get("topics") or [])
+        title = it.title if it.title is not None else "Sin título"
+        author = it.author if it.author is not None else ""
+        lp = it.local_path
+        link = it.url or (f"`{lp}`" if lp else "#")
+        topics = ", ".join(it.topics)
         meta = []
-        if it.get("year"): meta.append(str(it["year"]))
-        if it.get("lang"): meta.append(it["lang"])
+        if it.year: meta.append(str(it.year))
+        if it.lang: meta.append(it.lang)
         meta_str = f" ({', '.join(meta)})" if meta else ""
         lines.append(f"- [{title}]({link}) — {author}{meta_str} — temas: {topics}")
     return "\n".join(lines)
 
 def main(argv: List[str]) -> int:
+    import argparse
+
     ap = argparse.ArgumentParser()
     g = ap.add_mutually_exclusive_group(required=True)
     g.add_argument("-w","--week", help="Semana S1..S24")
     g.add_argument("-b","--block", help="Bloque B1..B5A/B5B")
     ap.add_argument("-t","--topics", nargs="*", default=[])
+    ap.add_argument("--top", type=int, metavar="K", help="Mostrar solo los K primeros resultados")
+    ap.add_argument("--rank", action="store_true", help="Ordenar por relevancia (la semana/bloque acerca en vez de filtrar)")
+    ap.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    timings.add_args(ap)
     args = ap.parse_args(argv)
 
-    data = load_index()
-    colls = list((data.get("collections") or {}).values())
     week = args.week.upper() if args.week else None
     block = args.block.upper() if args.block else None
-    items = select(colls, week, block, args.topics)
-    print(to_md(week, items))
+    with timings.session(args):
+        # Con --rank la semana/bloque no filtra: hace falta el catálogo entero
+        shard_filter = {} if args.rank else {"weeks": [week] if week else None, "blocks": [block] if block else None}
+        index = load_index(use_cache=not args.no_cache, **shard_filter)
+        with timings.span("selección"):
+            if args.rank:
+                items = [it for _, it in ranking.rank(index, args.topics, week=week, block=block, k=args.top or ranking.TOP)]
+            else:
+                items = select(index, week, block, args.topics)[:args.top]
+        with timings.span("render"):
+            md = to_md(week, items)
+        print(md)
     return 0
 
 if __name__ == "__main__":
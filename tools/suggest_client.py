@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import sys
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+from tools import timings
+
+# Cliente ligero de tools/serve.py: misma salida que suggest_videos / suggest_books,
+# sin cargar PyYAML ni los índices en cada llamada.
+
+SERVER = os.environ.get("TOOLS_SERVER", "127.0.0.1:8765")
+
+
+def fetch(
+    kind: str,
+    week: Optional[str] = None,
+    block: Optional[str] = None,
+    topics: Optional[List[str]] = None,
+    server: str = SERVER,
+    timeout: float = 5.0,
+) -> Tuple[str, int]:
+    """Consulta el servidor; devuelve (Markdown, nº de items)."""
+    params = {k: v for k, v in (("week", week), ("block", block)) if v}
+    if topics:
+        params["topics"] = ",".join(topics)
+    host, _, port = server.rpartition(":")
+    conn = http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=timeout)
+    try:
+        conn.request("GET", f"/{kind}?{urlencode(params)}")
+        resp = conn.getresponse()
+        body = resp.read().decode("utf-8")
+        if resp.status != 200:
+            raise RuntimeError(body.strip())
+        return body, int(resp.getheader("X-Count") or 0)
+    finally:
+        conn.close()
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(prog="suggest_client", description="Consulta el servidor de tools/serve.py")
+    ap.add_argument("kind", choices=["videos", "books"])
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("-w", "--week", help="Semana S1..S24")
+    g.add_argument("-b", "--block", help="Bloque B1..B5A/B5B")
+    ap.add_argument("-t", "--topics", nargs="*", default=[])
+    ap.add_argument("--strict", action="store_true", help="Salir con código 3 si no hay resultados")
+    ap.add_argument("--server", default=SERVER, help="host:puerto del servidor")
+    timings.add_args(ap)
+    args = ap.parse_args(argv)
+
+    with timings.session(args):
+        try:
+            with timings.span("consulta"):
+                body, count = fetch(args.kind, args.week, args.block, args.topics, server=args.server)
+        except (OSError, RuntimeError) as e:
+            print(f"ERROR: no se pudo consultar {args.server} ({e}). ¿Está corriendo python -m tools.serve?", file=sys.stderr)
+            return 2
+        print(body)
+    if args.strict and not count:
+        return 3
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
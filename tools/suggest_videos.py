@@ -1,75 +1,68 @@
 from __future__ import annotations
 
-import argparse
 import sys
 from pathlib import Path
-from textwrap import dedent
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
 
-try:
-    import yaml  # type: ignore
-except Exception as e:  # pragma: no cover
-    print("ERROR: PyYAML no está instalado. Ejecuta:\n  python -m pip install pyyaml", file=sys.stderr)
-    sys.exit(2)
+if __package__ in (None, ""):  # ejecutado como script: python tools/suggest_videos.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools import ranking, shards, timings
+from tools.records import TOPICS, VideoItem
+from tools.resource_index import ResourceIndex, norm_topics
+
+if TYPE_CHECKING:
+    import argparse
 
 INDEX_PATH = Path("resources/videos.yml")
 
 
-def load_index(path: Path = INDEX_PATH) -> Dict[str, Any]:
+def load_index(
+    path: Path = INDEX_PATH,
+    use_cache: bool = True,
+    weeks: Optional[Iterable[str]] = None,
+    blocks: Optional[Iterable[str]] = None,
+) -> ResourceIndex:
+    path = shards.source(path)
     if not path.exists():
         print(f"ERROR: No existe el archivo {path}.", file=sys.stderr)
         sys.exit(2)
-    return yaml.safe_load(path.read_text(encoding="utf-8"))
+    return ResourceIndex(shards.load_catalogue(path, use_cache=use_cache, weeks=weeks, blocks=blocks), VideoItem)
 
 
-def by_week(index: Dict[str, Any], week: str) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    collections = index.get("collections", {}) or {}
-    for items in collections.values():
-        for item in items:
-            if week in (item.get("weeks") or []):
-                out.append(item)
-    return out
+def by_week(index: Dict[str, Any], week: str) -> List[VideoItem]:
+    return ResourceIndex.ensure(index, VideoItem).query(week=week)
 
 
-def by_block(index: Dict[str, Any], block: str) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
-    collections = index.get("collections", {}) or {}
-    for items in collections.values():
-        for item in items:
-            if block in (item.get("blocks") or []):
-                out.append(item)
-    return out
+def by_block(index: Dict[str, Any], block: str) -> List[VideoItem]:
+    return ResourceIndex.ensure(index, VideoItem).query(block=block)
 
 
-def filter_topics(items: List[Dict[str, Any]], topics: List[str]) -> List[Dict[str, Any]]:
-    if not topics:
+def filter_topics(items: List[VideoItem], topics: List[str]) -> List[VideoItem]:
+    need = norm_topics(topics)
+    if not need:
         return items
-    need = {t.strip().lower() for t in topics if t.strip()}
-    out = []
-    for it in items:
-        has = {t.lower() for t in (it.get("topics") or [])}
-        if need <= has or need & has:
-            out.append(it)
-    return out
+    # Los temas de cada registro ya están normalizados como máscara de bits
+    mask = TOPICS.mask(need, add=False)
+    return [it for it in items if it.topic_mask & mask]
 
 
-def md_section(week: str | None, items: List[Dict[str, Any]]) -> str:
+def md_section(week: str | None, items: List[VideoItem], sort: bool = True) -> str:
     header = f"### Videos base — {week}" if week else "### Videos base"
     lines = [header, ""]
     if not items:
         lines.append("_(No se encontraron videos para los filtros dados)_")
         return "\n".join(lines)
 
-    # Ordena por título
-    items = sorted(items, key=lambda d: d.get("title", "").lower())
+    # Ordena por título (salvo que ya vengan por relevancia)
+    if sort:
+        items = sorted(items, key=lambda v: str(v.title or "").lower())
 
     for v in items:
-        title = v.get("title", "Sin título")
-        url = v.get("url", "#")
-        topics = ", ".join(v.get("topics") or [])
-        ts = v.get("timestamps") or {}
+        title = v.title if v.title is not None else "Sin título"
+        url = v.url if v.url is not None else "#"
+        topics = ", ".join(v.topics)
+        ts = v.timestamps or {}
         ts_inline = ""
         if isinstance(ts, dict) and ts:
             ts_inline = " · " + ", ".join(f"{k}: {val}" for k, val in ts.items())
@@ -79,6 +72,8 @@ def md_section(week: str | None, items: List[Dict[str, Any]]) -> str:
 
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
+    import argparse
+
     p = argparse.ArgumentParser(
         prog="suggest_videos",
         description="Genera la sección 'Videos base' en Markdown desde resources/videos.yml.",
@@ -99,24 +94,35 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         action="store_true",
         help="Salir con código 3 si no hay resultados (útil en CI).",
     )
+    p.add_argument("--top", type=int, metavar="K", help="Mostrar solo los K primeros resultados")
+    p.add_argument(
+        "--rank",
+        action="store_true",
+        help="Ordenar por relevancia (temas raros pesan más; la semana/bloque acerca en vez de filtrar)",
+    )
+    p.add_argument("--no-cache", action="store_true", help="Ignorar la caché binaria del índice")
+    timings.add_args(p)
     return p.parse_args(argv)
 
 
 def main(argv: List[str]) -> int:
     args = parse_args(argv)
-    index = load_index()
-
-    if args.week:
-        items = by_week(index, args.week.upper())
-        scope = args.week.upper()
-    else:
-        items = by_block(index, args.block.upper())
-        scope = args.block.upper()
-
-    items = filter_topics(items, args.topics)
-
-    section = md_section(args.week.upper() if args.week else None, items)
-    print(section)
+    week = args.week.upper() if args.week else None
+    block = args.block.upper() if args.block else None
+
+    with timings.session(args):
+        # Con --rank la semana/bloque no filtra: hace falta el catálogo entero
+        shard_filter = {} if args.rank else {"weeks": [week] if week else None, "blocks": [block] if block else None}
+        index = load_index(use_cache=not args.no_cache, **shard_filter)
+        with timings.span("selección"):
+            if args.rank:
+                ranked = ranking.rank(index, args.topics, week=week, block=block, k=args.top or ranking.TOP)
+                items = [it for _, it in ranked]
+            else:
+                items = index.query(week=week, block=block, topics=args.topics)[: args.top]
+        with timings.span("render"):
+            section = md_section(week, items, sort=not args.rank)
+        print(section)
 
     if args.strict and not items:
         return 3
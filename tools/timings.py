@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, NamedTuple, Optional
+
+# Fases con nombre para medir las herramientas de tools/:
+#
+#   with timings.span("render"):
+#       ...
+#
+# Desactivado (lo normal), ``span`` devuelve un contexto nulo compartido: ni reloj
+# ni asignaciones. ``session(args)`` lo activa según --timings / --profile /
+# --cprofile (ver ``add_args``) y al terminar imprime la tabla en stderr y escribe
+# la traza en formato Chrome (se abre en chrome://tracing, Perfetto o speedscope).
+# Solo se registran las fases del proceso principal, no las de un pool de procesos.
+
+
+class Event(NamedTuple):
+    name: str
+    start_ns: int
+    dur_ns: int
+    tid: int
+    depth: int
+
+
+class Recorder:
+    def __init__(self) -> None:
+        import threading
+
+        self.t0 = time.perf_counter_ns()
+        self.events: List[Event] = []
+        self._local = threading.local()
+        self._ident = threading.get_ident
+
+    def enter(self) -> int:
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def exit(self, name: str, start_ns: int, depth: int) -> None:
+        self._local.depth = depth
+        end = time.perf_counter_ns()
+        self.events.append(Event(name, start_ns, end - start_ns, self._ident(), depth))
+
+
+class _Span:
+    __slots__ = ("rec", "name", "start", "depth")
+
+    def __init__(self, rec: Recorder, name: str) -> None:
+        self.rec, self.name = rec, name
+
+    def __enter__(self) -> None:
+        self.depth = self.rec.enter()
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.rec.exit(self.name, self.start, self.depth)
+
+
+_NULL: ContextManager[None] = nullcontext()
+_REC: Optional[Recorder] = None
+
+
+def span(name: str) -> ContextManager[None]:
+    """Contexto que mide la fase ``name`` si hay una sesión activa."""
+    rec = _REC
+    if rec is None:
+        return _NULL
+    return _Span(rec, name)
+
+
+def start() -> Recorder:
+    global _REC
+    _REC = Recorder()
+    return _REC
+
+
+def stop() -> Optional[Recorder]:
+    global _REC
+    rec, _REC = _REC, None
+    return rec
+
+
+def table(rec: Recorder) -> str:
+    """Tabla por fase (llamadas, total, % del total), en orden de primera aparición."""
+    rows: Dict[str, List[int]] = {}  # nombre -> [profundidad, llamadas, ns]
+    for ev in sorted(rec.events, key=lambda e: e.start_ns):
+        row = rows.setdefault(ev.name, [ev.depth, 0, 0])
+        row[1] += 1
+        row[2] += ev.dur_ns
+    wall = max((r[2] for r in rows.values() if r[0] == 0), default=0) or 1
+    width = max([len("fase")] + [2 * d + len(n) for n, (d, _, _) in rows.items()])
+    lines = [f"{'fase':<{width}}  {'llamadas':>8}  {'total ms':>10}  {'%':>6}"]
+    for name, (depth, calls, ns) in rows.items():
+        label = "  " * depth + name
+        lines.append(f"{label:<{width}}  {calls:>8}  {ns / 1e6:>10.2f}  {100 * ns / wall:>6.1f}")
+    return "\n".join(lines)
+
+
+def chrome_trace(rec: Recorder) -> Dict[str, Any]:
+    """Eventos completos ("ph": "X") del formato Trace Event de Chrome, en microsegundos."""
+    pid = os.getpid()
+    events = [
+        {
+            "name": ev.name,
+            "cat": "tools",
+            "ph": "X",
+            "ts": (ev.start_ns - rec.t0) / 1000,
+            "dur": ev.dur_ns / 1000,
+            "pid": pid,
+            "tid": ev.tid,
+        }
+        for ev in rec.events
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def add_args(p: Any) -> None:
+    """Agrega --timings, --profile y --cprofile a un ArgumentParser."""
+    p.add_argument("--timings", action="store_true", help="Imprimir en stderr el tiempo de cada fase")
+    p.add_argument("--profile", metavar="OUT.json", help="Guardar las fases como traza Chrome/speedscope")
+    p.add_argument("--cprofile", metavar="OUT.prof", help="Guardar además un volcado de cProfile (pstats)")
+
+
+@contextmanager
+def session(args: Any, name: str = "total") -> Iterator[None]:
+    """Mide el bloque como la fase ``name`` según las opciones de ``add_args``."""
+    show = getattr(args, "timings", False)
+    trace = getattr(args, "profile", None)
+    dump = getattr(args, "cprofile", None)
+    if not (show or trace or dump):
+        yield
+        return
+
+    profiler = None
+    if dump:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    rec = start()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with span(name):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stop()
+        if show:
+            print(table(rec), file=sys.stderr)
+        if trace:
+            import json
+
+            with open(trace, "w", encoding="utf-8") as f:
+                json.dump(chrome_trace(rec), f)
+        if profiler is not None:
+            profiler.dump_stats(dump)
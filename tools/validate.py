@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from tools import index_cache, shards, timings
+
+# Validación de resources/videos.yml y resources/books.yml en una sola pasada.
+#
+# Usa el YAML ya parseado (caché binaria de tools/index_cache.py) y recorre cada
+# item una vez con reglas precompiladas (conjuntos y regex). Se reportan todos los
+# errores, no solo el primero; solo cuando los hay se recorre el texto para ubicar
+# la línea de cada item ("- id: ...").
+
+VIDEOS = Path("resources/videos.yml")
+BOOKS = Path("resources/books.yml")
+
+VALID_DIFFICULTY = {"beginner", "intermediate", "advanced", "mixed"}
+VALID_BLOCKS = {"B0", "B1", "B2", "B3", "B4", "B5A", "B5B"}
+VALID_WEEKS = {f"S{i}" for i in range(1, 25)}
+URL_RE = re.compile(r"https?://[^\s/?#]+[^\s]*", re.IGNORECASE)
+TOPIC_RE = re.compile(r"[a-z0-9]+(?:_[a-z0-9]+)*")
+_ITEM_LINE_RE = re.compile(r"^[ \t]*-[ \t]+id:[ \t]*[\"']?([^\"'\s#,}]+)", re.MULTILINE)
+
+# Subir al cambiar las reglas: invalida los resultados guardados en caché
+RULES_VERSION = 1
+
+# Claves mínimas por catálogo; los libros pueden tener local_path en lugar de url
+REQUIRED = {"videos": {"id", "title", "url"}, "books": {"id", "title"}}
+
+
+class Issue(NamedTuple):
+    path: str
+    line: Optional[int]
+    item: str
+    message: str
+
+    def __str__(self) -> str:
+        where = f"{self.path}:{self.line}" if self.line else self.path
+        item = f" [{self.item}]" if self.item else ""
+        return f"{where}:{item} {self.message}"
+
+
+def _item_lines(text: str) -> Dict[str, List[int]]:
+    """id -> números de línea (en orden) de cada ``- id: ...`` del archivo."""
+    lines: Dict[str, List[int]] = {}
+    line, pos = 1, 0
+    for m in _ITEM_LINE_RE.finditer(text):
+        line += text.count("\n", pos, m.start())
+        pos = m.start()
+        lines.setdefault(m.group(1), []).append(line)
+    return lines
+
+
+def _kind(path: Path) -> str:
+    name = path.parent.name if path.parent.suffix == ".d" else path.name  # shards: resources/books.d/x.yml
+    return "books" if "book" in name else "videos"
+
+
+def _subset(values: List[Any], valid: Set[str]) -> bool:
+    try:
+        return valid.issuperset(values)
+    except TypeError:  # valores no hashables (listas, dicts)
+        return False
+
+
+def _bad_values(values: List[Any], ok: Callable[[Any], bool]) -> List[str]:
+    return [str(v) for v in values if not ok(v)]
+
+
+def _valid_topic(t: Any, vocab: Optional[Set[str]]) -> bool:
+    return isinstance(t, str) and TOPIC_RE.fullmatch(t) is not None and (vocab is None or t in vocab)
+
+
+def validate_file(
+    path: Path,
+    seen: Optional[Dict[str, str]] = None,
+    vocab: Optional[Set[str]] = None,
+    use_cache: bool = True,
+) -> List[Issue]:
+    """Valida un catálogo; ``seen`` (id -> archivo) acumula ids entre archivos para detectar duplicados."""
+    seen = {} if seen is None else seen
+    p = str(path)
+    if not path.exists():
+        return [Issue(p, None, "", "no existe el archivo")]
+    try:
+        data = index_cache.load_yaml(path, use_cache=use_cache)
+    except ValueError as e:
+        return [Issue(p, None, "", str(e))]
+    except Exception as e:  # yaml.YAMLError
+        mark = getattr(e, "problem_mark", None)
+        return [Issue(p, mark.line + 1 if mark else None, "", f"YAML inválido: {getattr(e, 'problem', e)}")]
+
+    collections = data.get("collections")
+    if not isinstance(collections, dict):
+        return [Issue(p, None, "", "debe existir 'collections' (dict)")]
+
+    required = REQUIRED[_kind(path)]
+    good_topics: Set[str] = set()  # temas ya comprobados: cada tema distinto pasa una vez por la regex
+    found: List[Tuple[str, int, str]] = []  # (id, aparición, mensaje); la línea se resuelve al final
+    occurrences: Dict[str, int] = {}
+    issues: List[Issue] = []
+    had_items = False
+
+    for coll, items in collections.items():
+        if not isinstance(items, list):
+            issues.append(Issue(p, None, "", f"'{coll}' debe ser lista"))
+            continue
+        for n, it in enumerate(items):
+            had_items = True
+            if not isinstance(it, dict):
+                issues.append(Issue(p, None, f"{coll}[{n}]", "el item debe ser un dict"))
+                continue
+            errors: List[str] = []
+            _id = str(it.get("id", f"{coll}[{n}]"))
+
+            missing = required - it.keys()
+            if missing:
+                errors.append(f"falta(n) clave(s): {', '.join(sorted(missing))}")
+            if "id" in it:
+                if _id in seen:
+                    errors.append(f"ID duplicado (ya definido en {seen[_id]})")
+                else:
+                    seen[_id] = p
+            title = it.get("title")
+            if "title" in it and not (isinstance(title, str) and title):
+                errors.append("'title' debe ser texto no vacío")
+
+            url = it.get("url")
+            if url is not None:
+                if not (isinstance(url, str) and URL_RE.fullmatch(url)):
+                    errors.append(f"URL inválida: {url}")
+            elif "url" not in missing and not it.get("local_path"):
+                errors.append("define 'url' o 'local_path'")
+
+            weeks, blocks = it.get("weeks") or [], it.get("blocks") or []
+            if not (weeks or blocks):
+                errors.append("define 'weeks' y/o 'blocks'")
+            for field, values, valid in (("weeks", weeks, VALID_WEEKS), ("blocks", blocks, VALID_BLOCKS)):
+                if not isinstance(values, list):
+                    errors.append(f"'{field}' debe ser lista")
+                elif not _subset(values, valid):
+                    errors.append(f"{field} fuera de rango: {', '.join(_bad_values(values, valid.__contains__))}")
+
+            diff = it.get("difficulty")
+            if diff is not None and diff not in VALID_DIFFICULTY:
+                errors.append(f"difficulty inválido: {diff}")
+
+            topics = it.get("topics") or []
+            if not isinstance(topics, list):
+                errors.append("'topics' debe ser lista")
+            elif not _subset(topics, good_topics):
+                bad = _bad_values(topics, lambda t: _valid_topic(t, vocab))
+                good_topics.update(t for t in topics if _valid_topic(t, vocab))
+                if bad:
+                    errors.append(f"temas fuera del vocabulario: {', '.join(bad)}")
+
+            ts = it.get("timestamps")
+            if ts is not None and not isinstance(ts, (dict, list)):
+                errors.append("'timestamps' debe ser un dict o una lista")
+
+            if errors:
+                k = occurrences.get(_id, 0)
+                found += [(_id, k, msg) for msg in errors]
+            occurrences[_id] = occurrences.get(_id, 0) + 1
+
+    if found:
+        # Solo si hay errores se recorre el texto para ubicar cada item
+        lines = _item_lines(path.read_text(encoding="utf-8"))
+        for _id, k, msg in found:
+            at = lines.get(_id, [])
+            issues.append(Issue(p, at[k] if k < len(at) else None, _id, msg))
+    if not had_items:
+        issues.append(Issue(p, None, "", "no hay items en 'collections'"))
+    return issues
+
+
+def _verdict_path(paths: List[Path], vocab: Optional[Set[str]]) -> Optional[Path]:
+    """Entrada de caché del resultado: depende de reglas, vocabulario y (ruta, tamaño, mtime) de cada archivo."""
+    stamps: List[Any] = [RULES_VERSION, sorted(vocab) if vocab is not None else None]
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        stamps.append([str(path.resolve()), st.st_size, st.st_mtime_ns])
+    key = hashlib.sha1(json.dumps(stamps).encode("utf-8")).hexdigest()[:20]
+    return index_cache.CACHE_DIR / "validate" / f"{key}.json"
+
+
+def validate(paths: Iterable[Path], vocab: Optional[Set[str]] = None, use_cache: bool = True) -> List[Issue]:
+    """Valida varios catálogos compartiendo el espacio de ids.
+
+    Con caché, si ningún archivo cambió desde la última ejecución se devuelve el
+    resultado guardado sin volver a cargar los catálogos.
+    """
+    paths = shards.expand(paths)  # una carpeta de shards se valida archivo por archivo
+    entry = _verdict_path(paths, vocab) if use_cache and index_cache.enabled() else None
+    if entry is not None:
+        try:
+            return [Issue(*row) for row in json.loads(entry.read_text(encoding="utf-8"))]
+        except (OSError, ValueError, TypeError):
+            pass
+
+    seen: Dict[str, str] = {}
+    issues: List[Issue] = []
+    for path in paths:
+        with timings.span(f"validar {path.name}"):
+            issues += validate_file(path, seen, vocab=vocab, use_cache=use_cache)
+
+    if entry is not None:
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps([list(i) for i in issues], ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, entry)
+        except OSError:
+            pass
+    return issues
+
+
+def load_vocab(path: Path) -> Set[str]:
+    words = (line.split("#", 1)[0].strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return {w for w in words if w}
+
+
+def main(argv: List[str] | None = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="validate", description="Valida resources/videos.yml y resources/books.yml")
+    ap.add_argument("paths", nargs="*", default=[str(VIDEOS), str(BOOKS)], help="Catálogos a validar")
+    ap.add_argument("--vocab", help="Archivo con el vocabulario de temas permitido (uno por línea)")
+    ap.add_argument("--no-cache", action="store_true", help="Ignorar la caché (índice binario y resultados previos)")
+    timings.add_args(ap)
+    args = ap.parse_args(sys.argv[1:] if argv is None else argv)
+
+    vocab = load_vocab(Path(args.vocab)) if args.vocab else None
+    with timings.session(args):
+        issues = validate([Path(p) for p in args.paths], vocab=vocab, use_cache=not args.no_cache)
+    for issue in issues:
+        print(issue)
+    if issues:
+        print(f"ERROR: {len(issues)} problema(s) encontrados", file=sys.stderr)
+        return 1
+    print(f"OK: {', '.join(args.paths)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
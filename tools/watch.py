@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tools import shards, timings
+from tools.calendar_doc import BOOKS, SKIPPED, VIDEOS, count_changed
+from tools.records import WEEKS, BookItem, VideoItem
+from tools.resource_index import ResourceIndex
+
+# Modo vigilancia (``python -m tools.plan watch``): mantiene los índices en memoria
+# y, cuando se guarda videos.yml o books.yml, vuelve a inyectar solo las semanas
+# afectadas, en una sola escritura del calendario.
+#
+# Los cambios llegan por inotify (vía ctypes, sin dependencias) o, si no está
+# disponible, comparando tamaño y mtime cada POLL_INTERVAL. Se vigila la carpeta
+# y no el archivo: los editores suelen guardar en un temporal y renombrarlo.
+# Una ráfaga de guardados se junta hasta que pasan DEBOUNCE segundos sin eventos.
+# Con catálogos en carpetas (tools/shards.py) se vigilan los shards que había al
+# arrancar; uno nuevo requiere reiniciar.
+#
+# Semanas afectadas = las de los items que aparecen o desaparecen al comparar el
+# índice anterior con el nuevo (un item editado cuenta como los dos).
+
+DEBOUNCE = 0.1
+MAX_DELAY = 1.0  # tope de espera si los eventos no paran
+POLL_INTERVAL = 0.25
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_Q_OVERFLOW = 0x4000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (+ nombre)
+
+
+class PollWatcher:
+    """Compara (tamaño, mtime_ns) de los archivos cada ``interval`` segundos."""
+
+    def __init__(self, paths: Iterable[Path], interval: float = POLL_INTERVAL) -> None:
+        self.paths = [Path(p).resolve() for p in paths]
+        self.interval = interval
+        self.seen = {p: self._stamp(p) for p in self.paths}
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Archivos que cambiaron; vacío si pasó ``timeout`` (None = esperar sin límite)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for p in self.paths:
+                stamp = self._stamp(p)
+                if stamp != self.seen[p]:
+                    self.seen[p] = stamp
+                    changed.add(p)
+            if changed:
+                return changed
+            left = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if left <= 0:
+                return set()
+            time.sleep(left)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """inotify sobre las carpetas de los archivos (Linux)."""
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        import ctypes
+        import ctypes.util
+
+        self.paths = [Path(p).resolve() for p in paths]
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify no disponible")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs: Dict[int, Path] = {}
+        for d in {p.parent for p in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(d), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(err, f"inotify_add_watch {d}")
+            self.dirs[wd] = d
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not select.select([self.fd], [], [], left)[0]:
+                return set()
+            changed = self._read()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def _read(self) -> Set[Path]:
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed: Set[Path] = set()
+        pos = 0
+        while pos + _EVENT.size <= len(buf):
+            wd, mask, _, size = _EVENT.unpack_from(buf, pos)
+            name = buf[pos + _EVENT.size : pos + _EVENT.size + size].rstrip(b"\0")
+            pos += _EVENT.size + size
+            if mask & IN_Q_OVERFLOW:
+                return set(self.paths)  # se perdieron eventos: revisar todo
+            d = self.dirs.get(wd)
+            if d is not None and (d / os.fsdecode(name)) in self.paths:
+                changed.add(d / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def open_watcher(paths: Iterable[Path], poll: bool = False) -> "PollWatcher | InotifyWatcher":
+    paths = list(paths)
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError, TypeError):
+            pass  # sin inotify (o sin libc): se sondea
+    return PollWatcher(paths)
+
+
+def collect(watcher: "PollWatcher | InotifyWatcher", debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY) -> Set[Path]:
+    """Espera un cambio y junta los que lleguen hasta ``debounce`` segundos de calma."""
+    changed = watcher.wait(None)
+    deadline = time.monotonic() + max_delay
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return changed
+        more = watcher.wait(min(debounce, left))
+        if not more:
+            return changed
+        changed |= more
+
+
+Prints = Dict[Tuple[str, int], int]  # (repr del dict, n.º de repetición) -> semanas (máscara de WEEKS)
+
+
+def fingerprints(index: ResourceIndex) -> Prints:
+    out: Prints = {}
+    seen: Dict[str, int] = {}
+    for it in index.items:
+        key = repr(it.as_dict())
+        n = seen[key] = seen.get(key, 0) + 1
+        out[(key, n)] = it.weeks_mask
+    return out
+
+
+def affected_weeks(old: Prints, new: Prints) -> List[str]:
+    """Semanas cuyo listado cambia entre dos índices, en orden S1..S24."""
+    mask = 0
+    for key in old.keys() ^ new.keys():
+        mask |= old.get(key, 0) | new.get(key, 0)
+    return WEEKS.decode(mask)
+
+
+class Session:
+    """Estado en memoria de ``plan watch``: un índice (y sus huellas) por catálogo."""
+
+    ITEMS = {VIDEOS: VideoItem, BOOKS: BookItem}
+
+    def __init__(
+        self,
+        calendar: Path,
+        videos_index: Optional[Path] = None,
+        books_index: Optional[Path] = None,
+        use_cache: bool = True,
+        create_if_missing: bool = False,
+    ) -> None:
+        self.calendar = calendar
+        self.paths = {
+            m: shards.source(Path(p)).resolve() for m, p in ((VIDEOS, videos_index), (BOOKS, books_index)) if p
+        }
+        self.use_cache = use_cache
+        self.create_if_missing = create_if_missing
+        self.indexes: Dict[str, ResourceIndex] = {}
+        self.prints: Dict[str, Prints] = {}
+        for marker, path in self.paths.items():
+            index = self._load(marker)
+            if index is None:
+                raise ValueError(f"No se pudo cargar {path}")
+            self.indexes[marker], self.prints[marker] = index, fingerprints(index)
+
+    def _load(self, marker: str) -> Optional[ResourceIndex]:
+        path = self.paths[marker]
+        try:
+            data = shards.load_catalogue(path, use_cache=self.use_cache)
+            return ResourceIndex(data, self.ITEMS[marker])
+        except Exception as e:  # YAML a medio guardar o inválido: se conserva el índice anterior
+            print(f"ERROR: {path}: {e}", file=sys.stderr)
+            return None
+
+    def watched(self) -> List[Path]:
+        """Archivos a vigilar: los catálogos o, si están en carpetas, sus shards actuales."""
+        return shards.expand(self.paths.values())
+
+    def sync(self, weeks: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """Inyección incremental de ``weeks`` con los índices en memoria."""
+        return self._inject(list(weeks), set(self.paths))
+
+    def refresh(self, changed: Iterable[Path]) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+        """Recarga los catálogos de ``changed`` y reinyecta sus semanas afectadas."""
+        changed = {Path(p).resolve() for p in changed}
+        markers: Set[str] = set()
+        weeks: Set[str] = set()
+        for marker, path in self.paths.items():
+            if path not in changed and not any(p.parent == path for p in changed):
+                continue
+            index = self._load(marker)
+            if index is None:
+                continue
+            prints = fingerprints(index)
+            touched = affected_weeks(self.prints[marker], prints)
+            self.indexes[marker], self.prints[marker] = index, prints
+            if touched:
+                markers.add(marker)
+                weeks.update(touched)
+        ordered = [w for w in WEEKS.names if w in weeks and _in_range(w)]
+        if not ordered:
+            return [], []
+        return ordered, self._inject(ordered, markers)
+
+    def _inject(self, weeks: List[str], markers: Set[str]) -> List[Tuple[str, str, str]]:
+        from tools.plan import inject_indexes
+
+        return inject_indexes(
+            weeks,
+            self.calendar,
+            videos=self.indexes.get(VIDEOS) if VIDEOS in markers else None,
+            books=self.indexes.get(BOOKS) if BOOKS in markers else None,
+            create_if_missing=self.create_if_missing,
+        )
+
+
+def _in_range(week: str) -> bool:
+    from tools.plan import FIRST_WEEK, LAST_WEEK
+
+    return week[1:].isdigit() and FIRST_WEEK <= int(week[1:]) <= LAST_WEEK
+
+
+def summary(weeks: List[str], results: List[Tuple[str, str, str]], elapsed: float) -> str:
+    skipped = sum(1 for *_, action in results if action == SKIPPED)
+    return (
+        f"[{time.strftime('%H:%M:%S')}] {', '.join(weeks)}: {count_changed(results)} bloques modificados "
+        f"({skipped} sin cambios) en {elapsed * 1e3:.0f} ms"
+    )
+
+
+def run(
+    session: Session,
+    watcher: "PollWatcher | InotifyWatcher",
+    debounce: float = DEBOUNCE,
+    cycles: Optional[int] = None,
+    report: Callable[[str], None] = print,
+) -> None:
+    """Bucle de vigilancia (``cycles`` limita las rondas, para pruebas)."""
+    done = 0
+    while cycles is None or done < cycles:
+        changed = collect(watcher, debounce)
+        t0 = time.perf_counter()
+        with timings.span("ronda"):
+            weeks, results = session.refresh(changed)
+        if weeks:
+            report(summary(weeks, results, time.perf_counter() - t0))
+        done += 1